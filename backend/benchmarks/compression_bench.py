@@ -0,0 +1,104 @@
+"""Bytes saved and CPU spent compressing realistic API payloads.
+
+Payloads are the JSON bodies of /submissions, /tasks and /chat/messages/{id}
+at typical list sizes, serialized the way the routes do. Each row shows the
+compressed size, ratio and per-response compression time for gzip levels,
+brotli qualities (when the brotli package is installed) and raw deflate as
+used by websocket permessage-deflate.
+
+    cd backend && python benchmarks/compression_bench.py
+"""
+import gzip
+import sys
+import timeit
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.chat import Message
+from models.submission import Submission
+from models.task import Task
+from utils.serialization import dump_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPEAT = 5
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def submissions(n):
+    return [Submission(
+        task_id=str(uuid.uuid4()),
+        student_id=str(uuid.uuid4()),
+        content=f"My answer for part {i}: the reaction is exothermic because the bonds formed release more energy.",
+        submitted_at=NOW - timedelta(minutes=i),
+        status=("pending", "approved", "rejected")[i % 3],
+    ).model_dump() for i in range(n)]
+
+def tasks(n):
+    students = [str(uuid.uuid4()) for _ in range(30)]
+    return [Task(
+        title=f"Worksheet {i}",
+        description="Complete the exercises at the end of the chapter and upload a photo of your notebook.",
+        difficulty=("Easy", "Medium", "Hard")[i % 3],
+        submission_type="image",
+        deadline=NOW + timedelta(days=i % 14),
+        created_by="admin",
+        assigned_to=students,
+    ).model_dump() for i in range(n)]
+
+def messages(n):
+    chat_id, admin, student = (str(uuid.uuid4()) for _ in range(3))
+    return [Message(
+        chat_id=chat_id,
+        sender_id=(admin, student)[i % 2],
+        content=f"Message {i}: can you check question {i % 7} again? I think the units are wrong.",
+        created_at=NOW + timedelta(seconds=30 * i),
+    ).model_dump() for i in range(n)]
+
+def deflate_raw(body, level=6):
+    # permessage-deflate: raw deflate stream, as the websockets library sends it
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+CODECS = [
+    ("gzip-1", lambda body: gzip.compress(body, compresslevel=1, mtime=0)),
+    ("gzip-6", lambda body: gzip.compress(body, compresslevel=6, mtime=0)),
+    ("gzip-9", lambda body: gzip.compress(body, compresslevel=9, mtime=0)),
+    ("deflate-ws", deflate_raw),
+]
+if brotli is not None:
+    CODECS += [
+        ("br-1", lambda body: brotli.compress(body, quality=1)),
+        ("br-4", lambda body: brotli.compress(body, quality=4)),
+        ("br-11", lambda body: brotli.compress(body, quality=11)),
+    ]
+
+PAYLOADS = [
+    ("submissions x20", lambda: submissions(20)),
+    ("submissions x500", lambda: submissions(500)),
+    ("tasks x50", lambda: tasks(50)),
+    ("messages x50", lambda: messages(50)),
+    ("message x1", lambda: messages(1)[0]),
+]
+
+def main():
+    if brotli is None:
+        print("brotli not installed; showing gzip and deflate only\n")
+    print(f"{'payload':<18}{'codec':<12}{'bytes':>10}{'ratio':>8}{'us':>10}")
+    for label, make in PAYLOADS:
+        body = dump_json(make())
+        print(f"{label:<18}{'identity':<12}{len(body):>10}{1:>8.2f}{0:>10.1f}")
+        for name, codec in CODECS:
+            size = len(codec(body))
+            number = max(1, 20000 // max(len(body) // 100, 1))
+            best = min(timeit.repeat(lambda: codec(body), number=number, repeat=REPEAT)) / number
+            print(f"{'':<18}{name:<12}{size:>10}{len(body) / size:>8.2f}{best * 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
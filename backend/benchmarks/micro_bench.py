@@ -0,0 +1,281 @@
+"""Microbenchmarks of the CPU-bound work every request touches.
+
+run reports the best per-call time of each case over several repeats; calls
+per repeat are calibrated like timeit's autorange so every repeat runs for at
+least MIN_REPEAT_SECONDS. Inputs are generated from a fixed seed.
+
+save and compare judge each case by its time relative to a fixed reference
+workload timed straight after each repeat, so a machine-wide slowdown (other
+tenants, CPU steal, frequency scaling) shifts both and cancels out, while a
+slower code path does not.
+
+    cd backend && python benchmarks/micro_bench.py run
+    cd backend && python benchmarks/micro_bench.py save        # store new baselines
+    cd backend && python benchmarks/micro_bench.py compare     # exit 1 on regressions
+
+Baselines live in benchmarks/baselines/micro_bench.json and are only
+meaningful on the machine that recorded them; re-save after changing hardware.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from fastapi.security import HTTPAuthorizationCredentials
+from models.chat import Message
+from models.submission import Submission
+from models.task import Task
+from routes.progress import rank_leaderboard
+from utils.auth import create_access_token, get_current_user, get_password_hash, verify_password
+
+BASELINE_FILE = Path(__file__).parent / "baselines" / "micro_bench.json"
+DEFAULT_TOLERANCE = 0.25
+REPEAT = 7
+# Each repeat loops a case for at least this long, so timer and scheduler noise stay small
+MIN_REPEAT_SECONDS = 0.1
+# save takes the median of this many extra passes; compare re-measures cases over
+# tolerance this many more times and keeps their best score, so a short burst of
+# load is not reported as a regression
+RECHECKS = 2
+SEED = 1234
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+def _run_sync(coro):
+    # get_current_user never awaits, so it completes on the first step
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+def case_create_token(rng):
+    claims = {"sub": _uuid(rng), "role": "student"}
+    return lambda: create_access_token(claims)
+
+def case_decode_token(rng):
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer",
+        credentials=create_access_token({"sub": _uuid(rng), "role": "student"})
+    )
+    return lambda: _run_sync(get_current_user(credentials))
+
+def case_verify_password(rng):
+    # Hashed with the configured scheme, so this follows the cost factor in use
+    hashed = get_password_hash("correct horse battery staple")
+    return lambda: verify_password("correct horse battery staple", hashed)
+
+def _task_doc(rng, i):
+    return {
+        "id": _uuid(rng),
+        "title": f"Task {i}",
+        "description": "Read chapter four and summarize the key ideas. " * 4,
+        "difficulty": rng.choice(["Easy", "Medium", "Hard"]),
+        "submission_type": "text",
+        "deadline": NOW + timedelta(days=7),
+        "created_by": _uuid(rng),
+        "assigned_to": [_uuid(rng) for _ in range(30)],
+        "created_at": NOW,
+    }
+
+def _submission_doc(rng, i):
+    return {
+        "id": _uuid(rng),
+        "task_id": _uuid(rng),
+        "student_id": _uuid(rng),
+        "content": f"submission {i} " * 20,
+        "status": rng.choice(["pending", "approved", "rejected"]),
+        "submitted_at": NOW,
+        "is_late": rng.random() < 0.1,
+        "likes": rng.randrange(50),
+    }
+
+def _message_doc(rng, i):
+    return {
+        "id": _uuid(rng),
+        "chat_id": _uuid(rng),
+        "sender_id": _uuid(rng),
+        "content": f"message {i} " * 8,
+        "created_at": NOW,
+    }
+
+def _model_case(model, make_doc):
+    def case(rng):
+        doc = make_doc(rng, 0)
+        return lambda: model(**doc).model_dump()
+    return case
+
+def case_iso_dates(rng):
+    # The isinstance/fromisoformat loop the routes run over documents read from Mongo
+    docs = [{"submitted_at": (NOW + timedelta(seconds=rng.randrange(10 ** 7))).isoformat()} for _ in range(1000)]
+
+    def parse():
+        for doc in docs:
+            if isinstance(doc['submitted_at'], str):
+                datetime.fromisoformat(doc['submitted_at'])
+    return parse
+
+def _leaderboard_case(students):
+    def case(rng):
+        entries = []
+        for _ in range(students):
+            total = rng.randrange(1, 40)
+            completed = rng.randrange(total + 1)
+            entries.append({
+                "student_id": _uuid(rng),
+                "completed_tasks": completed,
+                "total_tasks": total,
+                "completion_rate": completed / total * 100,
+                "current_streak": rng.randrange(30),
+            })
+        # rank_leaderboard sorts in place, so each call gets an unsorted copy
+        return lambda: rank_leaderboard(list(entries))
+    return case
+
+CASES = {
+    "auth.create_access_token": case_create_token,
+    "auth.get_current_user": case_decode_token,
+    "auth.verify_password": case_verify_password,
+    "models.Task": _model_case(Task, _task_doc),
+    "models.Submission": _model_case(Submission, _submission_doc),
+    "models.Message": _model_case(Message, _message_doc),
+    "dates.fromisoformat_1k": case_iso_dates,
+    "leaderboard.sort_10k": _leaderboard_case(10000),
+    "leaderboard.sort_100k": _leaderboard_case(100000),
+}
+
+def reference_workload():
+    # Plain interpreter work (arithmetic, sorting, dicts, strings) that no code change touches
+    values = [(i * 7919) % 1009 for i in range(2000)]
+    ordered = sorted(values)
+    index = {str(value): position for position, value in enumerate(ordered)}
+    return sum(index[str(value)] for value in values[::7])
+
+def calibrate(timer: timeit.Timer) -> int:
+    """Calls per repeat: the first of 1, 2, 5, 10, 20, ... taking at least MIN_REPEAT_SECONDS."""
+    scale = 1
+    while True:
+        for multiple in (1, 2, 5):
+            number = multiple * scale
+            if timer.timeit(number) >= MIN_REPEAT_SECONDS:
+                return number
+        scale *= 10
+
+def measure(fn, reference: timeit.Timer, reference_number: int):
+    """Best per-call time of fn in microseconds, and its median ratio to the reference workload.
+
+    Each repeat of fn is followed by a repeat of the reference, so the two
+    see the same machine speed even when it drifts within a pass.
+    """
+    # Warm caches and lazily built validators before timing
+    fn()
+    timer = timeit.Timer(fn)
+    number = calibrate(timer)
+    times, ratios = [], []
+    for _ in range(REPEAT):
+        elapsed = timer.timeit(number) / number
+        times.append(elapsed)
+        ratios.append(elapsed / (reference.timeit(reference_number) / reference_number))
+    return min(times) * 1e6, statistics.median(ratios)
+
+def run(selected):
+    """Reference time in microseconds, then per-case times and reference ratios, from one pass."""
+    reference = timeit.Timer(reference_workload)
+    reference_number = calibrate(reference)
+    reference_time = statistics.median(reference.repeat(number=reference_number, repeat=REPEAT)) / reference_number * 1e6
+    print(f"{'(reference)':<28}{reference_time:>14.2f}")
+    times, ratios = {}, {}
+    for name in selected:
+        times[name], ratios[name] = measure(CASES[name](random.Random(SEED)), reference, reference_number)
+        print(f"{name:<28}{times[name]:>14.2f}")
+    return reference_time, times, ratios
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["run", "save", "compare"])
+    parser.add_argument("-k", dest="pattern", default="", help="only cases whose name contains this")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown as a fraction of the baseline (default 0.25)")
+    args = parser.parse_args()
+
+    selected = [name for name in CASES if args.pattern in name]
+    print(f"{'case':<28}{'us/call':>14}")
+    reference, _, ratios = run(selected)
+
+    if args.command == "save":
+        # Median of several passes, so one lucky or unlucky pass does not set the baseline
+        passes = [(reference, ratios)]
+        for _ in range(RECHECKS):
+            pass_reference, _, pass_ratios = run(selected)
+            passes.append((pass_reference, pass_ratios))
+        reference = statistics.median(pass_reference for pass_reference, _ in passes)
+        # Stored as times at the median reference speed of this save
+        results = {name: statistics.median(pass_ratios[name] for _, pass_ratios in passes) * reference
+                   for name in selected}
+        saved = BASELINE_FILE.exists() and json.loads(BASELINE_FILE.read_text())
+        baselines = {}
+        if saved and saved.get("reference"):
+            baselines = {name: value / saved["reference"] * reference for name, value in saved["cases"].items()}
+        baselines.update(results)
+        BASELINE_FILE.parent.mkdir(exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "reference": round(reference, 3),
+            "cases": {name: round(value, 3) for name, value in sorted(baselines.items())},
+        }, indent=2) + "\n")
+        print(f"Saved {len(results)} baselines to {BASELINE_FILE}")
+        return 0
+
+    if args.command == "compare":
+        if not BASELINE_FILE.exists():
+            print(f"No baselines at {BASELINE_FILE}; run with 'save' first")
+            return 2
+        saved = json.loads(BASELINE_FILE.read_text())
+        if not saved.get("reference"):
+            print(f"Baselines at {BASELINE_FILE} predate the reference workload; run with 'save' again")
+            return 2
+        baselines = saved["cases"]
+        # Times scaled to the reference speed the baselines were recorded at
+        scaled = {name: ratio * saved["reference"] for name, ratio in ratios.items()}
+        for _ in range(RECHECKS):
+            suspects = [name for name, value in scaled.items()
+                        if name in baselines and value / baselines[name] - 1 > args.tolerance]
+            if not suspects:
+                break
+            print(f"\nRe-measuring {len(suspects)} case(s) over tolerance")
+            _, _, rechecked = run(suspects)
+            for name, ratio in rechecked.items():
+                scaled[name] = min(scaled[name], ratio * saved["reference"])
+        regressions = 0
+        print(f"\n{'case':<28}{'baseline':>12}{'scaled now':>12}{'change':>9}")
+        for name, value in scaled.items():
+            if name not in baselines:
+                print(f"{name:<28}{'-':>12}{value:>12.2f}{'new':>9}")
+                continue
+            change = value / baselines[name] - 1
+            regressed = change > args.tolerance
+            regressions += regressed
+            print(f"{name:<28}{baselines[name]:>12.2f}{value:>12.2f}{change:>+8.0%}{'  REGRESSED' if regressed else ''}")
+        if regressions:
+            print(f"\n{regressions} case(s) slower than baseline by more than {args.tolerance:.0%}")
+            return 1
+        print(f"\nNo case slower than baseline by more than {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
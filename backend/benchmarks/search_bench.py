@@ -0,0 +1,131 @@
+"""Search latency over a large seeded index, checked against the p95 budget.
+
+Seeds a scratch database on MONGO_URL with chat messages drawn from a
+Zipf-distributed vocabulary, so a few words match a large share of the
+corpus and most match few, then times utils.search_index.search for common,
+rare, prefix and two-word queries as a chat participant and as an admin.
+Exits 1 when the p95 of any query kind is over the budget.
+
+    cd backend && python benchmarks/search_bench.py                      # 1,000,000 messages
+    cd backend && python benchmarks/search_bench.py --docs 100000 --keep  # reuse the seeded index
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from utils.search_index import ensure_indexes, message_entry, search
+
+SEED = 1234
+VOCABULARY = 20000
+WORDS_PER_MESSAGE = 12
+CHATS = 2000
+BATCH_SIZE = 5000
+QUERIES_PER_KIND = 100
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def vocabulary(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randrange(4, 11))))
+    return sorted(words)
+
+def zipf_weights():
+    return [1 / rank for rank in range(1, VOCABULARY + 1)]
+
+async def seed(db, docs, rng, words):
+    weights = zipf_weights()
+    sessions = [{"id": f"chat{i}", "admin_id": "admin", "student_id": f"student{i}"} for i in range(CHATS)]
+    batch = []
+    for i in range(docs):
+        session = sessions[i % CHATS]
+        message = {
+            "id": f"message{i}",
+            "chat_id": session["id"],
+            "content": " ".join(rng.choices(words, weights, k=WORDS_PER_MESSAGE)),
+            "created_at": NOW - timedelta(seconds=docs - i),
+        }
+        batch.append(message_entry(message, session))
+        if len(batch) >= BATCH_SIZE:
+            await db.search_index.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.search_index.insert_many(batch, ordered=False)
+
+def queries(rng, words):
+    common, rare = words[:20], words[len(words) // 2:]
+    return {
+        "common word": [rng.choice(common) for _ in range(QUERIES_PER_KIND)],
+        "rare word": [rng.choice(rare) for _ in range(QUERIES_PER_KIND)],
+        "prefix": [rng.choice(words)[:3] for _ in range(QUERIES_PER_KIND)],
+        "two words": [f"{rng.choice(common)} {rng.choice(rare)}" for _ in range(QUERIES_PER_KIND)],
+    }
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1000000, help="messages to seed (default 1,000,000)")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("SEARCH_P95_BUDGET_MS", "50")),
+                        help="allowed p95 per query kind in milliseconds (default 50)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database and reuse it on the next run")
+    args = parser.parse_args()
+
+    rng = random.Random(SEED)
+    words = vocabulary(rng)
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[f"{os.environ['DB_NAME']}_search_bench"]
+    existing = await db.search_index.estimated_document_count()
+    if existing != args.docs:
+        await client.drop_database(db.name)
+        await ensure_indexes(db)
+        started = time.perf_counter()
+        await seed(db, args.docs, rng, words)
+        print(f"Seeded {args.docs} messages in {time.perf_counter() - started:.0f}s")
+
+    users = {
+        "participant": {"sub": "student7", "role": "student"},
+        "admin": {"sub": "admin", "role": "admin"},
+    }
+    # Warm the index and the connection pool before timing
+    await search(db, users["admin"], words[0])
+
+    failures = []
+    print(f"{args.docs} messages, {QUERIES_PER_KIND} queries per kind, budget p95 {args.budget_ms:.0f} ms")
+    print(f"{'user':<13}{'query':<14}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'results':>9}")
+    for user_label, user in users.items():
+        for kind, texts in queries(random.Random(SEED), words).items():
+            timings, results = [], 0
+            for text in texts:
+                started = time.perf_counter()
+                results += len(await search(db, user, text))
+                timings.append((time.perf_counter() - started) * 1000)
+            p95 = percentile(timings, 0.95)
+            print(f"{user_label:<13}{kind:<14}{statistics.median(timings):>9.1f}{p95:>9.1f}{max(timings):>9.1f}{results / len(texts):>9.1f}")
+            if p95 > args.budget_ms:
+                failures.append(f"{user_label} {kind}: p95 {p95:.1f} ms")
+
+    if not args.keep:
+        await client.drop_database(db.name)
+    client.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}, over the {args.budget_ms:.0f} ms budget")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,75 @@
+"""Per-item cost of serializing documents read back from Mongo.
+
+Compares the previous path (pydantic validation in the route, then FastAPI
+re-validating and encoding through response_model) with building models via
+model_construct and via a cached TypeAdapter, both encoded by pydantic-core
+as FastJSONResponse does.
+
+    cd backend && python benchmarks/serialization_bench.py
+"""
+import json
+import sys
+import timeit
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from models.announcement import Announcement
+from models.chat import Message
+from models.submission import Submission
+
+N = 1000
+REPEAT = 5
+
+def make_docs(model, n):
+    now = datetime.now(timezone.utc)
+    docs = []
+    for i in range(n):
+        if model is Message:
+            doc = {"chat_id": "c", "sender_id": str(uuid.uuid4()), "content": f"message {i} " * 8, "created_at": now}
+        elif model is Announcement:
+            doc = {"title": f"Announcement {i}", "content": "content " * 30, "created_by": "admin", "created_at": now}
+        else:
+            doc = {"task_id": str(uuid.uuid4()), "student_id": str(uuid.uuid4()), "content": "text " * 20, "submitted_at": now}
+        doc["id"] = str(uuid.uuid4())
+        docs.append(doc)
+    return docs
+
+def previous_path(model, adapter, docs):
+    objs = [model(**doc) for doc in docs]
+    validated = adapter.validate_python(objs)
+    return json.dumps(adapter.dump_python(validated, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+def construct_path(model, adapter, docs):
+    return to_json([model.model_construct(**doc) for doc in docs])
+
+def adapter_path(model, adapter, docs):
+    return to_json(adapter.validate_python(docs))
+
+def bench(model):
+    docs = make_docs(model, N)
+    adapter = TypeAdapter(List[model])
+    results = {}
+    for name, fn in (("previous", previous_path), ("construct", construct_path), ("adapter", adapter_path)):
+        best = min(timeit.repeat(lambda: fn(model, adapter, docs), number=1, repeat=REPEAT))
+        results[name] = best / N * 1e6
+    return results
+
+def main():
+    print(f"per-item cost in microseconds, {N} documents")
+    print(f"{'model':<14}{'previous':>10}{'construct':>11}{'adapter':>9}{'speedup':>9}")
+    for model in (Message, Announcement, Submission):
+        results = bench(model)
+        speedup = results["previous"] / results["adapter"]
+        print(
+            f"{model.__name__:<14}{results['previous']:>10.2f}{results['construct']:>11.2f}"
+            f"{results['adapter']:>9.2f}{speedup:>8.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Round trips and latency of the submission/task write paths.
+
+Runs the current route handlers and the previous check-then-write sequences
+against a scratch database on MONGO_URL, counting the commands each request
+sends. Commands issued concurrently overlap, so latency drops further than
+the command count alone suggests.
+
+    cd backend && python benchmarks/write_path_bench.py
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv(Path(__file__).parent.parent / '.env')
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+import routes.submissions as submissions_routes
+import routes.tasks as tasks_routes
+from models.submission import Submission, SubmissionCreate, SubmissionUpdate
+from models.task import TaskUpdate
+from utils.progress_counters import record_counter_changes
+from utils.search_index import index_submission, index_task
+
+N = 200
+STUDENTS = 20
+IGNORED_COMMANDS = {"endSessions", "hello", "isMaster", "ismaster", "ping"}
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+async def previous_create_submission(db, task_id, student_id):
+    task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    existing = await db.submissions.find_one({"task_id": task_id, "student_id": student_id}, {"_id": 0})
+    if not task or existing:
+        raise RuntimeError("unexpected state")
+    submission = Submission(task_id=task_id, content="done", student_id=student_id).model_dump()
+    submission['submitted_at'] = submission['submitted_at'].isoformat()
+    await db.submissions.insert_one(submission)
+    await index_submission(db, submission)
+    await record_counter_changes(db, [(student_id, "completed_tasks", 1)], op_key=f"submission:{submission['id']}:create")
+
+async def previous_update_submission(db, submission_id):
+    await db.submissions.find_one({"id": submission_id}, {"_id": 0})
+    await db.submissions.update_one({"id": submission_id}, {"$set": {"status": "approved", "feedback": "ok"}})
+    await db.submissions.find_one({"id": submission_id}, {"_id": 0})
+
+async def previous_like_submission(db, submission_id):
+    await db.submissions.find_one({"id": submission_id}, {"_id": 0})
+    await db.submissions.update_one({"id": submission_id}, {"$inc": {"likes": 1}})
+
+async def previous_update_task(db, task_id):
+    await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    await db.tasks.update_one({"id": task_id}, {"$set": {"title": "Renamed"}})
+    updated = await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    await index_task(db, updated)
+
+async def seed(db, count):
+    students = [str(uuid.uuid4()) for _ in range(STUDENTS)]
+    tasks = []
+    for i in range(count):
+        tasks.append({
+            "id": str(uuid.uuid4()),
+            "title": f"Task {i}",
+            "description": "benchmark task",
+            "difficulty": "Easy",
+            "submission_type": "text",
+            "deadline": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
+            "created_by": "admin",
+            "assigned_to": students,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+    await db.tasks.insert_many(tasks)
+    return [task["id"] for task in tasks], students
+
+async def measure(counter, label, calls):
+    counter.count = 0
+    started = time.perf_counter()
+    for call in calls:
+        await call()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28}{counter.count / len(calls):>10.1f}{elapsed / len(calls) * 1000:>12.2f}")
+
+async def main():
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[counter])
+    db = client[f"{os.environ['DB_NAME']}_write_bench"]
+    await client.drop_database(db.name)
+    submissions_routes.db = db
+    tasks_routes.db = db
+    await tasks_routes.ensure_indexes(db)
+    await submissions_routes.ensure_indexes(db)
+
+    admin = {"sub": "admin", "role": "admin"}
+    task_ids, students = await seed(db, N)
+    student = {"sub": students[0], "role": "student"}
+    other_task_ids, _ = await seed(db, N)
+
+    print(f"{N} requests each, {STUDENTS} students per task")
+    print(f"{'path':<28}{'commands':>10}{'ms/request':>12}")
+
+    await measure(counter, "create_submission previous",
+                  [lambda t=t: previous_create_submission(db, t, students[1]) for t in other_task_ids])
+    await measure(counter, "create_submission current",
+                  [lambda t=t: submissions_routes.create_submission(SubmissionCreate(task_id=t), student) for t in task_ids])
+
+    submission_ids = await db.submissions.distinct("id", {"student_id": students[0]})
+    update = SubmissionUpdate(status="approved", feedback="ok")
+    await measure(counter, "update_submission previous",
+                  [lambda s=s: previous_update_submission(db, s) for s in submission_ids])
+    await measure(counter, "update_submission current",
+                  [lambda s=s: submissions_routes.update_submission(s, update, admin) for s in submission_ids])
+
+    await measure(counter, "like_submission previous",
+                  [lambda s=s: previous_like_submission(db, s) for s in submission_ids])
+    await measure(counter, "like_submission current",
+                  [lambda s=s: submissions_routes.like_submission(s, student) for s in submission_ids])
+
+    rename = TaskUpdate(title="Renamed")
+    await measure(counter, "update_task previous",
+                  [lambda t=t: previous_update_task(db, t) for t in task_ids])
+    await measure(counter, "update_task current",
+                  [lambda t=t: tasks_routes.update_task(t, rename, admin) for t in task_ids])
+
+    await client.drop_database(db.name)
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
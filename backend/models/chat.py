@@ -8,6 +8,7 @@ class MessageBase(BaseModel):
     sender_id: str
     content: str
     message_type: str = "text"  # "text" or "image"
+    blob_id: Optional[str] = None  # image payload in the blob store
 
 class MessageCreate(MessageBase):
     pass
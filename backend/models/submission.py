@@ -7,6 +7,7 @@ class SubmissionCreate(BaseModel):
     task_id: str
     content: Optional[str] = None
     submission_type: Optional[str] = None
+    blob_id: Optional[str] = None  # uploaded via POST /api/blobs
 
 class Submission(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -15,6 +16,7 @@ class Submission(BaseModel):
     student_id: str
     content: str = "Task marked as complete"
     submission_type: str = "text"
+    blob_id: Optional[str] = None  # media payload in the blob store
     status: str = "pending"  # "pending", "approved", "rejected"
     feedback: Optional[str] = None
     ai_feedback: Optional[str] = None
@@ -12,12 +12,14 @@ class TaskBase(BaseModel):
 
 class TaskCreate(TaskBase):
     assigned_to: Optional[List[str]] = []  # List of student IDs
+    assigned_groups: Optional[List[str]] = []  # List of group IDs
 
 class Task(TaskBase):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     created_by: str  # admin ID
     assigned_to: List[str] = []
+    assigned_groups: List[str] = []
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class TaskUpdate(BaseModel):
@@ -26,4 +28,5 @@ class TaskUpdate(BaseModel):
     difficulty: Optional[str] = None
     submission_type: Optional[str] = None
     deadline: Optional[datetime] = None
-    assigned_to: Optional[List[str]] = None
\ No newline at end of file
+    assigned_to: Optional[List[str]] = None
+    assigned_groups: Optional[List[str]] = None
\ No newline at end of file
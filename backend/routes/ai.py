@@ -1,34 +1,55 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from utils.auth import get_current_user
+from utils.database import db
+from utils.profiling import profile_span
+from utils.settings import get_settings
+from utils import doubt_memory
 from pydantic import BaseModel
-import os
-from dotenv import load_dotenv
-from pathlib import Path
-from groq import Groq
-import base64
-
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
+from typing import Optional
+from functools import lru_cache
+import asyncio
 
 router = APIRouter()
 
+DOUBT_MODEL = "llama-3.3-70b-versatile"
+# Compaction runs after the answer is sent, so a small fast model is enough
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+
+@lru_cache(maxsize=None)
+def groq_client():
+    """Shared Groq client; the SDK and its HTTP stack are only imported on the first AI request."""
+    from groq import Groq
+    return Groq(api_key=get_settings().groq_api_key)
+
 class ImageAnalysisRequest(BaseModel):
     image_base64: str
     prompt: str = "Analyze this student's work and provide constructive feedback. Focus on quality, clarity, and effort."
 
 class ChatRequest(BaseModel):
     question: str
+    conversation_id: Optional[str] = None  # omitted to start a new conversation
+    # Earlier turns from clients without a conversation_id; seeds the new conversation
     chat_history: list = []
 
+async def summarize_turns(previous_summary: str, turns: list) -> str:
+    request = doubt_memory.summary_request(previous_summary, turns)
+    with profile_span("ai", SUMMARY_MODEL):
+        response = await asyncio.to_thread(
+            groq_client().chat.completions.create,
+            model=SUMMARY_MODEL,
+            messages=request,
+            temperature=0.2,
+            max_tokens=doubt_memory.SUMMARY_TOKEN_BUDGET
+        )
+    return response.choices[0].message.content
+
 @router.post("/analyze-image")
 async def analyze_image(request: ImageAnalysisRequest, current_user: dict = Depends(get_current_user)):
     try:
-        api_key = os.environ.get('GROQ_API_KEY')
-        if not api_key:
+        if not get_settings().groq_api_key:
             raise HTTPException(status_code=500, detail="AI service not configured")
         
-        # Initialize Groq client
-        client = Groq(api_key=api_key)
+        client = groq_client()
         
         # Decode base64 image
         image_data = request.image_base64
@@ -47,59 +68,107 @@ Based on the provided image, provide detailed, encouraging feedback that:
 - Maintains a supportive tone"""
         
         # Generate response with image using vision model
-        response = client.chat.completions.create(
-            model="llama-3.2-90b-vision-preview",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": full_prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{image_data}"
+        with profile_span("ai", "llama-3.2-90b-vision-preview"):
+            response = client.chat.completions.create(
+                model="llama-3.2-90b-vision-preview",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": full_prompt},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/png;base64,{image_data}"
+                                }
                             }
-                        }
-                    ]
-                }
-            ],
-            temperature=0.7,
-            max_tokens=1024
-        )
+                        ]
+                    }
+                ],
+                temperature=0.7,
+                max_tokens=1024
+            )
         
         return {"feedback": response.choices[0].message.content}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
 
+
 @router.post("/doubt-solver")
-async def doubt_solver(request: ChatRequest, current_user: dict = Depends(get_current_user)):
+async def doubt_solver(request: ChatRequest, background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Not authorized")
-    
+    if not get_settings().groq_api_key:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    # The length check spares tokenizing oversized input on the event loop
+    if (len(request.question) > doubt_memory.QUESTION_TOKEN_LIMIT * 8
+            or doubt_memory.count_tokens(request.question) > doubt_memory.QUESTION_TOKEN_LIMIT):
+        raise HTTPException(status_code=413, detail="Question is too long")
+
+    if request.conversation_id:
+        conversation = await doubt_memory.get_conversation(db, request.conversation_id, current_user["sub"])
+        if not conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        seed = []
+        messages = await doubt_memory.build_messages(db, conversation, request.question)
+    else:
+        # Created once answered, so failed calls leave no empty conversations behind
+        conversation = None
+        seed = doubt_memory.clip_history(request.chat_history)
+        messages = doubt_memory.assemble_messages("", seed[::-1], request.question)
+
     try:
-        api_key = os.environ.get('GROQ_API_KEY')
-        if not api_key:
-            raise HTTPException(status_code=500, detail="AI service not configured")
-        
-        # Initialize Groq client
-        client = Groq(api_key=api_key)
-        
-        # System instruction
-        system_instruction = "You are a helpful educational AI assistant. Answer student questions clearly and concisely. Encourage learning by explaining concepts rather than just giving answers. Be supportive and patient."
-        
+        client = groq_client()
+
         # Generate response
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_instruction},
-                {"role": "user", "content": request.question}
-            ],
-            temperature=0.7,
-            max_tokens=1024
-        )
-        
-        return {"answer": response.choices[0].message.content}
-        
+        with profile_span("ai", DOUBT_MODEL):
+            response = await asyncio.to_thread(
+                client.chat.completions.create,
+                model=DOUBT_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1024
+            )
+        answer = response.choices[0].message.content
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI chat failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"AI chat failed: {str(e)}")
+
+    if conversation is None:
+        conversation = await doubt_memory.start_conversation(db, current_user["sub"], request.question)
+    await doubt_memory.append_turns(db, conversation["id"], seed + [
+        doubt_memory.make_turn("user", request.question),
+        doubt_memory.make_turn("assistant", answer),
+    ])
+    # After the response is sent, so summarizing never adds to the student's wait
+    background_tasks.add_task(doubt_memory.compact_conversation, db, conversation["id"], summarize_turns)
+    return {"answer": answer, "conversation_id": conversation["id"]}
+
+@router.get("/conversations")
+async def get_conversations(current_user: dict = Depends(get_current_user)):
+    cursor = db.doubt_conversations.find(
+        {"student_id": current_user["sub"]},
+        {"_id": 0, "id": 1, "title": 1, "turn_count": 1, "created_at": 1, "updated_at": 1}
+    ).sort("updated_at", -1)
+    return await cursor.to_list(100)
+
+@router.get("/conversations/{conversation_id}")
+async def get_conversation(conversation_id: str, limit: int = 100, current_user: dict = Depends(get_current_user)):
+    conversation = await doubt_memory.get_conversation(db, conversation_id, current_user["sub"])
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    # Latest turns, returned oldest first
+    cursor = db.doubt_turns.find(
+        {"conversation_id": conversation_id},
+        {"_id": 0, "seq": 1, "role": 1, "content": 1, "created_at": 1}
+    ).sort("seq", -1).limit(min(max(limit, 1), 500))
+    turns = await cursor.to_list(None)
+    return {"id": conversation["id"], "title": conversation["title"], "turns": turns[::-1]}
+
+@router.delete("/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str, current_user: dict = Depends(get_current_user)):
+    if not await doubt_memory.get_conversation(db, conversation_id, current_user["sub"]):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    await doubt_memory.delete_conversation(db, conversation_id)
+    return {"message": "Conversation deleted"}
@@ -1,21 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models.announcement import Announcement, AnnouncementCreate
 from utils.auth import get_current_user
+from utils.response_cache import bump, conditional_response
+from utils import invalidation_bus
+from sockets.announcement_socket import broadcast_announcement
+from utils.serialization import trusted_list
 from typing import List
 from datetime import datetime
 import os
-from pathlib import Path
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+import time
+from utils.database import db
 
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
+router = APIRouter()
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+ANNOUNCEMENT_CACHE_SIZE = int(os.environ.get("ANNOUNCEMENT_CACHE_SIZE", "100"))
+# Picks up writes made by other workers while the invalidation bus is down
+ANNOUNCEMENT_CACHE_TTL_SECONDS = float(os.environ.get("ANNOUNCEMENT_CACHE_TTL_SECONDS", "30"))
 
-router = APIRouter()
+# Newest announcements, newest first; None until first loaded
+_recent_announcements = None
+_loaded_at = 0.0
+
+def _drop_announcement_cache(event):
+    global _recent_announcements
+    _recent_announcements = None
+
+invalidation_bus.subscribe("announcements", _drop_announcement_cache)
+
+async def refresh_announcement_cache():
+    global _recent_announcements, _loaded_at
+    announcements = await db.announcements.find({}, {"_id": 0}).sort("created_at", -1).to_list(ANNOUNCEMENT_CACHE_SIZE)
+    
+    for ann in announcements:
+        if isinstance(ann['created_at'], str):
+            ann['created_at'] = datetime.fromisoformat(ann['created_at'])
+    
+    _recent_announcements = trusted_list(Announcement, announcements)
+    _loaded_at = time.monotonic()
+    return _recent_announcements
 
 @router.post("/", response_model=Announcement)
 async def create_announcement(announcement: AnnouncementCreate, current_user: dict = Depends(get_current_user)):
@@ -27,17 +49,25 @@ async def create_announcement(announcement: AnnouncementCreate, current_user: di
     announcement_data['created_at'] = announcement_data['created_at'].isoformat()
     
     await db.announcements.insert_one(announcement_data)
+    
+    # New announcements are always the newest, so no reload is needed
+    global _recent_announcements
+    if _recent_announcements is not None:
+        _recent_announcements = [announcement_obj] + _recent_announcements[:ANNOUNCEMENT_CACHE_SIZE - 1]
+    bump("announcements")
+    
+    await broadcast_announcement("announcement_created", announcement_obj.model_dump(mode='json'))
     return announcement_obj
 
 @router.get("/", response_model=List[Announcement])
-async def get_announcements(current_user: dict = Depends(get_current_user)):
-    announcements = await db.announcements.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    
-    for ann in announcements:
-        if isinstance(ann['created_at'], str):
-            ann['created_at'] = datetime.fromisoformat(ann['created_at'])
-    
-    return [Announcement(**ann) for ann in announcements]
+async def get_announcements(request: Request, current_user: dict = Depends(get_current_user)):
+    return await conditional_response(request, "announcements", ("announcements",), load_announcements)
+
+async def load_announcements():
+    expired = time.monotonic() - _loaded_at > ANNOUNCEMENT_CACHE_TTL_SECONDS
+    if _recent_announcements is None or (expired and not invalidation_bus.active()):
+        return await refresh_announcement_cache()
+    return _recent_announcements
 
 @router.delete("/{announcement_id}")
 async def delete_announcement(announcement_id: str, current_user: dict = Depends(get_current_user)):
@@ -48,4 +78,9 @@ async def delete_announcement(announcement_id: str, current_user: dict = Depends
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Announcement not found")
     
+    # Reload so an older announcement slides back into the window
+    await refresh_announcement_cache()
+    bump("announcements")
+    
+    await broadcast_announcement("announcement_deleted", {"id": announcement_id})
     return {"message": "Announcement deleted successfully"}
\ No newline at end of file
@@ -2,17 +2,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from models.user import UserCreate, UserLogin, Token, User
 from utils.auth import get_password_hash, verify_password, create_access_token
 from motor.motor_asyncio import AsyncIOMotorDatabase
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from utils.database import db
+from utils.response_cache import bump
 
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
-
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
 
 router = APIRouter()
 
@@ -33,6 +25,7 @@ async def register(user: UserCreate):
     user_data['created_at'] = user_data['created_at'].isoformat()
     
     await db.users.insert_one(user_data)
+    bump("users")
     
     # Create progress for student
     if user.role == "student":
@@ -41,6 +34,7 @@ async def register(user: UserCreate):
         progress_data = progress.model_dump()
         progress_data['last_activity'] = progress_data['last_activity'].isoformat()
         await db.progress.insert_one(progress_data)
+        bump("progress")
     
     # Create token
     access_token = create_access_token(data={"sub": user_in_db.id, "role": user_in_db.role})
@@ -0,0 +1,134 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from utils.auth import get_current_user
+from utils.blob_store import CHUNK_SIZE, store_stream, parse_range, iter_blob, sign_blob_url, verify_blob_signature
+from utils.message_store import chats_with_blob
+from typing import Optional
+import os
+from utils.database import db
+
+router = APIRouter()
+
+MAX_UPLOAD_BYTES = int(os.environ.get("BLOB_MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+optional_security = HTTPBearer(auto_error=False)
+
+@router.post("/")
+async def upload_blob(request: Request, current_user: dict = Depends(get_current_user)):
+    # Checked before the body is read; the form parser would otherwise spool all of it first.
+    # The server stops reading at Content-Length, so the header bounds what is spooled.
+    content_length = request.headers.get("content-length")
+    if content_length is None:
+        raise HTTPException(status_code=411, detail="Content-Length required")
+    if not content_length.isdigit() or int(content_length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    form = await request.form(max_files=1, max_fields=1)
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=422, detail="Missing file")
+        blob = await _store_upload(file)
+    finally:
+        await form.close()
+
+    # Uploaders may read their blob back before it is attached to anything
+    await db.blobs.update_one({"id": blob["id"]}, {"$addToSet": {"uploaded_by": current_user["sub"]}})
+    return {
+        "id": blob["id"],
+        "size": blob["size"],
+        "content_type": blob["content_type"],
+        "thumbnail_id": blob.get("thumbnail_id"),
+        "url": sign_blob_url(blob["id"]),
+    }
+
+async def _store_upload(file: UploadFile):
+    received = 0
+
+    async def read_chunk():
+        nonlocal received
+        chunk = await file.read(CHUNK_SIZE)
+        received += len(chunk)
+        if received > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="File too large")
+        return chunk
+
+    return await store_stream(db, read_chunk, file.content_type or "application/octet-stream")
+
+async def can_read_blob(blob_id: str, user: dict) -> bool:
+    """Admins, the uploader, the submitting student and participants of chats it was sent in."""
+    if user["role"] == "admin":
+        return True
+    user_id = user["sub"]
+    if await db.blobs.find_one({"id": blob_id, "uploaded_by": user_id}, {"_id": 1}):
+        return True
+    if await db.submissions.find_one({"blob_id": blob_id, "student_id": user_id}, {"_id": 1}):
+        return True
+    chat_ids = await chats_with_blob(db, blob_id)
+    if not chat_ids:
+        return False
+    session = await db.chat_sessions.find_one(
+        {"id": {"$in": chat_ids}, "$or": [{"admin_id": user_id}, {"student_id": user_id}]},
+        {"_id": 1}
+    )
+    return session is not None
+
+async def authorize_blob_read(
+    blob_id: str,
+    expires: Optional[int] = None,
+    signature: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    # Signed URLs let <img>/<video> tags fetch blobs without a bearer token
+    if expires is not None and signature and verify_blob_signature(blob_id, expires, signature):
+        return
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Blob ids are content hashes, so a valid token alone is not enough
+    if not await can_read_blob(blob_id, await get_current_user(credentials)):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+async def serve_blob(request: Request, blob_id: str):
+    blob = await db.blobs.find_one({"id": blob_id}, {"_id": 0})
+    if not blob:
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    size = blob["size"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{blob_id}"',
+        # Content addressed, so a blob id never changes meaning
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    if request.headers.get("if-none-match") == f'"{blob_id}"':
+        return StreamingResponse(iter([]), status_code=304, headers=headers)
+
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+
+    if byte_range is None or size == 0:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(max(end - start + 1, 0))
+
+    body = iter_blob(blob_id, start, end) if size else iter([])
+    return StreamingResponse(body, status_code=status_code, media_type=blob["content_type"], headers=headers)
+
+@router.get("/{blob_id}", dependencies=[Depends(authorize_blob_read)])
+async def download_blob(blob_id: str, request: Request):
+    return await serve_blob(request, blob_id)
+
+@router.get("/{blob_id}/thumbnail", dependencies=[Depends(authorize_blob_read)])
+async def download_thumbnail(blob_id: str, request: Request):
+    blob = await db.blobs.find_one({"id": blob_id}, {"_id": 0, "thumbnail_id": 1})
+    if not blob or not blob.get("thumbnail_id"):
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return await serve_blob(request, blob["thumbnail_id"])
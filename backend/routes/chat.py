@@ -1,19 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from models.chat import Message, MessageCreate, ChatSession
 from utils.auth import get_current_user
-from typing import List
+from utils.serialization import fast_response, trusted_list
+from utils.blob_store import offload_inline_media, blob_reference, can_attach_blob
+from utils import message_store
+from utils.search_index import index_message, remove_entry
+from typing import List, Optional
 from datetime import datetime
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
-
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from utils.database import db
 
 router = APIRouter()
 
@@ -58,10 +52,19 @@ async def get_chat_sessions(current_user: dict = Depends(get_current_user)):
         if isinstance(session['created_at'], str):
             session['created_at'] = datetime.fromisoformat(session['created_at'])
     
-    return [ChatSession(**session) for session in sessions]
+    return fast_response(trusted_list(ChatSession, sessions))
 
 @router.get("/messages/{chat_id}", response_model=List[Message])
-async def get_messages(chat_id: str, current_user: dict = Depends(get_current_user)):
+async def get_messages(
+    chat_id: str,
+    after_id: Optional[str] = None,
+    after: Optional[datetime] = None,
+    before_id: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user)
+):
+    # after_id/after return only messages newer than the client's last seen one;
+    # before_id pages backward through older history
     # Verify access to chat
     session = await db.chat_sessions.find_one({"id": chat_id}, {"_id": 0})
     if not session:
@@ -70,22 +73,18 @@ async def get_messages(chat_id: str, current_user: dict = Depends(get_current_us
     if session['admin_id'] != current_user["sub"] and session['student_id'] != current_user["sub"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    messages = await db.messages.find(
-        {"chat_id": chat_id, "is_deleted": False},
-        {"_id": 0}
-    ).sort("created_at", 1).to_list(1000)
+    after_cursor = await message_store.resolve_cursor(db, chat_id, after_id, after) if (after_id or after) else None
+    before_cursor = await message_store.resolve_cursor(db, chat_id, before_id) if before_id else None
+    messages = await message_store.list_messages(db, chat_id, limit, after=after_cursor, before=before_cursor)
     
     for msg in messages:
         if isinstance(msg['created_at'], str):
             msg['created_at'] = datetime.fromisoformat(msg['created_at'])
     
     # Mark as read
-    await db.messages.update_many(
-        {"chat_id": chat_id, "sender_id": {"$ne": current_user["sub"]}},
-        {"$set": {"is_read": True}}
-    )
+    await message_store.mark_read(db, chat_id, current_user["sub"])
     
-    return [Message(**msg) for msg in messages]
+    return fast_response(trusted_list(Message, messages))
 
 @router.post("/messages", response_model=Message)
 async def send_message(message: MessageCreate, current_user: dict = Depends(get_current_user)):
@@ -97,16 +96,25 @@ async def send_message(message: MessageCreate, current_user: dict = Depends(get_
     if session['admin_id'] != current_user["sub"] and session['student_id'] != current_user["sub"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    if message.blob_id and not await can_attach_blob(db, message.blob_id, current_user):
+        raise HTTPException(status_code=404, detail="Uploaded file not found")
+    
     message_obj = Message(**message.model_dump())
+    if message_obj.message_type == "image" and not message_obj.blob_id:
+        blob_id = await offload_inline_media(db, message_obj.content)
+        if blob_id:
+            message_obj.blob_id = blob_id
+            message_obj.content = blob_reference(blob_id)
     message_data = message_obj.model_dump()
     message_data['created_at'] = message_data['created_at'].isoformat()
     
-    await db.messages.insert_one(message_data)
+    await message_store.insert_message(db, message_data)
+    await index_message(db, message_data, session)
     return message_obj
 
 @router.delete("/messages/{message_id}")
 async def delete_message(message_id: str, delete_for_everyone: bool = False, current_user: dict = Depends(get_current_user)):
-    message = await db.messages.find_one({"id": message_id}, {"_id": 0})
+    message = await message_store.find_message(db, message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     
@@ -115,9 +123,7 @@ async def delete_message(message_id: str, delete_for_everyone: bool = False, cur
         raise HTTPException(status_code=403, detail="Not authorized")
     
     if delete_for_everyone or current_user["role"] == "admin":
-        await db.messages.update_one(
-            {"id": message_id},
-            {"$set": {"is_deleted": True}}
-        )
+        await message_store.mark_deleted(db, message_id)
+        await remove_entry(db, "message", message_id)
     
     return {"message": "Message deleted successfully"}
\ No newline at end of file
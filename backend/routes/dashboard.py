@@ -0,0 +1,145 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from utils.auth import get_current_user
+from utils.response_cache import conditional_response
+from utils.read_routing import reads
+from datetime import datetime, timezone
+import os
+from utils.database import db
+
+analytics_db = reads(db, "analytics")
+
+router = APIRouter()
+
+# Short, as writes by other workers only bump this worker's versions while the invalidation bus runs
+DASHBOARD_CACHE_SECONDS = float(os.environ.get("DASHBOARD_CACHE_SECONDS", "15"))
+RECENT_ACTIVITY_LIMIT = 10
+
+# Submissions, tasks and students are merged into one stream of small rows
+# tagged by `kind`, so every figure comes out of a single $facet
+ADMIN_SUMMARY_PIPELINE = [
+    {"$project": {
+        "_id": 0,
+        "kind": {"$literal": "submission"},
+        "id": 1,
+        "task_id": 1,
+        "student_id": 1,
+        "status": 1,
+        "is_late": 1,
+        "submitted_at": 1,
+    }},
+    {"$unionWith": {"coll": "tasks", "pipeline": [
+        # stats.assigned holds direct assignees; group members come from member_count
+        {"$lookup": {
+            "from": "groups",
+            "localField": "assigned_groups",
+            "foreignField": "id",
+            "as": "groups",
+        }},
+        {"$project": {
+            "_id": 0,
+            "kind": {"$literal": "task"},
+            "task_id": "$id",
+            "difficulty": 1,
+            "assigned": {"$add": [
+                {"$ifNull": ["$stats.assigned", {"$size": {"$ifNull": ["$assigned_to", []]}}]},
+                {"$sum": "$groups.member_count"},
+            ]},
+        }},
+    ]}},
+    {"$unionWith": {"coll": "users", "pipeline": [
+        {"$match": {"role": "student"}},
+        {"$project": {"_id": 0, "kind": {"$literal": "student"}}},
+    ]}},
+    {"$facet": {
+        "totals": [
+            {"$group": {"_id": "$kind", "count": {"$sum": 1}}},
+        ],
+        "submissions": [
+            {"$match": {"kind": "submission"}},
+            {"$group": {
+                "_id": None,
+                "pending": {"$sum": {"$cond": [{"$eq": ["$status", "pending"]}, 1, 0]}},
+                "late": {"$sum": {"$cond": [{"$eq": ["$is_late", True]}, 1, 0]}},
+            }},
+        ],
+        "by_difficulty": [
+            {"$match": {"kind": {"$in": ["task", "submission"]}}},
+            # One row per task; submissions of deleted tasks have no difficulty and drop out
+            {"$group": {
+                "_id": "$task_id",
+                "difficulty": {"$max": "$difficulty"},
+                "assigned": {"$sum": {"$ifNull": ["$assigned", 0]}},
+                "submitted": {"$sum": {"$cond": [{"$eq": ["$kind", "submission"]}, 1, 0]}},
+            }},
+            {"$match": {"difficulty": {"$ne": None}}},
+            {"$group": {
+                "_id": "$difficulty",
+                "tasks": {"$sum": 1},
+                "assigned": {"$sum": "$assigned"},
+                "submitted": {"$sum": "$submitted"},
+            }},
+            {"$sort": {"_id": 1}},
+        ],
+        "recent_activity": [
+            {"$match": {"kind": "submission"}},
+            {"$sort": {"submitted_at": -1}},
+            {"$limit": RECENT_ACTIVITY_LIMIT},
+            {"$lookup": {"from": "users", "localField": "student_id", "foreignField": "id", "as": "student"}},
+            {"$lookup": {"from": "tasks", "localField": "task_id", "foreignField": "id", "as": "task"}},
+            {"$project": {
+                "submission_id": "$id",
+                "task_id": 1,
+                "task_title": {"$first": "$task.title"},
+                "student_id": 1,
+                "student_name": {"$first": "$student.name"},
+                "status": 1,
+                "is_late": 1,
+                "submitted_at": 1,
+            }},
+        ],
+    }},
+]
+
+@router.get("/admin")
+async def get_admin_dashboard(request: Request, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return await conditional_response(
+        request,
+        "dashboard:admin",
+        ("users", "tasks", "submissions"),
+        load_admin_summary,
+        max_age=DASHBOARD_CACHE_SECONDS
+    )
+
+async def load_admin_summary():
+    result = (await analytics_db.submissions.aggregate(ADMIN_SUMMARY_PIPELINE).to_list(1))[0]
+
+    totals = {row["_id"]: row["count"] for row in result["totals"]}
+    submission_counts = result["submissions"][0] if result["submissions"] else {"pending": 0, "late": 0}
+    total_submissions = totals.get("submission", 0)
+
+    by_difficulty = []
+    for row in result["by_difficulty"]:
+        by_difficulty.append({
+            "difficulty": row["_id"],
+            "tasks": row["tasks"],
+            "assigned": row["assigned"],
+            "submitted": row["submitted"],
+            "completion_rate": (row["submitted"] / row["assigned"] * 100) if row["assigned"] > 0 else 0,
+        })
+
+    return {
+        "totals": {
+            "students": totals.get("student", 0),
+            "tasks": totals.get("task", 0),
+            "submissions": total_submissions,
+        },
+        "pending_review": submission_counts["pending"],
+        "late_submissions": submission_counts["late"],
+        "late_ratio": (submission_counts["late"] / total_submissions) if total_submissions else 0,
+        "by_difficulty": by_difficulty,
+        "recent_activity": [{key: value for key, value in row.items() if key != "_id"} for row in result["recent_activity"]],
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Depends
+from models.user import User
+from utils.auth import get_current_user
+from utils.serialization import fast_response
+from routes.tasks import load_today_tasks
+from routes.progress import load_my_progress
+from routes.announcements import load_announcements
+import asyncio
+import logging
+import os
+from utils.database import db
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+FEED_SECTION_TIMEOUT_SECONDS = float(os.environ.get("FEED_SECTION_TIMEOUT_SECONDS", "2"))
+FEED_ANNOUNCEMENTS = int(os.environ.get("FEED_ANNOUNCEMENTS", "5"))
+
+async def load_user(student_id: str):
+    user = await db.users.find_one({"id": student_id}, {"_id": 0, "hashed_password": 0})
+    return User(**user) if user else None
+
+async def load_recent_announcements():
+    announcements = await load_announcements()
+    return announcements[:FEED_ANNOUNCEMENTS]
+
+async def run_section(name: str, coro):
+    """Await one section as (name, value, complete); a timeout or failure yields no value."""
+    try:
+        return name, await asyncio.wait_for(coro, timeout=FEED_SECTION_TIMEOUT_SECONDS), True
+    except asyncio.TimeoutError:
+        logger.warning(f"Student feed section {name} timed out")
+    except Exception:
+        logger.exception(f"Student feed section {name} failed")
+    return name, None, False
+
+@router.get("/student")
+async def get_student_feed(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "student":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    sections = await asyncio.gather(
+        run_section("user", load_user(current_user["sub"])),
+        run_section("progress", load_my_progress(current_user)),
+        run_section("today_tasks", load_today_tasks(current_user["sub"])),
+        run_section("announcements", load_recent_announcements()),
+    )
+
+    feed = {name: value for name, value, _ in sections}
+    # Sections that timed out or failed; the client falls back to their own endpoints
+    feed["partial"] = [name for name, _, complete in sections if not complete]
+    return fast_response(feed)
@@ -0,0 +1,116 @@
+from fastapi import APIRouter, HTTPException, Depends
+from models.group import Group, GroupCreate, GroupUpdate, GroupMembers
+from models.user import User
+from utils.auth import get_current_user
+from utils.groups import add_members, remove_members, delete_group, student_groups
+from utils.response_cache import bump
+from utils.serialization import fast_response, trusted_list
+from typing import List
+from datetime import datetime
+from pymongo import ReturnDocument
+from utils.database import db
+
+router = APIRouter()
+
+def _parse_group(group: dict) -> dict:
+    if isinstance(group.get('created_at'), str):
+        group['created_at'] = datetime.fromisoformat(group['created_at'])
+    return group
+
+async def _existing_students(student_ids) -> list:
+    students = set(await db.users.distinct("id", {"id": {"$in": list(student_ids)}, "role": "student"}))
+    unknown = [student_id for student_id in student_ids if student_id not in students]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown students: {', '.join(unknown)}")
+    return list(student_ids)
+
+@router.post("/", response_model=Group)
+async def create_group(group: GroupCreate, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    member_ids = await _existing_students(group.member_ids)
+    group_obj = Group(name=group.name, description=group.description, created_by=current_user["sub"])
+    group_data = group_obj.model_dump()
+    group_data['created_at'] = group_data['created_at'].isoformat()
+
+    await db.groups.insert_one(group_data)
+    bump("groups")
+    group_obj.member_count = await add_members(db, group_obj.id, member_ids)
+
+    return group_obj
+
+@router.get("/", response_model=List[Group])
+async def get_groups(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] == "admin":
+        query = {}
+    else:
+        query = {"id": {"$in": await student_groups(db, current_user["sub"])}}
+
+    groups = await db.groups.find(query, {"_id": 0}).sort("name", 1).to_list(1000)
+    return fast_response(trusted_list(Group, [_parse_group(group) for group in groups]))
+
+@router.put("/{group_id}", response_model=Group)
+async def update_group(group_id: str, group_update: GroupUpdate, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    update_data = group_update.model_dump(exclude_unset=True)
+    if update_data:
+        group = await db.groups.find_one_and_update(
+            {"id": group_id},
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    else:
+        group = await db.groups.find_one({"id": group_id}, {"_id": 0})
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    bump("groups")
+
+    return fast_response(Group(**_parse_group(group)))
+
+@router.delete("/{group_id}")
+async def remove_group(group_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if not await db.groups.find_one({"id": group_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Group not found")
+    await delete_group(db, group_id)
+
+    return {"message": "Group deleted successfully"}
+
+@router.get("/{group_id}/members", response_model=List[User])
+async def get_group_members(group_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    member_ids = await db.group_members.distinct("student_id", {"group_id": group_id})
+    students = await db.users.find(
+        {"id": {"$in": member_ids}},
+        {"_id": 0, "hashed_password": 0}
+    ).sort("name", 1).to_list(None)
+    return fast_response(trusted_list(User, students))
+
+@router.post("/{group_id}/members")
+async def add_group_members(group_id: str, members: GroupMembers, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if not await db.groups.find_one({"id": group_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Group not found")
+    student_ids = await _existing_students(members.student_ids)
+
+    return {"added": await add_members(db, group_id, student_ids)}
+
+@router.delete("/{group_id}/members/{student_id}")
+async def remove_group_member(group_id: str, student_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if not await remove_members(db, group_id, [student_id]):
+        raise HTTPException(status_code=404, detail="Member not found")
+
+    return {"message": "Member removed successfully"}
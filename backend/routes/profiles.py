@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import Response
+from utils.auth import get_current_user
+from utils.profiling import list_profiles, get_profile, to_speedscope
+from utils.serialization import dump_json
+
+router = APIRouter()
+
+@router.get("/")
+async def get_profiles(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return list_profiles()
+
+@router.get("/{profile_id}")
+async def download_profile(profile_id: str, current_user: dict = Depends(get_current_user)):
+    """Speedscope JSON; open it at https://www.speedscope.app"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return Response(
+        content=dump_json(to_speedscope(profile)),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'}
+    )
@@ -1,27 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models.progress import Progress
 from utils.auth import get_current_user
+from utils.progress_counters import reconcile_progress
+from utils.response_cache import bump, conditional_response
+from utils.serialization import fast_response
+from utils.read_routing import reads
 from typing import List, Dict
 from datetime import datetime
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from utils.database import db
 
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
-
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+analytics_db = reads(db, "analytics")
 
 router = APIRouter()
 
 @router.get("/me", response_model=Progress)
-async def get_my_progress(current_user: dict = Depends(get_current_user)):
+async def get_my_progress(request: Request, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    return await conditional_response(
+        request,
+        f"progress:{current_user['sub']}",
+        ("progress",),
+        lambda: load_my_progress(current_user)
+    )
+
+async def load_my_progress(current_user: dict):
     progress = await db.progress.find_one({"student_id": current_user["sub"]}, {"_id": 0})
     if not progress:
         # Create if not exists
@@ -29,6 +33,7 @@ async def get_my_progress(current_user: dict = Depends(get_current_user)):
         progress_data = progress_obj.model_dump()
         progress_data['last_activity'] = progress_data['last_activity'].isoformat()
         await db.progress.insert_one(progress_data)
+        bump("progress")
         return progress_obj
     
     if isinstance(progress['last_activity'], str):
@@ -37,17 +42,20 @@ async def get_my_progress(current_user: dict = Depends(get_current_user)):
     return Progress(**progress)
 
 @router.get("/leaderboard", response_model=List[Dict])
-async def get_leaderboard(current_user: dict = Depends(get_current_user)):
+async def get_leaderboard(request: Request, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    return await conditional_response(request, "leaderboard", ("progress", "users"), load_leaderboard)
+
+async def load_leaderboard():
     # Get all progress
-    progress_list = await db.progress.find({}, {"_id": 0}).to_list(1000)
+    progress_list = await analytics_db.progress.find({}, {"_id": 0}).to_list(1000)
     
     # Get student names
     leaderboard = []
     for prog in progress_list:
-        student = await db.users.find_one({"id": prog['student_id']}, {"_id": 0})
+        student = await analytics_db.users.find_one({"id": prog['student_id']}, {"_id": 0})
         if student:
             completion_rate = (prog['completed_tasks'] / prog['total_tasks'] * 100) if prog['total_tasks'] > 0 else 0
             leaderboard.append({
@@ -60,6 +68,9 @@ async def get_leaderboard(current_user: dict = Depends(get_current_user)):
                 "badges": prog['badges']
             })
     
+    return rank_leaderboard(leaderboard)
+
+def rank_leaderboard(leaderboard: list) -> list:
     # Sort by completion rate and streak
     leaderboard.sort(key=lambda x: (x['completion_rate'], x['current_streak']), reverse=True)
     return leaderboard
@@ -76,4 +87,11 @@ async def get_student_progress(student_id: str, current_user: dict = Depends(get
     if isinstance(progress['last_activity'], str):
         progress['last_activity'] = datetime.fromisoformat(progress['last_activity'])
     
-    return Progress(**progress)
\ No newline at end of file
+    return fast_response(Progress(**progress))
+
+@router.post("/reconcile")
+async def reconcile(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return await reconcile_progress(db)
\ No newline at end of file
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from utils.auth import get_current_user
+from utils.search_index import KINDS, search, reindex
+from utils.serialization import fast_response
+from typing import Optional
+from utils.database import db
+
+router = APIRouter()
+
+def parse_kinds(kinds: Optional[str]):
+    if not kinds:
+        return None
+    requested = [kind.strip() for kind in kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in requested if kind not in KINDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kinds: {', '.join(unknown)}")
+    return requested
+
+@router.get("/")
+async def search_all(
+    q: str = Query(..., min_length=1, max_length=200),
+    kinds: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    results = await search(db, current_user, q, parse_kinds(kinds), limit)
+    return fast_response(results)
+
+@router.post("/reindex")
+async def reindex_all(kinds: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    counts = await reindex(db, parse_kinds(kinds) or KINDS)
+    return {"indexed": counts}
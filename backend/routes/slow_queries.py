@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException, Depends
+from utils.auth import get_current_user
+from utils.slow_queries import slow_query_report, reset_slow_query_log
+
+router = APIRouter()
+
+@router.get("/")
+async def get_slow_queries(current_user: dict = Depends(get_current_user)):
+    """Slow commands of this worker grouped by query shape, slowest in total first."""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    return slow_query_report()
+
+@router.delete("/")
+async def clear_slow_queries(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    reset_slow_query_log()
+    return {"message": "Slow query log cleared"}
@@ -1,45 +1,61 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from models.submission import Submission, SubmissionCreate, SubmissionUpdate
 from utils.auth import get_current_user
-from typing import List
+from utils.progress_counters import record_counter_changes
+from utils.response_cache import bump
+from utils.serialization import fast_response
+from utils.projection import resolve_fields, projection
+from utils.blob_store import offload_inline_media, blob_reference, can_attach_blob, sign_blob_url
+from utils.search_index import index_submission, remove_entry
+from utils.task_stats import submission_delta, status_delta, apply_delta
+from utils.groups import is_assigned
+from utils.likes import add_like, remove_like, delete_likes, like_summary
+from utils.read_routing import reads, causal_session
+from typing import List, Optional
 from datetime import datetime
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+import asyncio
+import logging
+from utils.database import db
 
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
-
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Admin listings tolerate replication lag; see utils/read_routing.py
+analytics_db = reads(db, "analytics")
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Upper bound on submissions per batched like lookup
+LIKE_SUMMARY_MAX_IDS = 200
+
+async def ensure_indexes(db):
+    await db.submissions.create_index("id", unique=True)
+    await db.submissions.create_index("student_id")
+    await db.submissions.create_index("blob_id", partialFilterExpression={"blob_id": {"$type": "string"}})
+    try:
+        await db.submissions.create_index([("task_id", 1), ("student_id", 1)], unique=True)
+    except OperationFailure:
+        # create_submission relies on this index to reject duplicates, so refuse to start without it
+        logger.error("Could not create the unique (task_id, student_id) submissions index; remove duplicate submissions and restart")
+        raise
 
 @router.post("/", response_model=Submission)
 async def create_submission(submission: SubmissionCreate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Only students can submit")
     
-    # Check if task exists
-    task = await db.tasks.find_one({"id": submission.task_id}, {"_id": 0})
+    # The task and the uploaded blob are looked up concurrently
+    lookups = [db.tasks.find_one({"id": submission.task_id}, {"_id": 0, "deadline": 1, "assigned_to": 1, "assigned_groups": 1})]
+    if submission.blob_id:
+        lookups.append(can_attach_blob(db, submission.blob_id, current_user))
+    task, *attachable = await asyncio.gather(*lookups)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Check if student is assigned to this task
-    if current_user["sub"] not in task.get("assigned_to", []):
+    if not await is_assigned(db, task, current_user["sub"]):
         raise HTTPException(status_code=403, detail="Not assigned to this task")
     
-    # Check if already submitted
-    existing = await db.submissions.find_one({
-        "task_id": submission.task_id,
-        "student_id": current_user["sub"]
-    }, {"_id": 0})
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Already submitted for this task")
-    
     # Check if submission is late
     deadline = datetime.fromisoformat(task['deadline']) if isinstance(task['deadline'], str) else task['deadline']
     is_late = datetime.now(deadline.tzinfo) > deadline
@@ -48,60 +64,100 @@ async def create_submission(submission: SubmissionCreate, current_user: dict = D
     content = submission.content if submission.content else "Task marked as complete"
     submission_type = submission.submission_type if submission.submission_type else "text"
     
+    # Media lives in the blob store; the document only keeps a reference
+    blob_id = submission.blob_id
+    if blob_id:
+        # Someone else's blob is reported as missing, so ids cannot be probed
+        if not attachable[0]:
+            raise HTTPException(status_code=404, detail="Uploaded file not found")
+    elif submission_type in ("image", "video"):
+        blob_id = await offload_inline_media(db, submission.content)
+    if blob_id:
+        content = blob_reference(blob_id)
+    
     submission_obj = Submission(
         task_id=submission.task_id,
         content=content,
         submission_type=submission_type,
+        blob_id=blob_id,
         student_id=current_user["sub"],
         is_late=is_late
     )
     submission_data = submission_obj.model_dump()
     submission_data['submitted_at'] = submission_data['submitted_at'].isoformat()
+    # Every like on a new submission has a submission_likes record; see utils/likes.py
+    submission_data['legacy_likes'] = 0
     
-    await db.submissions.insert_one(submission_data)
+    # The unique (task_id, student_id) index rejects a second submission
+    try:
+        await db.submissions.insert_one(submission_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Already submitted for this task")
+    bump("submissions")
     
-    # Update student progress
-    await db.progress.update_one(
-        {"student_id": current_user["sub"]},
-        {"$inc": {"completed_tasks": 1}}
-    )
+    follow_ups = [
+        index_submission(db, submission_data),
+        apply_delta(db, submission.task_id, submission_delta(submission_data, 1)),
+        record_counter_changes(
+            db,
+            [(current_user["sub"], "completed_tasks", 1)],
+            op_key=f"submission:{submission_obj.id}:create"
+        ),
+    ]
+    # A late submission replaces the missed record left by the deadline scheduler
+    if is_late:
+        follow_ups.append(db.missed_submissions.delete_one({"task_id": submission.task_id, "student_id": current_user["sub"]}))
+    await asyncio.gather(*follow_ups)
     
     return submission_obj
 
 @router.get("/")
-async def get_submissions(current_user: dict = Depends(get_current_user)):
+async def get_submissions(fields: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    selected = resolve_fields("submissions", current_user["role"], fields)
     if current_user["role"] == "admin":
-        submissions = await db.submissions.find({}, {"_id": 0}).to_list(1000)
+        # The session makes the admin's own reviews visible even on a lagging secondary
+        async with causal_session(db, current_user["sub"]) as session:
+            submissions = await analytics_db.submissions.find({}, projection(selected), session=session).to_list(1000)
     else:
         submissions = await db.submissions.find(
             {"student_id": current_user["sub"]},
-            {"_id": 0}
+            projection(selected)
         ).to_list(1000)
     
     for sub in submissions:
         if isinstance(sub.get('submitted_at'), str):
             sub['submitted_at'] = datetime.fromisoformat(sub['submitted_at'])
     
-    return submissions
+    return fast_response(submissions)
+
+@router.get("/likes")
+async def get_like_summary(ids: str = Query(...), current_user: dict = Depends(get_current_user)):
+    """Like counts and "liked by me" for a page of submissions, e.g. ?ids=a,b,c"""
+    submission_ids = [submission_id for submission_id in ids.split(",") if submission_id]
+    if len(submission_ids) > LIKE_SUMMARY_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {LIKE_SUMMARY_MAX_IDS} submissions per request")
+    
+    return await like_summary(db, submission_ids, current_user["sub"])
 
 @router.get("/task/{task_id}")
 async def get_task_submissions(task_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    submissions = await db.submissions.find({"task_id": task_id}, {"_id": 0}).to_list(1000)
+    async with causal_session(db, current_user["sub"]) as session:
+        submissions = await analytics_db.submissions.find({"task_id": task_id}, {"_id": 0}, session=session).to_list(1000)
     
     for sub in submissions:
         if isinstance(sub.get('submitted_at'), str):
             sub['submitted_at'] = datetime.fromisoformat(sub['submitted_at'])
         
         # Get student info
-        student = await db.users.find_one({"id": sub['student_id']}, {"_id": 0, "name": 1, "email": 1})
+        student = await analytics_db.users.find_one({"id": sub['student_id']}, {"_id": 0, "name": 1, "email": 1})
         if student:
             sub['student_name'] = student.get('name')
             sub['student_email'] = student.get('email')
     
-    return submissions
+    return fast_response(submissions)
 
 @router.get("/{submission_id}", response_model=Submission)
 async def get_submission(submission_id: str, current_user: dict = Depends(get_current_user)):
@@ -116,58 +172,88 @@ async def get_submission(submission_id: str, current_user: dict = Depends(get_cu
     if isinstance(submission.get('submitted_at'), str):
         submission['submitted_at'] = datetime.fromisoformat(submission['submitted_at'])
     
-    return Submission(**submission)
+    submission_data = Submission(**submission).model_dump()
+    if submission_data['blob_id']:
+        submission_data['file_url'] = sign_blob_url(submission_data['blob_id'])
+    return fast_response(submission_data)
 
 @router.put("/{submission_id}", response_model=Submission)
 async def update_submission(submission_id: str, submission_update: SubmissionUpdate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    submission = await db.submissions.find_one({"id": submission_id}, {"_id": 0})
+    update_data = submission_update.model_dump(exclude_unset=True)
+    # The pre-update status is needed to move the task's review counters
+    if update_data:
+        # Recorded in the admin's session so their listings read it back from secondaries
+        async with causal_session(db, current_user["sub"]) as session:
+            submission = await db.submissions.find_one_and_update(
+                {"id": submission_id},
+                {"$set": update_data},
+                projection={"_id": 0},
+                return_document=ReturnDocument.BEFORE,
+                session=session
+            )
+    else:
+        submission = await db.submissions.find_one({"id": submission_id}, {"_id": 0})
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
+    bump("submissions")
+    updated_submission = {**submission, **update_data}
+    if 'status' in update_data:
+        await apply_delta(db, submission['task_id'], status_delta(submission.get('status', 'pending'), update_data['status']))
     
-    update_data = submission_update.model_dump(exclude_unset=True)
-    await db.submissions.update_one({"id": submission_id}, {"$set": update_data})
-    
-    updated_submission = await db.submissions.find_one({"id": submission_id}, {"_id": 0})
     if isinstance(updated_submission.get('submitted_at'), str):
         updated_submission['submitted_at'] = datetime.fromisoformat(updated_submission['submitted_at'])
     
-    return Submission(**updated_submission)
+    return fast_response(Submission(**updated_submission))
 
 @router.post("/{submission_id}/like")
 async def like_submission(submission_id: str, current_user: dict = Depends(get_current_user)):
-    submission = await db.submissions.find_one({"id": submission_id}, {"_id": 0})
-    if not submission:
+    if not await db.submissions.find_one({"id": submission_id}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Submission not found")
     
-    await db.submissions.update_one(
-        {"id": submission_id},
-        {"$inc": {"likes": 1}}
-    )
+    # Repeated likes are no-ops; the count itself is flushed in batches by the like flusher
+    if not await add_like(db, submission_id, current_user["sub"]):
+        return {"message": "Already liked"}
     
     return {"message": "Liked successfully"}
 
+@router.delete("/{submission_id}/like")
+async def unlike_submission(submission_id: str, current_user: dict = Depends(get_current_user)):
+    if not await remove_like(db, submission_id, current_user["sub"]):
+        raise HTTPException(status_code=404, detail="Like not found")
+    
+    return {"message": "Like removed successfully"}
+
 @router.delete("/{submission_id}")
 async def delete_submission(submission_id: str, current_user: dict = Depends(get_current_user)):
-    submission = await db.submissions.find_one({"id": submission_id}, {"_id": 0})
-    if not submission:
-        raise HTTPException(status_code=404, detail="Submission not found")
-    
     # Only admin or the student who submitted can delete
-    if current_user["role"] != "admin" and submission['student_id'] != current_user["sub"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
+    query = {"id": submission_id}
+    if current_user["role"] != "admin":
+        query["student_id"] = current_user["sub"]
     
-    result = await db.submissions.delete_one({"id": submission_id})
-    if result.deleted_count == 0:
+    submission = await db.submissions.find_one_and_delete(
+        query,
+        {"_id": 0, "student_id": 1, "task_id": 1, "status": 1, "is_late": 1}
+    )
+    if not submission:
+        # Only the failure path pays for telling "missing" from "not yours"
+        if await db.submissions.find_one({"id": submission_id}, {"_id": 1}):
+            raise HTTPException(status_code=403, detail="Not authorized")
         raise HTTPException(status_code=404, detail="Submission not found")
+    bump("submissions")
     
-    # Update progress if deleted by student
-    if current_user["role"] == "student":
-        await db.progress.update_one(
-            {"student_id": current_user["sub"]},
-            {"$inc": {"completed_tasks": -1}}
+    # Update progress of the submitting student, whoever deleted it
+    await asyncio.gather(
+        remove_entry(db, "submission", submission_id),
+        delete_likes(db, submission_id),
+        apply_delta(db, submission['task_id'], submission_delta(submission, -1)),
+        record_counter_changes(
+            db,
+            [(submission['student_id'], "completed_tasks", -1)],
+            op_key=f"submission:{submission_id}:delete"
         )
+    )
     
     return {"message": "Submission deleted successfully"}
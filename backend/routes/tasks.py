@@ -1,65 +1,109 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models.task import Task, TaskCreate, TaskUpdate
 from utils.auth import get_current_user
-from typing import List
+from utils.progress_counters import record_counter_changes
+from utils.response_cache import bump, conditional_response
+from utils.serialization import fast_response
+from utils.projection import resolve_fields, projection, SUMMARY_FIELDS
+from utils.search_index import index_task, remove_entry
+from utils.deadline_scheduler import notify_task_changed
+from utils.task_stats import initial_stats, add_group_members
+from utils.groups import assigned_students, task_query_for_student
+from typing import List, Optional
 from datetime import datetime
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
-
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+from pymongo import ReturnDocument
+import asyncio
+import hashlib
+from utils.database import db
 
 router = APIRouter()
 
+async def ensure_indexes(db):
+    await db.tasks.create_index("id", unique=True)
+    await db.tasks.create_index("assigned_to")
+
 @router.post("/", response_model=Task)
 async def create_task(task: TaskCreate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    await check_groups(task.assigned_groups)
     task_obj = Task(**task.model_dump(), created_by=current_user["sub"])
     task_data = task_obj.model_dump()
     task_data['created_at'] = task_data['created_at'].isoformat()
     task_data['deadline'] = task_data['deadline'].isoformat()
+    assigned = await assigned_students(db, task_data)
+    task_data['stats'] = initial_stats(task_data['assigned_to'])
     
     await db.tasks.insert_one(task_data)
+    bump("tasks")
+    await index_task(db, task_data)
+    notify_task_changed(task_data)
     
-    # Update total_tasks for assigned students
-    if task.assigned_to:
-        for student_id in task.assigned_to:
-            await db.progress.update_one(
-                {"student_id": student_id},
-                {"$inc": {"total_tasks": 1}}
-            )
+    # Update total_tasks for assigned students, including group members
+    if assigned:
+        await record_counter_changes(
+            db,
+            [(student_id, "total_tasks", 1) for student_id in assigned],
+            op_key=f"task:{task_obj.id}:create"
+        )
     
     return task_obj
 
+async def check_groups(group_ids):
+    if not group_ids:
+        return
+    existing = set(await db.groups.distinct("id", {"id": {"$in": list(group_ids)}}))
+    unknown = [group_id for group_id in group_ids if group_id not in existing]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown groups: {', '.join(unknown)}")
+
 @router.get("/")
-async def get_tasks(current_user: dict = Depends(get_current_user)):
+async def get_tasks(request: Request, fields: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    selected = resolve_fields("tasks", current_user["role"], fields)
+    fields_key = ",".join(sorted(selected))
     if current_user["role"] == "admin":
-        tasks = await db.tasks.find({}, {"_id": 0}).to_list(1000)
+        # Task stats change with every submission write
+        return await conditional_response(
+            request,
+            f"tasks:admin:{fields_key}",
+            ("tasks", "submissions"),
+            lambda: load_tasks(current_user, selected)
+        )
+    return await conditional_response(
+        request,
+        f"tasks:{current_user['sub']}:{fields_key}",
+        ("tasks", "submissions"),
+        lambda: load_tasks(current_user, selected)
+    )
+
+async def load_tasks(current_user: dict, selected: set):
+    if current_user["role"] == "admin":
+        # stats.assigned holds direct assignees; group members are added from the groups
+        loaded = selected | {"assigned_groups"} if "stats" in selected else selected
+        tasks = await db.tasks.find({}, projection(loaded)).to_list(1000)
+        if "stats" in selected:
+            await add_group_members(db, tasks)
+            if "assigned_groups" not in selected:
+                for task in tasks:
+                    task.pop('assigned_groups', None)
     else:
         tasks = await db.tasks.find(
-            {"assigned_to": current_user["sub"]}, 
-            {"_id": 0}
+            await task_query_for_student(db, current_user["sub"]),
+            projection(selected)
         ).to_list(1000)
     
     for task in tasks:
-        if isinstance(task['created_at'], str):
+        if isinstance(task.get('created_at'), str):
             task['created_at'] = datetime.fromisoformat(task['created_at'])
-        if isinstance(task['deadline'], str):
+        if isinstance(task.get('deadline'), str):
             task['deadline'] = datetime.fromisoformat(task['deadline'])
         
         # Attach submission data for students
         if current_user["role"] == "student":
             submission = await db.submissions.find_one(
                 {"task_id": task['id'], "student_id": current_user["sub"]},
-                {"_id": 0}
+                projection(SUMMARY_FIELDS["submissions"])
             )
             if submission:
                 if isinstance(submission.get('submitted_at'), str):
@@ -75,38 +119,51 @@ async def get_today_tasks(current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    return fast_response(await load_today_tasks(current_user["sub"]))
+
+async def load_today_tasks(student_id: str):
     from datetime import date, timedelta, timezone as tz
     today_start = datetime.combine(date.today(), datetime.min.time()).replace(tzinfo=tz.utc)
     tomorrow_start = today_start + timedelta(days=1)
     
     tasks = await db.tasks.find({
-        "assigned_to": current_user["sub"],
+        **await task_query_for_student(db, student_id),
         "deadline": {
             "$gte": today_start.isoformat(),
             "$lt": tomorrow_start.isoformat()
         }
-    }, {"_id": 0}).to_list(1000)
+    }, {"_id": 0, "stats": 0}).to_list(1000)
+    
+    # One query for the submissions of all of today's tasks
+    submissions = {}
+    if tasks:
+        cursor = db.submissions.find(
+            {"task_id": {"$in": [task['id'] for task in tasks]}, "student_id": student_id},
+            {"_id": 0}
+        )
+        async for submission in cursor:
+            if isinstance(submission.get('submitted_at'), str):
+                submission['submitted_at'] = datetime.fromisoformat(submission['submitted_at'])
+            submissions[submission['task_id']] = submission
     
     for task in tasks:
         if isinstance(task['created_at'], str):
             task['created_at'] = datetime.fromisoformat(task['created_at'])
         if isinstance(task['deadline'], str):
             task['deadline'] = datetime.fromisoformat(task['deadline'])
-        
-        # Attach submission data
-        submission = await db.submissions.find_one(
-            {"task_id": task['id'], "student_id": current_user["sub"]},
-            {"_id": 0}
-        )
-        if submission:
-            if isinstance(submission.get('submitted_at'), str):
-                submission['submitted_at'] = datetime.fromisoformat(submission['submitted_at'])
-            task['submission'] = submission
-        else:
-            task['submission'] = None
+        task['submission'] = submissions.get(task['id'])
     
     return tasks
 
+@router.get("/missed")
+async def get_missed_submissions(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] == "admin":
+        query = {}
+    else:
+        query = {"student_id": current_user["sub"]}
+    missed = await db.missed_submissions.find(query, {"_id": 0}).sort("deadline", -1).to_list(1000)
+    return fast_response(missed)
+
 @router.get("/{task_id}", response_model=Task)
 async def get_task(task_id: str, current_user: dict = Depends(get_current_user)):
     task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
@@ -118,38 +175,91 @@ async def get_task(task_id: str, current_user: dict = Depends(get_current_user))
     if isinstance(task['deadline'], str):
         task['deadline'] = datetime.fromisoformat(task['deadline'])
     
-    return Task(**task)
+    return fast_response(Task(**task))
 
 @router.put("/{task_id}", response_model=Task)
 async def update_task(task_id: str, task_update: TaskUpdate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
     update_data = task_update.model_dump(exclude_unset=True)
     if 'deadline' in update_data and update_data['deadline']:
         update_data['deadline'] = update_data['deadline'].isoformat()
     
-    await db.tasks.update_one({"id": task_id}, {"$set": update_data})
+    await check_groups(update_data.get('assigned_groups'))
+    
+    reassigned = update_data.get('assigned_to') is not None or update_data.get('assigned_groups') is not None
+    
+    # The pre-update document is enough to derive both the diff and the result
+    if update_data:
+        update = {"$set": update_data}
+        if reassigned:
+            # Numbers assignment changes, so each one gets its own counter op key
+            update["$inc"] = {"assignment_version": 1}
+        task = await db.tasks.find_one_and_update(
+            {"id": task_id},
+            update,
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+    else:
+        task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    bump("tasks")
+    updated_task = {**task, **update_data}
+    
+    follow_ups = []
+    if update_data.get('deadline') and update_data['deadline'] != task['deadline']:
+        # A moved deadline needs new reminders and a fresh missed-submission pass
+        updated_task['reminder_sent'] = False
+        updated_task['deadline_processed'] = False
+        follow_ups.append(db.tasks.update_one(
+            {"id": task_id, "deadline": update_data['deadline']},
+            {"$set": {"reminder_sent": False, "deadline_processed": False}}
+        ))
+        follow_ups.append(db.missed_submissions.delete_many({"task_id": task_id}))
+    
+    # Adjust total_tasks for students added to or removed from the task
+    if reassigned:
+        previous, current = await asyncio.gather(assigned_students(db, task), assigned_students(db, updated_task))
+        changes = [(student_id, "total_tasks", 1) for student_id in current - previous]
+        changes += [(student_id, "total_tasks", -1) for student_id in previous - current]
+        version = task.get('assignment_version', 0)
+        updated_task['assignment_version'] = version + 1
+        assignment = hashlib.sha1(repr((sorted(previous), sorted(current))).encode()).hexdigest()
+        follow_ups.append(record_counter_changes(db, changes, op_key=f"task:{task_id}:assign:{version}:{assignment}"))
+        direct = len(set(updated_task.get('assigned_to', [])))
+        updated_task['stats'] = {**task.get('stats', {}), "assigned": direct}
+        follow_ups.append(db.tasks.update_one({"id": task_id}, {"$set": {"stats.assigned": direct}}))
+    
+    follow_ups.append(index_task(db, updated_task))
+    await asyncio.gather(*follow_ups)
+    notify_task_changed(updated_task)
     
-    updated_task = await db.tasks.find_one({"id": task_id}, {"_id": 0})
     if isinstance(updated_task['created_at'], str):
         updated_task['created_at'] = datetime.fromisoformat(updated_task['created_at'])
     if isinstance(updated_task['deadline'], str):
         updated_task['deadline'] = datetime.fromisoformat(updated_task['deadline'])
     
-    return Task(**updated_task)
+    return fast_response(Task(**updated_task))
 
 @router.delete("/{task_id}")
 async def delete_task(task_id: str, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    result = await db.tasks.delete_one({"id": task_id})
-    if result.deleted_count == 0:
+    task = await db.tasks.find_one_and_delete({"id": task_id}, {"_id": 0, "assigned_to": 1, "assigned_groups": 1})
+    if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    bump("tasks")
+    await remove_entry(db, "task", task_id)
+    await db.missed_submissions.delete_many({"task_id": task_id})
+    
+    # Remove the task from assigned students' totals and from submitters' completed counts
+    submitters = await db.submissions.distinct("student_id", {"task_id": task_id})
+    changes = [(student_id, "total_tasks", -1) for student_id in await assigned_students(db, task)]
+    changes += [(student_id, "completed_tasks", -1) for student_id in submitters]
+    await record_counter_changes(db, changes, op_key=f"task:{task_id}:delete")
     
     return {"message": "Task deleted successfully"}
\ No newline at end of file
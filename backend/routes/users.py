@@ -2,17 +2,10 @@ from fastapi import APIRouter, HTTPException, Depends
 from models.user import User, UserCreate
 from utils.auth import get_current_user, get_password_hash
 from typing import List
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from utils.database import db
+from utils.response_cache import bump
+from utils.serialization import fast_response, trusted_list
 
-ROOT_DIR = Path(__file__).parent.parent
-load_dotenv(ROOT_DIR / '.env')
-
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
 
 router = APIRouter()
 
@@ -21,7 +14,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     user_data = await db.users.find_one({"id": current_user["sub"]}, {"_id": 0})
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
-    return User(**user_data)
+    return fast_response(User(**user_data))
 
 @router.get("/students", response_model=List[User])
 async def get_students(current_user: dict = Depends(get_current_user)):
@@ -29,7 +22,7 @@ async def get_students(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not authorized")
     
     students = await db.users.find({"role": "student"}, {"_id": 0}).to_list(1000)
-    return [User(**student) for student in students]
+    return fast_response(trusted_list(User, students))
 
 @router.post("/students", response_model=User)
 async def create_student(user: UserCreate, current_user: dict = Depends(get_current_user)):
@@ -52,6 +45,7 @@ async def create_student(user: UserCreate, current_user: dict = Depends(get_curr
     user_data['created_at'] = user_data['created_at'].isoformat()
     
     await db.users.insert_one(user_data)
+    bump("users")
     
     # Create progress
     from models.progress import Progress
@@ -59,6 +53,7 @@ async def create_student(user: UserCreate, current_user: dict = Depends(get_curr
     progress_data = progress.model_dump()
     progress_data['last_activity'] = progress_data['last_activity'].isoformat()
     await db.progress.insert_one(progress_data)
+    bump("progress")
     
     return User(
         id=user_in_db.id,
@@ -0,0 +1,90 @@
+"""Check read routing against a replica set.
+
+Verifies that the analytics profile reads from a secondary, that default
+reads stay on the primary, and that a causal session reads its own write
+back from the secondary. Uses a scratch collection, dropped afterwards.
+
+A local three-member replica set:
+
+    for port in 27017 27018 27019; do
+        mkdir -p /tmp/rs-$port
+        mongod --replSet rs0 --port $port --dbpath /tmp/rs-$port --fork --logpath /tmp/rs-$port/log
+    done
+    mongosh --port 27017 --eval 'rs.initiate({_id: "rs0", members: [
+        {_id: 0, host: "localhost:27017"},
+        {_id: 1, host: "localhost:27018"},
+        {_id: 2, host: "localhost:27019"}]})'
+
+    cd backend && MONGO_URL="mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0" \\
+        python scripts/check_read_routing.py
+"""
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.read_routing import reads, causal_session
+
+COLLECTION = "read_routing_check"
+
+class FindListener(monitoring.CommandListener):
+    """Remembers which server answered the last find."""
+    def __init__(self):
+        self.last_address = None
+
+    def started(self, event):
+        if event.command_name == "find":
+            self.last_address = event.connection_id
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+async def main():
+    listener = FindListener()
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[listener])
+    db = client[os.environ['DB_NAME']]
+    analytics_db = reads(db, "analytics")
+
+    hello = await client.admin.command("hello")
+    if "setName" not in hello:
+        print("MONGO_URL is not a replica set; every read goes to the same server")
+        client.close()
+        return 1
+    primary = client.primary
+    failures = 0
+
+    def check(name, ok):
+        nonlocal failures
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        failures += not ok
+
+    user_id = f"check-{uuid.uuid4()}"
+    async with causal_session(db, user_id) as session:
+        await db[COLLECTION].insert_one({"user_id": user_id}, session=session)
+
+    await db[COLLECTION].find_one({"user_id": user_id})
+    check("default reads go to the primary", listener.last_address == primary)
+
+    # A new session for the same user, as a later request would open
+    async with causal_session(db, user_id) as session:
+        found = await analytics_db[COLLECTION].find_one({"user_id": user_id}, session=session)
+    check("analytics reads go to a secondary", listener.last_address != primary)
+    check("causal session reads its own write from the secondary", found is not None)
+
+    await db[COLLECTION].drop()
+    client.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
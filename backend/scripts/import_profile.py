@@ -0,0 +1,81 @@
+"""Import-time profile of the backend, checked against the startup budget.
+
+Imports `server` in a fresh interpreter under `-X importtime` and reports the
+slowest modules and top-level packages. Exits 1 when importing the app takes
+longer than the budget, or when a dependency that should load lazily on first
+use is imported at boot.
+
+    cd backend && python scripts/import_profile.py
+    cd backend && python scripts/import_profile.py --budget 1.5 --top 30
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Only needed by some requests; importing them at boot is a regression
+LAZY_MODULES = ("groq", "passlib", "boto3", "botocore", "PIL", "tiktoken")
+
+def profile_imports():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=ROOT_DIR,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-4000:])
+        raise SystemExit("Importing server failed")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue  # the header row
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_time), int(cumulative), depth))
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("IMPORT_BUDGET_SECONDS", "1.5")),
+                        help="seconds allowed for importing server (default 1.5)")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    modules = profile_imports()
+    total = next(cumulative for name, _, cumulative, _ in modules if name == "server") / 1e6
+
+    print("Slowest modules by cumulative import time")
+    print(f"{'module':<48}{'self ms':>10}{'total ms':>10}")
+    for name, self_time, cumulative, depth in sorted(modules, key=lambda module: -module[2])[:args.top]:
+        print(f"{'  ' * min(depth, 4) + name:<48}{self_time / 1000:>10.1f}{cumulative / 1000:>10.1f}")
+
+    packages = defaultdict(int)
+    for name, self_time, _, _ in modules:
+        packages[name.split(".")[0]] += self_time
+    print("\nTop-level packages by self time")
+    for package, self_time in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<48}{self_time / 1000:>10.1f}")
+
+    failures = []
+    eager = sorted({name.split(".")[0] for name, _, _, _ in modules} & set(LAZY_MODULES))
+    if eager:
+        failures.append(f"imported at boot but meant to load lazily: {', '.join(eager)}")
+    if total > args.budget:
+        failures.append(f"importing server took {total:.2f}s, over the {args.budget:.2f}s budget")
+
+    print(f"\nImporting server: {total:.2f}s (budget {args.budget:.2f}s)")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
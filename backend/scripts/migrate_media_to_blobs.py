@@ -0,0 +1,27 @@
+"""Move inline base64 media out of submissions/messages into the blob store.
+
+    cd backend && python scripts/migrate_media_to_blobs.py
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.blob_store import ensure_indexes, migrate_inline_media
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    await ensure_indexes(db)
+    moved = await migrate_inline_media(db)
+    print(f"Moved {moved} inline payloads to the blob store")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
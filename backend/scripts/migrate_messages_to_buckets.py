@@ -0,0 +1,33 @@
+"""Copy per-message documents into time buckets.
+
+Run this before switching a deployment to MESSAGE_STORAGE=buckets, and
+once more right after the switch to copy messages written in between:
+
+    cd backend && python scripts/migrate_messages_to_buckets.py
+
+Each run resumes every chat from the last message it copied, so it is safe
+to repeat or to restart after an interruption.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.message_store import ensure_indexes, migrate_to_buckets
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    await ensure_indexes(db)
+    migrated = await migrate_to_buckets(db)
+    print(f"Migrated {migrated} chats to bucketed storage")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,29 @@
+"""Recompute the per-task submission stats from the submissions collection.
+
+Also resets stats.assigned to the direct assignees, which older
+deployments counted together with group members.
+
+    cd backend && python scripts/rebuild_task_stats.py
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.task_stats import rebuild_task_stats
+
+async def main():
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    rebuilt = await rebuild_task_stats(db)
+    print(f"Rebuilt stats for {rebuilt} tasks")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
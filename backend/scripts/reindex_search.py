@@ -0,0 +1,29 @@
+"""Rebuild the search index from tasks, submissions and chat messages.
+
+    cd backend && python scripts/reindex_search.py [message,task,submission]
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from utils.search_index import KINDS, ensure_indexes, reindex
+
+async def main():
+    kinds = sys.argv[1].split(",") if len(sys.argv) > 1 else KINDS
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    await ensure_indexes(db)
+    counts = await reindex(db, kinds)
+    for kind, count in counts.items():
+        print(f"Indexed {count} {kind} entries")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,26 +1,37 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, APIRouter
+import asyncio
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import socketio
 import os
 import logging
-from pathlib import Path
-from dotenv import load_dotenv
+from utils.settings import get_settings
+
+settings = get_settings()
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+# Per-request Mongo timelines for the profiler and the slow query log;
+# listeners only reach clients created after this
+from pymongo import monitoring
+from utils.profiling import MongoCallListener, ProfilingMiddleware
+from utils.slow_queries import SlowQueryListener, RouteTagMiddleware, start_slow_query_log
+monitoring.register(MongoCallListener())
+monitoring.register(SlowQueryListener())
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, shared by every module
+from utils.database import client, db
 
 # Create Socket.IO server
+# Long-polling payloads are compressed by engine.io; websocket frames use
+# permessage-deflate, which the ASGI server negotiates (see the bottom of this file)
 sio = socketio.AsyncServer(
     async_mode='asgi',
     cors_allowed_origins='*',
     logger=True,
-    engineio_logger=True
+    engineio_logger=True,
+    http_compression=True,
+    compression_threshold=int(os.environ.get("SOCKET_COMPRESSION_THRESHOLD", "1024"))
 )
 
 # Create FastAPI app
@@ -36,6 +47,13 @@ from routes.chat import router as chat_router
 from routes.progress import router as progress_router
 from routes.announcements import router as announcements_router
 from routes.ai import router as ai_router
+from routes.blobs import router as blobs_router
+from routes.search import router as search_router
+from routes.dashboard import router as dashboard_router
+from routes.feed import router as feed_router
+from routes.groups import router as groups_router
+from routes.profiles import router as profiles_router
+from routes.slow_queries import router as slow_queries_router
 
 # Include routers
 api_router.include_router(auth_router, prefix="/auth", tags=["auth"])
@@ -46,25 +64,102 @@ api_router.include_router(chat_router, prefix="/chat", tags=["chat"])
 api_router.include_router(progress_router, prefix="/progress", tags=["progress"])
 api_router.include_router(announcements_router, prefix="/announcements", tags=["announcements"])
 api_router.include_router(ai_router, prefix="/ai", tags=["ai"])
+api_router.include_router(blobs_router, prefix="/blobs", tags=["blobs"])
+api_router.include_router(search_router, prefix="/search", tags=["search"])
+api_router.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(feed_router, prefix="/feed", tags=["feed"])
+api_router.include_router(groups_router, prefix="/groups", tags=["groups"])
+api_router.include_router(profiles_router, prefix="/profiles", tags=["profiles"])
+api_router.include_router(slow_queries_router, prefix="/slow-queries", tags=["slow-queries"])
 
 app.include_router(api_router)
 
+# Tags Mongo commands with the route issuing them, for the slow query log
+app.add_middleware(RouteTagMiddleware)
+
+# On-demand profiling (X-Profile header from an admin); innermost, so shed requests are not profiled
+app.add_middleware(ProfilingMiddleware)
+
+# Rate limiting and load shedding; added first so CORS headers still wrap its 429/503 responses
+from utils.admission import AdmissionControlMiddleware
+app.add_middleware(AdmissionControlMiddleware)
+
+# gzip/brotli for large JSON responses
+from utils.compression import CompressionMiddleware
+app.add_middleware(CompressionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_origins=settings.cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
 # Socket.IO events
 from sockets.chat_socket import register_socket_events
+from sockets.announcement_socket import register_announcement_events
+from sockets.notification_socket import register_notification_events
 register_socket_events(sio, db)
+register_announcement_events(sio)
+register_notification_events(sio)
+
+# Background maintenance
+from utils.progress_counters import ensure_indexes as ensure_progress_indexes, run_progress_reconciler
+from utils.blob_store import ensure_indexes as ensure_blob_indexes
+from utils.message_store import ensure_indexes as ensure_message_indexes
+from utils.search_index import ensure_indexes as ensure_search_indexes
+from utils.deadline_scheduler import ensure_indexes as ensure_scheduler_indexes, get_scheduler
+from routes.tasks import ensure_indexes as ensure_task_indexes
+from routes.submissions import ensure_indexes as ensure_submission_indexes
+from utils.groups import ensure_indexes as ensure_group_indexes
+from utils.invalidation_bus import run_invalidation_bus
+from utils.likes import ensure_indexes as ensure_like_indexes, run_like_flusher, run_like_reconciler, flush_like_counts
+from utils.doubt_memory import ensure_indexes as ensure_doubt_indexes, run_encoding_loader
+background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    start_slow_query_log(client)
+    await ensure_task_indexes(db)
+    await ensure_submission_indexes(db)
+    await ensure_group_indexes(db)
+    await ensure_progress_indexes(db)
+    await ensure_blob_indexes(db)
+    await ensure_message_indexes(db)
+    await ensure_search_indexes(db)
+    await ensure_scheduler_indexes(db)
+    await ensure_like_indexes(db)
+    await ensure_doubt_indexes(db)
+    background_tasks.append(asyncio.create_task(run_progress_reconciler(db)))
+    background_tasks.append(asyncio.create_task(get_scheduler(db).run()))
+    background_tasks.append(asyncio.create_task(run_invalidation_bus(db)))
+    background_tasks.append(asyncio.create_task(run_like_flusher(db)))
+    background_tasks.append(asyncio.create_task(run_like_reconciler(db)))
+    background_tasks.append(asyncio.create_task(run_encoding_loader()))
+    check_startup_budget()
+
+def check_startup_budget():
+    elapsed = time.perf_counter() - _import_started
+    logger.info(f"Started in {elapsed:.2f}s (imports {_import_seconds:.2f}s, budget {settings.startup_budget_seconds:.2f}s)")
+    if elapsed > settings.startup_budget_seconds:
+        message = f"Startup took {elapsed:.2f}s, over the {settings.startup_budget_seconds:.2f}s budget; see scripts/import_profile.py"
+        if settings.enforce_startup_budget:
+            raise RuntimeError(message)
+        logger.warning(message)
 
 # Add shutdown event before wrapping
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    scheduler = get_scheduler()
+    if scheduler and scheduler.is_leader:
+        # Let another worker take over without waiting for the lease to expire
+        await scheduler.release_lease()
+    # Likes buffered since the last flush would otherwise be lost
+    await flush_like_counts(db)
     client.close()
 
 # Wrap app with Socket.IO
@@ -82,4 +177,18 @@ logger = logging.getLogger(__name__)
 
 @api_router.get("/")
 async def root():
-    return {"message": "Student Task Management API"}
\ No newline at end of file
+    return {"message": "Student Task Management API"}
+
+_import_seconds = time.perf_counter() - _import_started
+
+if __name__ == "__main__":
+    import uvicorn
+    # websockets negotiates permessage-deflate with browsers, compressing Socket.IO frames;
+    # the same applies under `uvicorn server:app`, where --ws-per-message-deflate defaults on
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", "8001")),
+        ws="websockets",
+        ws_per_message_deflate=os.environ.get("WS_PER_MESSAGE_DEFLATE", "true").lower() != "false"
+    )
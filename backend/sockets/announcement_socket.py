@@ -0,0 +1,29 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+ANNOUNCEMENTS_ROOM = "announcements"
+
+_sio = None
+
+def register_announcement_events(sio):
+    global _sio
+    _sio = sio
+    
+    @sio.event
+    async def join_announcements(sid, data=None):
+        await sio.enter_room(sid, ANNOUNCEMENTS_ROOM)
+        return {"status": "joined"}
+    
+    @sio.event
+    async def leave_announcements(sid, data=None):
+        await sio.leave_room(sid, ANNOUNCEMENTS_ROOM)
+
+async def broadcast_announcement(event, payload):
+    if _sio is None:
+        return
+    try:
+        await _sio.emit(event, payload, room=ANNOUNCEMENTS_ROOM)
+    except Exception:
+        # A failed push must never fail the write that triggered it
+        logger.exception(f"Failed to broadcast {event}")
@@ -1,5 +1,9 @@
 import logging
 from datetime import datetime, timezone
+from jose import JWTError, jwt
+from utils.auth import SECRET_KEY, ALGORITHM
+from utils import message_store
+from utils.search_index import index_message
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,53 @@ def register_socket_events(sio, db):
         logger.info(f"User {user_id} joined chat {chat_id}")
         return {"status": "joined"}
     
+    @sio.event
+    async def resume(sid, data):
+        # Rejoin after a reconnect and return only what the client missed.
+        # Returns history, so the caller is taken from the token like GET /chat/messages
+        data = data or {}
+        chat_id = data.get('chat_id')
+        token = data.get('token')
+        
+        if not chat_id or not token:
+            return {"error": "Missing chat_id or token"}
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return {"error": "Invalid token"}
+        user_id = payload.get('sub')
+        
+        try:
+            limit = int(data.get('limit', 200))
+        except (TypeError, ValueError):
+            return {"error": "Invalid limit"}
+        limit = min(max(limit, 1), 1000)
+        
+        session = await db.chat_sessions.find_one({"id": chat_id}, {"_id": 0})
+        if not session:
+            return {"error": "Chat session not found"}
+        
+        if session['admin_id'] != user_id and session['student_id'] != user_id:
+            return {"error": "Not authorized"}
+        
+        # Join before reading so nothing sent in between is lost
+        await sio.enter_room(sid, chat_id)
+        
+        cursor = await message_store.resolve_cursor(db, chat_id, data.get('last_message_id'), data.get('last_seen_at'))
+        if cursor is None:
+            messages = await message_store.list_messages(db, chat_id, limit)
+        else:
+            messages = await message_store.list_messages(db, chat_id, limit + 1, after=cursor)
+        has_more = cursor is not None and len(messages) > limit
+        messages = messages[:limit]
+        
+        from models.chat import Message
+        return {
+            "status": "joined",
+            "messages": [Message(**msg).model_dump(mode='json') for msg in messages],
+            "has_more": has_more
+        }
+    
     @sio.event
     async def leave_chat(sid, data):
         chat_id = data.get('chat_id')
@@ -48,19 +99,42 @@ def register_socket_events(sio, db):
         if not all([chat_id, sender_id, content]):
             return {"error": "Missing required fields"}
         
+        # Inline images go to the blob store; the message keeps a reference
+        from utils.blob_store import offload_inline_media, blob_reference, can_attach_blob
+        blob_id = data.get('blob_id')
+        if blob_id:
+            # Attaching grants chat participants read access, so the uploader is taken from the token
+            token = data.get('token')
+            if not token:
+                return {"error": "Missing token"}
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                return {"error": "Invalid token"}
+            if payload.get('sub') != sender_id:
+                return {"error": "Not authorized"}
+            if not await can_attach_blob(db, blob_id, payload):
+                return {"error": "Uploaded file not found"}
+        if message_type == 'image' and not blob_id:
+            blob_id = await offload_inline_media(db, content)
+            if blob_id:
+                content = blob_reference(blob_id)
+        
         # Create message
         from models.chat import Message
         message_obj = Message(
             chat_id=chat_id,
             sender_id=sender_id,
             content=content,
-            message_type=message_type
+            message_type=message_type,
+            blob_id=blob_id
         )
         
         message_data = message_obj.model_dump()
         message_data['created_at'] = message_data['created_at'].isoformat()
         
-        await db.messages.insert_one(message_data)
+        await message_store.insert_message(db, message_data)
+        await index_message(db, message_data)
         
         # Broadcast to room
         await sio.emit('new_message', message_obj.model_dump(mode='json'), room=chat_id)
@@ -85,9 +159,6 @@ def register_socket_events(sio, db):
         user_id = data.get('user_id')
         
         # Mark messages as read
-        await db.messages.update_many(
-            {"chat_id": chat_id, "sender_id": {"$ne": user_id}, "is_read": False},
-            {"$set": {"is_read": True}}
-        )
+        await message_store.mark_read(db, chat_id, user_id)
         
         await sio.emit('messages_read', {'user_id': user_id}, room=chat_id)
\ No newline at end of file
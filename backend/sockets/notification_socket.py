@@ -0,0 +1,37 @@
+import logging
+from jose import JWTError, jwt
+from utils.auth import SECRET_KEY, ALGORITHM
+
+logger = logging.getLogger(__name__)
+
+_sio = None
+
+def user_room(user_id):
+    return f"user:{user_id}"
+
+def register_notification_events(sio):
+    global _sio
+    _sio = sio
+    
+    @sio.event
+    async def join_user(sid, data):
+        # The room is derived from the token, so clients cannot join someone else's
+        token = (data or {}).get('token')
+        if not token:
+            return {"error": "Missing token"}
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return {"error": "Invalid token"}
+        
+        await sio.enter_room(sid, user_room(payload['sub']))
+        return {"status": "joined"}
+
+async def notify_users(user_ids, event, payload):
+    if _sio is None:
+        return
+    for user_id in user_ids:
+        try:
+            await _sio.emit(event, payload, room=user_room(user_id))
+        except Exception:
+            logger.exception(f"Failed to emit {event} to {user_id}")
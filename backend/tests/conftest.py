@@ -0,0 +1,16 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# utils.settings requires these; nothing connects to them
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test"]
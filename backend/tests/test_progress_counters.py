@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timezone
+
+import routes.tasks as tasks_routes
+from models.task import TaskUpdate
+from utils import progress_counters
+
+ADMIN = {"sub": "admin", "role": "admin"}
+
+def setup_function():
+    progress_counters._drift.clear()
+
+async def _progress(db, student_id):
+    return await db.progress.find_one({"student_id": student_id})
+
+def test_retried_outbox_entry_is_applied_once(db):
+    async def scenario():
+        await db.progress.insert_one({"student_id": "s1", "completed_tasks": 0, "total_tasks": 0})
+        changes = [("s1", "completed_tasks", 1)]
+        await progress_counters.record_counter_changes(db, changes, op_key="submission:x:create")
+        # The request is retried, and the drainer replays the entry it already applied
+        await progress_counters.record_counter_changes(db, changes, op_key="submission:x:create")
+        entry = await db.progress_outbox.find_one({"id": "submission:x:create:s1:completed_tasks"}, {"_id": 0})
+        await progress_counters.apply_outbox_entry(db, entry)
+        return await _progress(db, "s1"), await db.progress_outbox.count_documents({})
+
+    progress, entries = asyncio.run(scenario())
+    assert progress["completed_tasks"] == 1
+    assert entries == 1
+
+def test_reassigning_back_and_forth_counts_every_change(db, monkeypatch):
+    monkeypatch.setattr(tasks_routes, "db", db)
+
+    async def scenario():
+        await db.progress.insert_many([
+            {"student_id": student_id, "completed_tasks": 0, "total_tasks": 0} for student_id in ("s1", "s2")
+        ])
+        await db.tasks.insert_one({
+            "id": "t1", "title": "Task", "description": "", "difficulty": "Easy", "submission_type": "text",
+            "deadline": "2030-01-01T00:00:00+00:00", "created_by": "admin",
+            "created_at": "2025-01-01T00:00:00+00:00", "assigned_to": ["s1"], "assigned_groups": [],
+        })
+        # s2 is added, removed and added again; each change needs its own op key
+        for assigned_to in (["s1", "s2"], ["s1"], ["s1", "s2"]):
+            await tasks_routes.update_task("t1", TaskUpdate(assigned_to=assigned_to), ADMIN)
+        return await _progress(db, "s1"), await _progress(db, "s2")
+
+    s1, s2 = asyncio.run(scenario())
+    assert s1["total_tasks"] == 0
+    assert s2["total_tasks"] == 1
+
+def test_reconcile_leaves_writes_whose_outbox_entry_is_not_recorded_yet(db):
+    async def scenario():
+        await db.tasks.insert_one({"id": "t1", "assigned_to": ["s1"]})
+        await db.progress.insert_one({"student_id": "s1", "completed_tasks": 0, "total_tasks": 1})
+        # The submission is stored, but its counter change has not been recorded yet
+        await db.submissions.insert_one({"id": "x", "task_id": "t1", "student_id": "s1"})
+        stats = await progress_counters.reconcile_progress(db)
+        await progress_counters.record_counter_changes(db, [("s1", "completed_tasks", 1)], op_key="submission:x:create")
+        await progress_counters.reconcile_progress(db)
+        return stats, await _progress(db, "s1")
+
+    stats, progress = asyncio.run(scenario())
+    assert stats["corrected"] == 0
+    assert progress["completed_tasks"] == 1
+
+def test_reconcile_skips_students_with_entries_recorded_after_the_read(db):
+    async def scenario():
+        await db.tasks.insert_one({"id": "t1", "assigned_to": ["s1"]})
+        await db.progress.insert_one({"student_id": "s1", "completed_tasks": 0, "total_tasks": 1})
+        read_at = datetime.now(timezone.utc)
+        chunk = await db.progress.find({}, {"_id": 0}).to_list(None)
+        await db.submissions.insert_one({"id": "x", "task_id": "t1", "student_id": "s1"})
+        await progress_counters.record_counter_changes(db, [("s1", "completed_tasks", 1)], op_key="submission:x:create")
+        await progress_counters.reconcile_chunk(db, chunk, read_at)
+        return progress_counters._drift
+
+    assert asyncio.run(scenario()) == {}
+
+def test_reconcile_corrects_drift_seen_on_two_passes(db):
+    async def scenario():
+        await db.tasks.insert_one({"id": "t1", "assigned_to": ["s1"]})
+        await db.progress.insert_one({"student_id": "s1", "completed_tasks": 3, "total_tasks": 1})
+        first = await progress_counters.reconcile_progress(db)
+        second = await progress_counters.reconcile_progress(db)
+        return first, second, await _progress(db, "s1")
+
+    first, second, progress = asyncio.run(scenario())
+    assert first["corrected"] == 0
+    assert second["corrected"] == 1
+    assert progress["completed_tasks"] == 0
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from jose import JWTError, jwt
+from utils.auth import SECRET_KEY, ALGORITHM
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL_ENABLED = os.environ.get("ADMISSION_CONTROL_ENABLED", "true").lower() != "false"
+
+# Per route class: starting/min/max concurrency, latency above which the limit
+# shrinks, and the longest a request may wait for a slot before it is shed
+ROUTE_CLASSES = {
+    "auth": {"limit": 16, "min_limit": 2, "max_limit": 64, "target_latency": 0.5, "max_queue_seconds": 2.0},
+    "ai": {"limit": 8, "min_limit": 1, "max_limit": 32, "target_latency": 15.0, "max_queue_seconds": 5.0},
+    "writes": {"limit": 32, "min_limit": 4, "max_limit": 256, "target_latency": 0.3, "max_queue_seconds": 1.0},
+    "reads": {"limit": 64, "min_limit": 8, "max_limit": 512, "target_latency": 0.2, "max_queue_seconds": 0.5},
+}
+# Multiplicative decrease applied when a request finishes over its class's target latency
+DECREASE_FACTOR = 0.9
+# Per-user token buckets: (capacity, tokens refilled per second)
+RATE_LIMITS = {
+    "ai": (float(os.environ.get("AI_RATE_LIMIT_BURST", "5")), float(os.environ.get("AI_RATE_LIMIT_PER_MINUTE", "10")) / 60),
+    "like": (float(os.environ.get("LIKE_RATE_LIMIT_BURST", "20")), float(os.environ.get("LIKE_RATE_LIMIT_PER_MINUTE", "60")) / 60),
+}
+MAX_TRACKED_BUCKETS = 10000
+
+_LIKE_PATH = re.compile(r"^/api/submissions/[^/]+/like$")
+# Uploads are read from the client before any response starts, so their
+# latency measures the client's network rather than server load
+_UNTIMED_PREFIXES = ("/api/blobs",)
+
+class Shed(Exception):
+    pass
+
+def route_class(method: str, path: str) -> str:
+    if path.startswith("/api/auth/"):
+        return "auth"
+    if path.startswith("/api/ai/"):
+        return "ai"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "reads"
+    return "writes"
+
+def rate_limit_class(method: str, path: str):
+    if path.startswith("/api/ai/"):
+        return "ai"
+    if method == "POST" and _LIKE_PATH.match(path):
+        return "like"
+    return None
+
+class AdaptiveLimiter:
+    """Concurrency limit adjusted AIMD style from observed request latency.
+
+    Each request responding within the target latency adds 1/limit, so the
+    limit grows by about one per window of requests; one responding later
+    shrinks the limit by DECREASE_FACTOR, at most once per window.
+    """
+    def __init__(self, limit, min_limit, max_limit, target_latency, max_queue_seconds):
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.max_queue_seconds = max_queue_seconds
+        self.in_flight = 0
+        self.waiters = deque()
+        self.last_decrease = 0.0
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self.in_flight += 1
+            return
+        # Waiting would outlast max_queue_seconds anyway
+        if len(self.waiters) >= int(self.limit) * 4:
+            raise Shed()
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            # On timeout the waiter is cancelled, so release() never grants it a slot
+            await asyncio.wait_for(waiter, timeout=self.max_queue_seconds)
+        except asyncio.TimeoutError:
+            raise Shed()
+        except asyncio.CancelledError:
+            # Client went away; hand back a slot granted just before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    def release(self, latency):
+        """Free the slot; `latency` of None leaves the limit unchanged."""
+        self.in_flight -= 1
+        now = time.monotonic()
+        if latency is not None and latency > self.target_latency:
+            if now - self.last_decrease > self.target_latency:
+                self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                self.last_decrease = now
+        elif latency is not None:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        # Hand freed slots straight to waiters, oldest first
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.target_latency * (len(self.waiters) + 1) / max(int(self.limit), 1)))
+
+class TokenBuckets:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        # key -> (tokens, updated_at)
+        self.buckets = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.refill_per_second
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+        while len(self.buckets) > MAX_TRACKED_BUCKETS:
+            self.buckets.popitem(last=False)
+        return wait
+
+def _caller(scope) -> str:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization" and value.lower().startswith(b"bearer "):
+            try:
+                payload = jwt.decode(value[7:].decode(), SECRET_KEY, algorithms=[ALGORITHM])
+                if payload.get("sub"):
+                    return f"user:{payload['sub']}"
+            except JWTError:
+                pass
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "anonymous"
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionControlMiddleware:
+    """Rate limits and sheds /api requests before they reach the routes."""
+    def __init__(self, app):
+        self.app = app
+        self.limiters = {name: AdaptiveLimiter(**config) for name, config in ROUTE_CLASSES.items()}
+        self.buckets = {name: TokenBuckets(*config) for name, config in RATE_LIMITS.items()}
+
+    async def __call__(self, scope, receive, send):
+        if not ADMISSION_CONTROL_ENABLED or scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        method, path = scope["method"], scope["path"]
+
+        limited = rate_limit_class(method, path)
+        if limited:
+            wait = self.buckets[limited].take(_caller(scope))
+            if wait:
+                await _reject(send, 429, "Too many requests", wait)
+                return
+
+        limiter = self.limiters[route_class(method, path)]
+        try:
+            await limiter.acquire()
+        except Shed:
+            logger.warning(f"Shedding {method} {path}: {limiter.in_flight} in flight, limit {limiter.limit:.1f}")
+            await _reject(send, 503, "Server busy, retry shortly", limiter.retry_after())
+            return
+
+        started = time.monotonic()
+        latency = None
+
+        async def timed_send(message):
+            # Time to the first response byte; streaming the body (blob downloads,
+            # slow clients) is bounded by the client's network, not by server load
+            nonlocal latency
+            if message["type"] == "http.response.start" and latency is None:
+                latency = time.monotonic() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            if path.startswith(_UNTIMED_PREFIXES):
+                latency = None
+            elif latency is None:
+                # Failed before responding
+                latency = time.monotonic() - started
+            limiter.release(latency)
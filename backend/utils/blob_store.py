@@ -0,0 +1,288 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import io
+import logging
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from utils.auth import SECRET_KEY
+
+logger = logging.getLogger(__name__)
+
+BLOB_BACKEND = os.environ.get("BLOB_BACKEND", "local")
+BLOB_ROOT = Path(os.environ.get("BLOB_ROOT", Path(__file__).parent.parent / "blob_data"))
+BLOB_S3_BUCKET = os.environ.get("BLOB_S3_BUCKET", "guideyou-blobs")
+# Point at MinIO or another S3-compatible stand-in for local development
+BLOB_S3_ENDPOINT_URL = os.environ.get("BLOB_S3_ENDPOINT_URL")
+CHUNK_SIZE = 256 * 1024
+THUMBNAIL_SIZE = (256, 256)
+SIGNED_URL_TTL_SECONDS = int(os.environ.get("BLOB_SIGNED_URL_TTL_SECONDS", "3600"))
+
+DATA_URL_RE = re.compile(r"^data:(?P<type>[\w/+.-]+);base64,(?P<data>.*)$", re.DOTALL)
+
+class LocalBlobBackend:
+    """Filesystem store with the same object semantics as the S3 backend."""
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def temp_dir(self) -> Path:
+        path = self.root / "tmp"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def head_object(self, key: str):
+        path = self._path(key)
+        return {"size": path.stat().st_size} if path.exists() else None
+
+    def put_file(self, key: str, file_path: str):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Atomic on the same filesystem, so readers never see partial blobs
+        os.replace(file_path, path)
+
+    def read_range(self, key: str, start: int, end: int):
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete_object(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+class S3BlobBackend:
+    def __init__(self, bucket: str, endpoint_url=None):
+        import boto3
+        self.bucket = bucket
+        self.s3 = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def temp_dir(self):
+        return None
+
+    def head_object(self, key: str):
+        from botocore.exceptions import ClientError
+        try:
+            response = self.s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
+            return None
+        return {"size": response["ContentLength"]}
+
+    def put_file(self, key: str, file_path: str):
+        # upload_file switches to multipart uploads for large files
+        self.s3.upload_file(file_path, self.bucket, key)
+        os.unlink(file_path)
+
+    def read_range(self, key: str, start: int, end: int):
+        response = self.s3.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")
+        yield from response["Body"].iter_chunks(CHUNK_SIZE)
+
+    def delete_object(self, key: str):
+        self.s3.delete_object(Bucket=self.bucket, Key=key)
+
+_backend = None
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if BLOB_BACKEND == "s3":
+            _backend = S3BlobBackend(BLOB_S3_BUCKET, BLOB_S3_ENDPOINT_URL)
+        else:
+            _backend = LocalBlobBackend(BLOB_ROOT)
+    return _backend
+
+async def ensure_indexes(db):
+    await db.blobs.create_index("id", unique=True)
+
+async def store_stream(db, read_chunk, content_type: str, make_thumbnail: bool = True):
+    """Store a stream of bytes, deduplicating by SHA-256.
+
+    `read_chunk` is an async callable returning the next chunk, or b"" at
+    the end. Returns the blob metadata document.
+    """
+    backend = get_backend()
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=backend.temp_dir())
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await read_chunk()
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(f.write, chunk)
+
+        blob_id = digest.hexdigest()
+        existing = await db.blobs.find_one({"id": blob_id}, {"_id": 0})
+        if existing and await asyncio.to_thread(backend.head_object, blob_id):
+            return existing
+
+        await asyncio.to_thread(backend.put_file, blob_id, temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    blob = {
+        "id": blob_id,
+        "size": size,
+        "content_type": content_type,
+        "thumbnail_id": None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if make_thumbnail and content_type.startswith("image/"):
+        blob["thumbnail_id"] = await _store_thumbnail(db, blob_id, size)
+
+    await db.blobs.update_one({"id": blob_id}, {"$setOnInsert": blob}, upsert=True)
+    return blob
+
+async def store_bytes(db, data: bytes, content_type: str):
+    stream = io.BytesIO(data)
+
+    async def read_chunk():
+        return stream.read(CHUNK_SIZE)
+
+    return await store_stream(db, read_chunk, content_type)
+
+async def _store_thumbnail(db, blob_id: str, size: int):
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    def render():
+        data = b"".join(get_backend().read_range(blob_id, 0, size - 1))
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail(THUMBNAIL_SIZE)
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=80)
+        return output.getvalue()
+
+    try:
+        thumbnail = await asyncio.to_thread(render)
+    except Exception:
+        logger.warning(f"Could not generate thumbnail for blob {blob_id}")
+        return None
+    stored = await store_stream(db, _reader(thumbnail), "image/jpeg", make_thumbnail=False)
+    return stored["id"]
+
+def _reader(data: bytes):
+    stream = io.BytesIO(data)
+
+    async def read_chunk():
+        return stream.read(CHUNK_SIZE)
+
+    return read_chunk
+
+def parse_range(header, size: int):
+    """Parse a single `bytes=` range into inclusive (start, end), or None for the whole blob."""
+    if not header:
+        return None
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        raise ValueError("Unsupported range")
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(match.group(2)), 0)
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+async def iter_blob(blob_id: str, start: int, end: int):
+    iterator = get_backend().read_range(blob_id, start, end)
+    while True:
+        chunk = await asyncio.to_thread(next, iterator, None)
+        if chunk is None:
+            break
+        yield chunk
+
+def sign_blob_url(blob_id: str, ttl: int = SIGNED_URL_TTL_SECONDS) -> str:
+    """Time-limited URL usable from <img>/<video> tags, which cannot send a bearer token."""
+    expires = int(time.time()) + ttl
+    signature = hmac.new(SECRET_KEY.encode(), f"{blob_id}:{expires}".encode(), hashlib.sha256).hexdigest()
+    return f"/api/blobs/{blob_id}?expires={expires}&signature={signature}"
+
+def verify_blob_signature(blob_id: str, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    expected = hmac.new(SECRET_KEY.encode(), f"{blob_id}:{expires}".encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def decode_inline_media(content):
+    """Return (bytes, content_type) if `content` is an inline data URL, else None."""
+    if not content:
+        return None
+    match = DATA_URL_RE.match(content)
+    if not match:
+        return None
+    try:
+        return base64.b64decode(match.group("data"), validate=True), match.group("type")
+    except (binascii.Error, ValueError):
+        return None
+
+async def offload_inline_media(db, content):
+    """Move an inline data URL into the blob store. Returns the blob id or None."""
+    decoded = decode_inline_media(content)
+    if decoded is None:
+        return None
+    data, content_type = decoded
+    blob = await store_bytes(db, data, content_type)
+    return blob["id"]
+
+def blob_reference(blob_id: str) -> str:
+    return f"blob:{blob_id}"
+
+async def can_attach_blob(db, blob_id: str, user: dict) -> bool:
+    """Whether `user` may reference the blob from a submission or message.
+
+    Referencing a blob grants read access to it (see routes/blobs.py), so
+    only its uploaders may attach it; admins may attach any blob.
+    """
+    query = {"id": blob_id}
+    if user["role"] != "admin":
+        query["uploaded_by"] = user["sub"]
+    return await db.blobs.find_one(query, {"_id": 1}) is not None
+
+async def migrate_inline_media(db, batch_size: int = 100):
+    """Move inline image/video payloads of existing documents into the blob store."""
+    moved = 0
+    targets = (
+        (db.submissions, {"submission_type": {"$in": ["image", "video"]}, "blob_id": None, "content": {"$regex": "^data:"}}),
+        (db.messages, {"message_type": "image", "blob_id": None, "content": {"$regex": "^data:"}}),
+    )
+    for collection, query in targets:
+        while True:
+            docs = await collection.find(query, {"_id": 0, "id": 1, "content": 1}).to_list(batch_size)
+            if not docs:
+                break
+            for doc in docs:
+                blob_id = await offload_inline_media(db, doc["content"])
+                if blob_id is None:
+                    # Not decodable; mark it so the query does not return it again
+                    await collection.update_one({"id": doc["id"]}, {"$set": {"blob_id": ""}})
+                    continue
+                await collection.update_one(
+                    {"id": doc["id"]},
+                    {"$set": {"blob_id": blob_id, "content": blob_reference(blob_id)}}
+                )
+                moved += 1
+    return moved
@@ -0,0 +1,110 @@
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() != "false"
+# Below this many bytes the headers and CPU cost outweigh the savings
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_TYPES = tuple(
+    content_type.strip() for content_type in
+    os.environ.get("COMPRESSION_TYPES", "application/json,text/,application/javascript,image/svg+xml").split(",")
+)
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+# Brotli's higher qualities are for static assets; 4 beats gzip -6 on size at similar CPU
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "4"))
+
+def _accepted_encodings(header: bytes) -> set:
+    accepted = set()
+    for part in header.decode("latin-1").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+def choose_encoding(accept_encoding: bytes):
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def _compressible(headers) -> bool:
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.decode("latin-1").startswith(COMPRESSION_TYPES)
+
+class CompressionMiddleware:
+    """gzip/brotli for complete responses of an allowed type above COMPRESSION_MIN_SIZE.
+
+    Streamed responses (blob downloads) pass through untouched.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not COMPRESSION_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(dict(scope.get("headers", [])).get(b"accept-encoding", b""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] in (204, 206, 304) or not _compressible(message.get("headers", [])):
+                    await send(message)
+                    return
+                # Held back until the body shows whether it is worth compressing
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            held, start = start, None
+            headers = [(name, value) for name, value in held.get("headers", []) if name != b"content-length"]
+            body = message.get("body", b"")
+            if message.get("more_body") or len(body) < COMPRESSION_MIN_SIZE:
+                await send(held)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers = [
+                # A strong ETag names the identity bytes; the compressed body only matches weakly
+                (name, b"W/" + value if name == b"etag" and not value.startswith(b"W/") else value)
+                for name, value in headers
+            ]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send({**held, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,7 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from utils.settings import get_settings
+
+# One client, and so one connection pool, per process. Command listeners must
+# be registered with pymongo.monitoring before this module is first imported.
+client = AsyncIOMotorClient(get_settings().mongo_url)
+db = client[get_settings().db_name]
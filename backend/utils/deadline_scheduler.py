@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from sockets.notification_socket import notify_users
+from utils.groups import assigned_students
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "deadline-scheduler"
+LEASE_TTL_SECONDS = int(os.environ.get("DEADLINE_LEASE_TTL_SECONDS", "30"))
+# How far ahead deadlines are loaded into the heap on each reload
+HORIZON_SECONDS = int(os.environ.get("DEADLINE_HORIZON_SECONDS", "3600"))
+RELOAD_INTERVAL_SECONDS = int(os.environ.get("DEADLINE_RELOAD_INTERVAL_SECONDS", "60"))
+REMINDER_LEAD_SECONDS = int(os.environ.get("DEADLINE_REMINDER_LEAD_SECONDS", "3600"))
+MATERIALIZE_BATCH_SIZE = 1000
+
+REMINDER = "reminder"
+DEADLINE = "deadline"
+
+def _parse(value):
+    deadline = datetime.fromisoformat(value) if isinstance(value, str) else value
+    if deadline.tzinfo is None:
+        deadline = deadline.replace(tzinfo=timezone.utc)
+    return deadline
+
+async def ensure_indexes(db):
+    await db.scheduler_leases.create_index("id", unique=True)
+    await db.tasks.create_index([("deadline_processed", 1), ("deadline", 1)])
+    await db.tasks.create_index([("reminder_sent", 1), ("deadline", 1)])
+    await db.missed_submissions.create_index([("task_id", 1), ("student_id", 1)], unique=True)
+    await db.missed_submissions.create_index("student_id")
+
+class DeadlineScheduler:
+    """Fires reminders and deadline processing for tasks.
+
+    Only the worker holding the Mongo lease runs timers, so it is safe with
+    several uvicorn workers. All state is persisted on the task documents
+    (reminder_sent, deadline_processed); a new leader rebuilds its heap with
+    an indexed range query on deadline.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.heap = []
+        self.scheduled = set()
+        self.wakeup = asyncio.Event()
+        self.lease_expires = None
+        self.next_reload = None
+
+    async def acquire_lease(self):
+        now = datetime.now(timezone.utc)
+        try:
+            result = await self.db.scheduler_leases.update_one(
+                {"id": LEASE_NAME, "$or": [{"expires_at": {"$lt": now}}, {"holder": self.worker_id}]},
+                {"$set": {"holder": self.worker_id, "expires_at": now + timedelta(seconds=LEASE_TTL_SECONDS)}},
+                upsert=True
+            )
+            acquired = result.matched_count > 0 or result.upserted_id is not None
+        except DuplicateKeyError:
+            # Another worker holds an unexpired lease
+            acquired = False
+
+        if acquired and not self.is_leader:
+            logger.info(f"Deadline scheduler leadership acquired by {self.worker_id}")
+            self.next_reload = None
+        if not acquired and self.is_leader:
+            logger.info(f"Deadline scheduler leadership lost by {self.worker_id}")
+            self.heap = []
+            self.scheduled = set()
+        self.is_leader = acquired
+        if acquired:
+            self.lease_expires = now + timedelta(seconds=LEASE_TTL_SECONDS)
+        return acquired
+
+    async def release_lease(self):
+        await self.db.scheduler_leases.delete_one({"id": LEASE_NAME, "holder": self.worker_id})
+        self.is_leader = False
+
+    def _push(self, fire_at, kind, task_id, deadline):
+        key = (kind, task_id, deadline)
+        if key in self.scheduled:
+            return
+        self.scheduled.add(key)
+        heapq.heappush(self.heap, (fire_at, kind, task_id, deadline))
+
+    def schedule_task(self, task):
+        """Schedule a task created or changed in this worker without waiting for a reload."""
+        if not self.is_leader or not task.get('deadline'):
+            return
+        deadline = _parse(task['deadline'])
+        if deadline > datetime.now(timezone.utc) + timedelta(seconds=HORIZON_SECONDS):
+            return
+        if not task.get('reminder_sent'):
+            self._push(deadline - timedelta(seconds=REMINDER_LEAD_SECONDS), REMINDER, task['id'], deadline.isoformat())
+        if not task.get('deadline_processed'):
+            self._push(deadline, DEADLINE, task['id'], deadline.isoformat())
+        self.wakeup.set()
+
+    async def reload(self):
+        now = datetime.now(timezone.utc)
+        horizon = (now + timedelta(seconds=HORIZON_SECONDS)).isoformat()
+        reminder_horizon = (now + timedelta(seconds=HORIZON_SECONDS + REMINDER_LEAD_SECONDS)).isoformat()
+
+        # Includes deadlines that passed while no leader was running
+        pending = self.db.tasks.find(
+            {"deadline_processed": {"$ne": True}, "deadline": {"$lte": horizon}},
+            {"_id": 0, "id": 1, "deadline": 1}
+        )
+        async for task in pending:
+            deadline = _parse(task['deadline'])
+            self._push(deadline, DEADLINE, task['id'], deadline.isoformat())
+
+        reminders = self.db.tasks.find(
+            {"reminder_sent": {"$ne": True}, "deadline": {"$gt": now.isoformat(), "$lte": reminder_horizon}},
+            {"_id": 0, "id": 1, "deadline": 1}
+        )
+        async for task in reminders:
+            deadline = _parse(task['deadline'])
+            self._push(deadline - timedelta(seconds=REMINDER_LEAD_SECONDS), REMINDER, task['id'], deadline.isoformat())
+
+        self.next_reload = now + timedelta(seconds=RELOAD_INTERVAL_SECONDS)
+
+    async def _current_task(self, task_id, deadline):
+        task = await self.db.tasks.find_one({"id": task_id}, {"_id": 0})
+        # Skip timers for deleted tasks or tasks whose deadline has since moved
+        if not task or _parse(task['deadline']).isoformat() != deadline:
+            return None
+        return task
+
+    async def send_reminder(self, task_id, deadline):
+        task = await self._current_task(task_id, deadline)
+        if not task or task.get('reminder_sent'):
+            return
+        submitted = set(await self.db.submissions.distinct("student_id", {"task_id": task_id}))
+        pending_students = [student_id for student_id in await assigned_students(self.db, task) if student_id not in submitted]
+        await notify_users(pending_students, "task_deadline_reminder", {
+            "task_id": task_id,
+            "title": task['title'],
+            "deadline": deadline,
+        })
+        await self.db.tasks.update_one({"id": task_id}, {"$set": {"reminder_sent": True}})
+
+    async def process_deadline(self, task_id, deadline):
+        task = await self._current_task(task_id, deadline)
+        if not task or task.get('deadline_processed'):
+            return
+        count = await materialize_missed(self.db, task)
+        await self.db.tasks.update_one({"id": task_id}, {"$set": {"deadline_processed": True}})
+        logger.info(f"Deadline passed for task {task_id}: {count} missed submissions recorded")
+
+    async def hold_lease(self) -> bool:
+        """Renew the lease once a third of its TTL has passed; False once leadership is lost."""
+        if not self.is_leader:
+            return False
+        renew_at = self.lease_expires - timedelta(seconds=LEASE_TTL_SECONDS * 2 / 3)
+        if datetime.now(timezone.utc) < renew_at:
+            return True
+        return await self.acquire_lease()
+
+    async def fire_due(self):
+        now = datetime.now(timezone.utc)
+        while self.heap and self.heap[0][0] <= now:
+            # A long backlog must not outlive the lease, or a second leader fires the same timers
+            if not await self.hold_lease():
+                return
+            fire_at, kind, task_id, deadline = heapq.heappop(self.heap)
+            self.scheduled.discard((kind, task_id, deadline))
+            try:
+                if kind == REMINDER:
+                    await self.send_reminder(task_id, deadline)
+                else:
+                    await self.process_deadline(task_id, deadline)
+            except Exception:
+                logger.exception(f"Deadline scheduler failed on {kind} for task {task_id}")
+
+    async def run(self):
+        while True:
+            try:
+                if await self.acquire_lease():
+                    if self.next_reload is None or datetime.now(timezone.utc) >= self.next_reload:
+                        await self.reload()
+                    await self.fire_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Deadline scheduler iteration failed")
+
+            # Sleep until the next timer, lease renewal or reload, whichever is first
+            now = datetime.now(timezone.utc)
+            delay = LEASE_TTL_SECONDS / 3
+            if self.is_leader:
+                if self.heap:
+                    delay = min(delay, (self.heap[0][0] - now).total_seconds())
+                if self.next_reload:
+                    delay = min(delay, (self.next_reload - now).total_seconds())
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=max(delay, 0.05))
+            except asyncio.TimeoutError:
+                pass
+
+async def materialize_missed(db, task):
+    """Record a missed submission for every assigned student who did not submit."""
+    submitted = set(await db.submissions.distinct("student_id", {"task_id": task['id']}))
+    now = datetime.now(timezone.utc).isoformat()
+    operations = []
+    count = 0
+    for student_id in await assigned_students(db, task):
+        if student_id in submitted:
+            continue
+        operations.append(UpdateOne(
+            {"task_id": task['id'], "student_id": student_id},
+            {"$setOnInsert": {
+                "id": str(uuid.uuid4()),
+                "task_id": task['id'],
+                "student_id": student_id,
+                "deadline": task['deadline'],
+                "recorded_at": now,
+            }},
+            upsert=True
+        ))
+        if len(operations) >= MATERIALIZE_BATCH_SIZE:
+            count += len(operations)
+            await db.missed_submissions.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        count += len(operations)
+        await db.missed_submissions.bulk_write(operations, ordered=False)
+    return count
+
+scheduler = None
+
+def get_scheduler(db=None):
+    global scheduler
+    if scheduler is None and db is not None:
+        scheduler = DeadlineScheduler(db)
+    return scheduler
+
+def notify_task_changed(task):
+    if scheduler is not None:
+        scheduler.schedule_task(task)
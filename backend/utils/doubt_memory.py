@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Recent turns sent verbatim with each question; older ones are folded into the summary
+HISTORY_TOKEN_BUDGET = int(os.environ.get("DOUBT_HISTORY_TOKENS", "3000"))
+SUMMARY_TOKEN_BUDGET = int(os.environ.get("DOUBT_SUMMARY_TOKENS", "400"))
+QUESTION_TOKEN_LIMIT = int(os.environ.get("DOUBT_QUESTION_TOKENS", "2000"))
+# Upper bound on turns read per question, whatever their size
+MAX_RECENT_TURNS = 50
+ENCODING_RETRY_SECONDS = 60
+
+# tiktoken downloads its BPE file on first use; keep it next to the backend so
+# later starts load it from disk (pre-seed this directory for offline deployments)
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(Path(__file__).parent.parent / "tiktoken_cache"))
+
+# The system prompt and summary lead every request unchanged between compactions,
+# so providers with prompt caching reuse them instead of reprocessing the prefix
+SYSTEM_PROMPT = "You are a helpful educational AI assistant. Answer student questions clearly and concisely. Encourage learning by explaining concepts rather than just giving answers. Be supportive and patient."
+SUMMARY_PREFIX = "Summary of the earlier part of this conversation:\n"
+SUMMARIZE_PROMPT = (
+    "Update the summary of a tutoring conversation with the new turns below. Keep the topics, "
+    "what the student found difficult and any answers they were given, in under "
+    f"{SUMMARY_TOKEN_BUDGET * 3 // 4} words. Reply with the summary only."
+)
+
+# Set by run_encoding_loader; until then token counts are estimated
+_encoding = None
+
+def _load_encoding():
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
+
+async def run_encoding_loader():
+    """Load the encoding off the event loop at startup, retrying until it succeeds."""
+    global _encoding
+    while _encoding is None:
+        try:
+            _encoding = await asyncio.to_thread(_load_encoding)
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e}")
+            await asyncio.sleep(ENCODING_RETRY_SECONDS)
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def clip_tokens(text: str, max_tokens: int) -> str:
+    encoding = _encoding
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+async def ensure_indexes(db):
+    await db.doubt_conversations.create_index("id", unique=True)
+    await db.doubt_conversations.create_index([("student_id", 1), ("updated_at", -1)])
+    await db.doubt_turns.create_index([("conversation_id", 1), ("seq", 1)], unique=True)
+
+async def start_conversation(db, student_id: str, title: str) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    conversation = {
+        "id": str(uuid.uuid4()),
+        "student_id": student_id,
+        "title": title[:80],
+        "summary": "",
+        # Turns up to and including this seq are covered by the summary
+        "summary_through": 0,
+        "turn_count": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+    await db.doubt_conversations.insert_one(conversation)
+    conversation.pop('_id', None)
+    return conversation
+
+async def get_conversation(db, conversation_id: str, student_id: str):
+    return await db.doubt_conversations.find_one({"id": conversation_id, "student_id": student_id}, {"_id": 0})
+
+def make_turn(role: str, content: str) -> dict:
+    return {"role": role, "content": content, "tokens": count_tokens(content)}
+
+def clip_history(history: list) -> list:
+    """Newest well-formed turns of a client-sent transcript within HISTORY_TOKEN_BUDGET, oldest first."""
+    turns, used = [], 0
+    for message in reversed(history[-MAX_RECENT_TURNS:]):
+        if not (isinstance(message, dict) and message.get("role") in ("user", "assistant")
+                and isinstance(message.get("content"), str)):
+            continue
+        # Bounds the tokenizing work; a longer turn could not fit the budget anyway
+        turn = make_turn(message["role"], message["content"][:HISTORY_TOKEN_BUDGET * 8])
+        used += turn["tokens"]
+        if used > HISTORY_TOKEN_BUDGET:
+            break
+        turns.append(turn)
+    while turns and turns[-1]["role"] != "user":
+        turns.pop()
+    return turns[::-1]
+
+async def append_turns(db, conversation_id: str, turns: list):
+    """Store turns from make_turn after the conversation's existing turns."""
+    conversation = await db.doubt_conversations.find_one_and_update(
+        {"id": conversation_id},
+        {"$inc": {"turn_count": len(turns)}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+        projection={"turn_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    first = conversation["turn_count"] - len(turns) + 1
+    await db.doubt_turns.insert_many([{
+        "conversation_id": conversation_id,
+        "seq": first + i,
+        **turn,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    } for i, turn in enumerate(turns)])
+
+async def _unsummarized_turns(db, conversation: dict, limit: int = 0) -> list:
+    """Turns after the summary, newest first."""
+    cursor = db.doubt_turns.find(
+        {"conversation_id": conversation["id"], "seq": {"$gt": conversation["summary_through"]}},
+        {"_id": 0, "seq": 1, "role": 1, "content": 1, "tokens": 1}
+    ).sort("seq", -1)
+    return await cursor.to_list(limit or None)
+
+async def build_messages(db, conversation: dict, question: str) -> list:
+    """Chat messages for the next question: fixed prefix, newest turns that fit, then the question.
+
+    Compaction normally keeps the unsummarized turns within HISTORY_TOKEN_BUDGET;
+    until it catches up, the oldest of them are left out rather than overflowing.
+    """
+    turns = await _unsummarized_turns(db, conversation, MAX_RECENT_TURNS)
+    return assemble_messages(conversation.get("summary"), turns, question)
+
+def assemble_messages(summary: str, turns: list, question: str) -> list:
+    """Messages for a question after `turns` (newest first), kept within HISTORY_TOKEN_BUDGET."""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary:
+        messages.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+
+    recent, used = [], 0
+    for turn in turns:
+        used += turn["tokens"]
+        if used > HISTORY_TOKEN_BUDGET:
+            break
+        recent.append({"role": turn["role"], "content": turn["content"]})
+    # Start on a question so the model never sees an answer without what it answered
+    while recent and recent[-1]["role"] != "user":
+        recent.pop()
+    messages.extend(reversed(recent))
+    messages.append({"role": "user", "content": question})
+    return messages
+
+async def compact_conversation(db, conversation_id: str, summarize):
+    """Fold the oldest turns into the summary once the rest exceed HISTORY_TOKEN_BUDGET.
+
+    Folds down to half the budget, so the summary (and with it the cached
+    prefix) changes once every few turns rather than on every one.
+    `summarize(previous_summary, turns)` returns the new summary; if it fails
+    the folded turns are dropped and the previous summary is kept.
+    """
+    conversation = await db.doubt_conversations.find_one({"id": conversation_id}, {"_id": 0})
+    if not conversation:
+        return
+    turns = list(reversed(await _unsummarized_turns(db, conversation)))
+    remaining = sum(turn["tokens"] for turn in turns)
+    if remaining <= HISTORY_TOKEN_BUDGET:
+        return
+
+    folded = []
+    # Fold whole question/answer pairs, leaving the kept turns starting on a question
+    while turns and (remaining > HISTORY_TOKEN_BUDGET // 2 or turns[0]["role"] != "user"):
+        turn = turns.pop(0)
+        remaining -= turn["tokens"]
+        folded.append(turn)
+
+    try:
+        summary = await summarize(conversation["summary"], folded)
+    except Exception as e:
+        logger.warning(f"Summarizing conversation {conversation_id} failed, truncating instead: {e}")
+        summary = conversation["summary"]
+
+    # Conditional on summary_through, so concurrent compactions of the same turns apply once
+    await db.doubt_conversations.update_one(
+        {"id": conversation_id, "summary_through": conversation["summary_through"]},
+        {"$set": {
+            "summary": clip_tokens(summary.strip(), SUMMARY_TOKEN_BUDGET),
+            "summary_through": folded[-1]["seq"],
+        }}
+    )
+
+def summary_request(previous_summary: str, turns: list) -> list:
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    return [
+        {"role": "system", "content": SUMMARIZE_PROMPT},
+        {"role": "user", "content": f"Summary so far:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"},
+    ]
+
+async def delete_conversation(db, conversation_id: str):
+    await db.doubt_turns.delete_many({"conversation_id": conversation_id})
+    await db.doubt_conversations.delete_one({"id": conversation_id})
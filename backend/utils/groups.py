@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+from utils.progress_counters import record_counter_changes
+from utils.response_cache import bump
+
+# Members are processed concurrently in batches of this size
+MEMBER_BATCH_SIZE = 50
+
+async def ensure_indexes(db):
+    await db.groups.create_index("id", unique=True)
+    await db.group_members.create_index([("group_id", 1), ("student_id", 1)], unique=True)
+    await db.group_members.create_index("student_id")
+    await db.tasks.create_index("assigned_groups")
+
+def group_principal(group_id: str) -> str:
+    """Reader token for access lists such as the search index."""
+    return f"group:{group_id}"
+
+async def student_groups(db, student_id: str) -> list:
+    return await db.group_members.distinct("group_id", {"student_id": student_id})
+
+async def task_query_for_student(db, student_id: str) -> dict:
+    """Query matching tasks assigned to the student directly or through a group."""
+    groups = await student_groups(db, student_id)
+    if not groups:
+        return {"assigned_to": student_id}
+    return {"$or": [{"assigned_to": student_id}, {"assigned_groups": {"$in": groups}}]}
+
+async def is_assigned(db, task: dict, student_id: str) -> bool:
+    if student_id in task.get('assigned_to', []):
+        return True
+    if not task.get('assigned_groups'):
+        return False
+    membership = await db.group_members.find_one(
+        {"group_id": {"$in": task['assigned_groups']}, "student_id": student_id},
+        {"_id": 1}
+    )
+    return membership is not None
+
+async def members_of(db, group_ids) -> set:
+    if not group_ids:
+        return set()
+    return set(await db.group_members.distinct("student_id", {"group_id": {"$in": list(group_ids)}}))
+
+async def assigned_students(db, task: dict) -> set:
+    """Everyone the task applies to: direct assignees plus members of its groups."""
+    return set(task.get('assigned_to', [])) | await members_of(db, task.get('assigned_groups', []))
+
+async def _granted_tasks_query(db, group_id: str, student_id: str) -> dict:
+    # Tasks of the group the student cannot already reach directly or via another group
+    other_groups = [group for group in await student_groups(db, student_id) if group != group_id]
+    return {"$and": [
+        {"assigned_groups": group_id},
+        {"assigned_to": {"$ne": student_id}},
+        {"assigned_groups": {"$nin": other_groups}},
+    ]}
+
+async def _apply_membership_change(db, membership: dict, sign: int):
+    group_id, student_id = membership['group_id'], membership['student_id']
+    # Tasks are only read: assignment lives in group_members, and per-task
+    # assigned counts come from the group's member_count (see utils/task_stats.py)
+    granted = await db.tasks.count_documents(await _granted_tasks_query(db, group_id, student_id))
+    await record_counter_changes(
+        db,
+        [(student_id, "total_tasks", sign * granted)],
+        # added_at tells a later re-add of the same student apart from a retry
+        op_key=f"group:{group_id}:{student_id}:{sign}:{membership['added_at']}"
+    )
+
+async def _add_member(db, group_id: str, student_id: str) -> bool:
+    membership = {
+        "group_id": group_id,
+        "student_id": student_id,
+        "added_at": datetime.now(timezone.utc).isoformat(),
+    }
+    try:
+        await db.group_members.insert_one(membership)
+    except DuplicateKeyError:
+        return False
+    await _apply_membership_change(db, membership, 1)
+    return True
+
+async def _remove_member(db, group_id: str, student_id: str) -> bool:
+    membership = await db.group_members.find_one_and_delete(
+        {"group_id": group_id, "student_id": student_id},
+        projection={"_id": 0}
+    )
+    if not membership:
+        return False
+    await _apply_membership_change(db, membership, -1)
+    return True
+
+async def _in_batches(db, group_id: str, student_ids, change) -> int:
+    student_ids = list(dict.fromkeys(student_ids))
+    changed = 0
+    for start in range(0, len(student_ids), MEMBER_BATCH_SIZE):
+        batch = student_ids[start:start + MEMBER_BATCH_SIZE]
+        results = await asyncio.gather(*(change(db, group_id, student_id) for student_id in batch))
+        changed += sum(results)
+    return changed
+
+async def add_members(db, group_id: str, student_ids) -> int:
+    """Add students to a group, granting its tasks. Returns how many were new members."""
+    added = await _in_batches(db, group_id, student_ids, _add_member)
+    if added:
+        await db.groups.update_one({"id": group_id}, {"$inc": {"member_count": added}})
+        bump("groups", "tasks", "progress")
+    return added
+
+async def remove_members(db, group_id: str, student_ids) -> int:
+    removed = await _in_batches(db, group_id, student_ids, _remove_member)
+    if removed:
+        await db.groups.update_one({"id": group_id}, {"$inc": {"member_count": -removed}})
+        bump("groups", "tasks", "progress")
+    return removed
+
+async def delete_group(db, group_id: str):
+    members = await db.group_members.distinct("student_id", {"group_id": group_id})
+    await remove_members(db, group_id, members)
+    await db.tasks.update_many({"assigned_groups": group_id}, {"$pull": {"assigned_groups": group_id}})
+    await db.groups.delete_one({"id": group_id})
+    bump("groups", "tasks")
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+from utils import response_cache
+
+logger = logging.getLogger(__name__)
+
+# "auto" tries change streams and falls back to the capped collection on a standalone server
+INVALIDATION_MODE = os.environ.get("CACHE_INVALIDATION_MODE", "auto")
+WATCHED_COLLECTIONS = (
+    "users", "tasks", "submissions", "chat_sessions",
+    "announcements", "progress", "groups", "group_members",
+)
+# Response cache resources that depend on each collection
+COLLECTION_RESOURCES = {
+    "groups": ("groups", "tasks"),
+    "group_members": ("groups", "tasks", "progress"),
+}
+CAPPED_COLLECTION = "cache_invalidations"
+CAPPED_SIZE_BYTES = 1024 * 1024
+RETRY_SECONDS = 1.0
+# Tells this worker's own entries in the capped collection apart from other workers'
+WORKER_ID = uuid.uuid4().hex
+
+# Server error codes meaning change streams are unavailable on this deployment
+_CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+# Resume token no longer in the oplog, or otherwise unusable
+_RESUME_FAILED = {260, 280, 286}
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+    collection: str
+    # Change stream operationType, "bump" for capped collection entries, "flush" when events may have been lost
+    operation: str
+    document_id: Optional[Any] = None
+    origin: Optional[str] = None
+
+# collection -> handlers called with each InvalidationEvent for it
+_handlers = {}
+_running_mode = None
+
+def subscribe(collection: str, handler):
+    _handlers.setdefault(collection, []).append(handler)
+
+def dispatch(event: InvalidationEvent):
+    for handler in _handlers.get(event.collection, []):
+        try:
+            handler(event)
+        except Exception:
+            logger.exception(f"Invalidation handler failed for {event.collection}")
+
+def flush_all():
+    """Invalidate everything; used whenever events may have been missed."""
+    for collection in WATCHED_COLLECTIONS:
+        dispatch(InvalidationEvent(collection, "flush"))
+
+def active() -> bool:
+    """Whether writes from other workers are currently being delivered."""
+    return _running_mode is not None
+
+def _bump_response_cache(event: InvalidationEvent):
+    response_cache.bump_local(*COLLECTION_RESOURCES.get(event.collection, (event.collection,)))
+
+for _collection in WATCHED_COLLECTIONS:
+    subscribe(_collection, _bump_response_cache)
+
+class ChangeStreamsUnsupported(Exception):
+    pass
+
+async def _tail_change_streams(db):
+    global _running_mode
+    pipeline = [
+        {"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}},
+        # Only the fields events are built from; _id carries the resume token
+        {"$project": {"ns": 1, "operationType": 1, "documentKey": 1}},
+    ]
+    resume_token = None
+    while True:
+        try:
+            async with db.watch(pipeline, resume_after=resume_token) as stream:
+                if _running_mode is None:
+                    _running_mode = "change_streams"
+                    # Anything written before the stream opened was not seen
+                    flush_all()
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    dispatch(InvalidationEvent(
+                        change["ns"]["coll"],
+                        change["operationType"],
+                        change.get("documentKey", {}).get("_id"),
+                    ))
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as error:
+            if error.code in _CHANGE_STREAMS_UNSUPPORTED:
+                raise ChangeStreamsUnsupported(str(error))
+            logger.warning(f"Invalidation change stream failed: {error}")
+            if resume_token is not None and error.code in _RESUME_FAILED:
+                resume_token = None
+                _running_mode = None
+        except PyMongoError as error:
+            # Resuming from the token replays whatever happened while disconnected
+            logger.warning(f"Invalidation change stream interrupted: {error}")
+        await asyncio.sleep(RETRY_SECONDS)
+
+async def _ensure_capped_collection(db):
+    try:
+        await db.create_collection(CAPPED_COLLECTION, capped=True, size=CAPPED_SIZE_BYTES)
+        # A tailable cursor on an empty collection dies immediately
+        await db[CAPPED_COLLECTION].insert_one({"resources": [], "origin": WORKER_ID})
+    except CollectionInvalid:
+        pass
+
+def _queue_local_bump(outbox: asyncio.Queue):
+    def listener(resources):
+        outbox.put_nowait(resources)
+    return listener
+
+async def _publish_bumps(db, outbox: asyncio.Queue):
+    while True:
+        resources = set(await outbox.get())
+        # Writes that land together go out as one entry
+        while not outbox.empty():
+            resources.update(outbox.get_nowait())
+        try:
+            await db[CAPPED_COLLECTION].insert_one({
+                "resources": sorted(resources),
+                "origin": WORKER_ID,
+                "at": datetime.now(timezone.utc).isoformat(),
+            })
+        except PyMongoError:
+            logger.exception("Failed to publish cache invalidation")
+
+async def _tail_capped_collection(db):
+    global _running_mode
+    outbox = asyncio.Queue()
+    response_cache.add_bump_listener(_queue_local_bump(outbox))
+    publisher = asyncio.create_task(_publish_bumps(db, outbox))
+    try:
+        await _ensure_capped_collection(db)
+        while True:
+            try:
+                # Entries are read in insertion ($natural) order, skipping up to the newest
+                # one present now. An _id predicate would not do: ObjectIds come from each
+                # worker's client, so another worker's later entry can have a smaller one.
+                newest = await db[CAPPED_COLLECTION].find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+                cursor = db[CAPPED_COLLECTION].find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                skipping = newest is not None
+                _running_mode = "capped"
+                flush_all()
+                while cursor.alive:
+                    async for entry in cursor:
+                        if skipping:
+                            skipping = entry["_id"] != newest["_id"]
+                            continue
+                        if entry.get("origin") == WORKER_ID:
+                            continue
+                        for resource in entry.get("resources", []):
+                            dispatch(InvalidationEvent(resource, "bump", origin=entry.get("origin")))
+                    if skipping:
+                        # Caught up without meeting it: it was overwritten before the cursor got
+                        # there, so some skipped entries may be new ones
+                        skipping = False
+                        flush_all()
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as error:
+                logger.warning(f"Invalidation feed interrupted: {error}")
+            # The position is lost with the cursor, so caches are flushed when it reopens
+            _running_mode = None
+            await asyncio.sleep(RETRY_SECONDS)
+    finally:
+        publisher.cancel()
+
+async def run_invalidation_bus(db, mode: str = INVALIDATION_MODE):
+    global _running_mode
+    if mode == "off":
+        return
+    try:
+        if mode in ("auto", "change_streams"):
+            try:
+                await _tail_change_streams(db)
+            except ChangeStreamsUnsupported as error:
+                if mode != "auto":
+                    raise
+                logger.info(f"Change streams unavailable, using {CAPPED_COLLECTION} for cache invalidation: {error}")
+        await _tail_capped_collection(db)
+    finally:
+        _running_mode = None
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from utils.response_cache import bump
+
+logger = logging.getLogger(__name__)
+
+LIKE_FLUSH_INTERVAL_SECONDS = float(os.environ.get("LIKE_FLUSH_INTERVAL_SECONDS", "2"))
+LIKE_RECONCILE_INTERVAL_SECONDS = float(os.environ.get("LIKE_RECONCILE_INTERVAL_SECONDS", "300"))
+
+# submission_id -> like count change not yet written to the submission document.
+# Held in memory only: if the process dies, up to LIKE_FLUSH_INTERVAL_SECONDS of
+# count changes are lost from submissions.likes (the like records themselves are
+# durable), until the reconciler recounts them from submission_likes.
+_pending = defaultdict(int)
+# submission_id -> (stored count, recounted) mismatch seen on the previous reconcile pass
+_mismatches = {}
+
+async def ensure_indexes(db):
+    # One record per (submission, user) makes liking idempotent
+    await db.submission_likes.create_index([("submission_id", 1), ("user_id", 1)], unique=True)
+    await db.submission_likes.create_index("user_id")
+
+async def add_like(db, submission_id: str, user_id: str) -> bool:
+    """Record the like; False if the user had already liked the submission."""
+    try:
+        await db.submission_likes.insert_one({
+            "submission_id": submission_id,
+            "user_id": user_id,
+            "liked_at": datetime.now(timezone.utc).isoformat(),
+        })
+    except DuplicateKeyError:
+        return False
+    _pending[submission_id] += 1
+    return True
+
+async def remove_like(db, submission_id: str, user_id: str) -> bool:
+    result = await db.submission_likes.delete_one({"submission_id": submission_id, "user_id": user_id})
+    if result.deleted_count == 0:
+        return False
+    _pending[submission_id] -= 1
+    return True
+
+async def delete_likes(db, submission_id: str):
+    _pending.pop(submission_id, None)
+    await db.submission_likes.delete_many({"submission_id": submission_id})
+
+async def flush_like_counts(db) -> int:
+    """Write the buffered count changes as one bulk $inc. Returns how many submissions changed."""
+    changes = {submission_id: delta for submission_id, delta in _pending.items() if delta}
+    _pending.clear()
+    if not changes:
+        return 0
+    try:
+        await db.submissions.bulk_write(
+            [UpdateOne({"id": submission_id}, {"$inc": {"likes": delta}}) for submission_id, delta in changes.items()],
+            ordered=False
+        )
+    except PyMongoError:
+        # Put them back for the next flush; likes made meanwhile add on top
+        for submission_id, delta in changes.items():
+            _pending[submission_id] += delta
+        raise
+    bump("submissions")
+    return len(changes)
+
+async def like_summary(db, submission_ids, user_id: str) -> dict:
+    """Like count and whether `user_id` liked it, for each existing submission in `submission_ids`."""
+    submission_ids = list(dict.fromkeys(submission_ids))
+    submissions, liked = await asyncio.gather(
+        db.submissions.find({"id": {"$in": submission_ids}}, {"_id": 0, "id": 1, "likes": 1}).to_list(None),
+        db.submission_likes.distinct("submission_id", {"submission_id": {"$in": submission_ids}, "user_id": user_id})
+    )
+    liked = set(liked)
+    return {
+        submission['id']: {
+            # Includes this worker's unflushed likes so a user sees their own like immediately
+            "likes": submission.get('likes', 0) + _pending.get(submission['id'], 0),
+            "liked_by_me": submission['id'] in liked,
+        }
+        for submission in submissions
+    }
+
+async def migrate_legacy_likes(db) -> int:
+    """Move likes counted before submission_likes existed into legacy_likes, once per submission.
+
+    Those likes have no per-user records, so the recount would otherwise drop
+    them. Submissions created since carry legacy_likes = 0 and are skipped.
+    Likes still buffered by a worker while this runs are not in the stored
+    count yet and are left out of legacy_likes.
+    """
+    migrated = 0
+    async for submission in db.submissions.find({"legacy_likes": {"$exists": False}}, {"_id": 0, "id": 1, "likes": 1}):
+        stored = submission.get('likes', 0)
+        recorded = await db.submission_likes.count_documents({"submission_id": submission['id']})
+        result = await db.submissions.update_one(
+            {"id": submission['id'], "legacy_likes": {"$exists": False}, "likes": submission.get('likes')},
+            {"$set": {"legacy_likes": max(stored - recorded, 0)}}
+        )
+        migrated += result.modified_count
+    return migrated
+
+async def reconcile_like_counts(db) -> dict:
+    """Recount submission_likes and repair submissions.likes where it drifted.
+
+    Other workers' unflushed changes also look like drift, so a submission is
+    only corrected when the same mismatch is seen on two consecutive passes,
+    far more than a flush interval apart. The correction is conditional on the
+    stored count, so it never overwrites a flush that landed in between.
+    Submissions not yet through migrate_legacy_likes are left alone.
+    """
+    counts = {}
+    async for row in db.submission_likes.aggregate([{"$group": {"_id": "$submission_id", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+
+    global _mismatches
+    seen, corrected, scanned = {}, 0, 0
+    async for submission in db.submissions.find(
+        {"legacy_likes": {"$exists": True}},
+        {"_id": 0, "id": 1, "likes": 1, "legacy_likes": 1}
+    ):
+        scanned += 1
+        stored = submission.get('likes', 0)
+        # This worker's own buffered changes are already counted in submission_likes
+        actual = submission['legacy_likes'] + counts.get(submission['id'], 0) - _pending.get(submission['id'], 0)
+        if stored == actual:
+            continue
+        if _mismatches.get(submission['id']) != (stored, actual):
+            seen[submission['id']] = (stored, actual)
+            continue
+        result = await db.submissions.update_one(
+            {"id": submission['id'], "likes": submission.get('likes')},
+            {"$set": {"likes": actual}}
+        )
+        corrected += result.modified_count
+    _mismatches = seen
+    if corrected:
+        bump("submissions")
+    return {"scanned": scanned, "corrected": corrected}
+
+async def run_like_reconciler(db, interval=LIKE_RECONCILE_INTERVAL_SECONDS):
+    # The first pass runs at startup, so counts lost in a crash are repaired one interval later
+    migrated = False
+    while True:
+        try:
+            if not migrated:
+                moved = await migrate_legacy_likes(db)
+                migrated = True
+                if moved:
+                    logger.info(f"Moved the like counts of {moved} submissions into legacy_likes")
+            stats = await reconcile_like_counts(db)
+            if stats["corrected"]:
+                logger.info(f"Like reconciliation corrected {stats['corrected']} of {stats['scanned']} submissions")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Like reconciliation failed")
+        await asyncio.sleep(interval)
+
+async def run_like_flusher(db, interval=LIKE_FLUSH_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_like_counts(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Like count flush failed")
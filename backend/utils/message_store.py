@@ -0,0 +1,265 @@
+import os
+import uuid
+from datetime import datetime, timezone
+
+# "documents": one document per message in db.messages (the original layout)
+# "buckets": messages appended to per-chat, per-hour documents in db.message_buckets
+MESSAGE_STORAGE = os.environ.get("MESSAGE_STORAGE", "documents")
+BUCKET_MAX_MESSAGES = int(os.environ.get("MESSAGE_BUCKET_MAX_MESSAGES", "200"))
+
+def bucketed() -> bool:
+    return MESSAGE_STORAGE == "buckets"
+
+async def ensure_indexes(db):
+    await db.messages.create_index([("chat_id", 1), ("created_at", 1), ("id", 1)])
+    await db.messages.create_index("id")
+    await db.message_buckets.create_index([("chat_id", 1), ("start", -1)])
+    await db.message_buckets.create_index([("chat_id", 1), ("hour", 1), ("count", 1)])
+    await db.message_buckets.create_index("messages.id")
+    await db.message_migrations.create_index("chat_id", unique=True)
+    # Blob read checks look up the chats a blob was sent in
+    await db.messages.create_index("blob_id", partialFilterExpression={"blob_id": {"$type": "string"}})
+    await db.message_buckets.create_index("messages.blob_id", partialFilterExpression={"messages.blob_id": {"$type": "string"}})
+
+def _hour_of(created_at: str) -> str:
+    return created_at[:13]
+
+async def insert_message(db, message_data: dict):
+    """Store a message document whose created_at is an ISO string."""
+    if not bucketed():
+        await db.messages.insert_one(message_data)
+        # insert_one adds _id to the dict it was given
+        message_data.pop('_id', None)
+        return
+
+    created_at = message_data['created_at']
+    # Fill the current hour's bucket; a full bucket makes the upsert open a new one
+    await db.message_buckets.update_one(
+        {"chat_id": message_data['chat_id'], "hour": _hour_of(created_at), "count": {"$lt": BUCKET_MAX_MESSAGES}},
+        {
+            "$push": {"messages": message_data},
+            "$inc": {"count": 1},
+            "$min": {"start": created_at},
+            "$max": {"end": created_at},
+            "$setOnInsert": {"id": str(uuid.uuid4())},
+        },
+        upsert=True
+    )
+
+def _visible(messages):
+    return [msg for msg in messages if not msg.get('is_deleted')]
+
+def _cursor_query(after=None, before=None):
+    """Mongo conditions for messages strictly after/before (created_at, id) cursors."""
+    conditions = []
+    if after:
+        created_at, message_id = after
+        conditions.append({"$or": [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "id": {"$gt": message_id or ""}},
+        ]})
+    if before:
+        created_at, message_id = before
+        conditions.append({"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": message_id or ""}},
+        ]})
+    return conditions
+
+def _in_window(message, after=None, before=None):
+    key = (message['created_at'], message['id'])
+    if after and key <= (after[0], after[1] or ""):
+        return False
+    if before and key >= (before[0], before[1] or ""):
+        return False
+    return True
+
+async def list_messages(db, chat_id: str, limit: int = 1000, after=None, before=None):
+    """Non-deleted messages of a chat, oldest first.
+
+    `after` and `before` are (created_at, id) cursors. With `after`, the
+    oldest `limit` messages newer than the cursor are returned (delta sync);
+    otherwise the newest `limit` messages, optionally older than `before`
+    (backward paging).
+    """
+    if not bucketed():
+        query = {"chat_id": chat_id, "is_deleted": False}
+        conditions = _cursor_query(after, before)
+        if conditions:
+            query["$and"] = conditions
+        direction = 1 if after else -1
+        messages = await db.messages.find(query, {"_id": 0}).sort(
+            [("created_at", direction), ("id", direction)]
+        ).limit(limit).to_list(limit)
+        if not after:
+            messages.reverse()
+        return messages
+
+    if after:
+        bucket_query = {"chat_id": chat_id, "end": {"$gte": after[0]}}
+        if before:
+            bucket_query["start"] = {"$lte": before[0]}
+        collected = []
+        cursor = db.message_buckets.find(bucket_query, {"_id": 0, "messages": 1}).sort("start", 1)
+        async for bucket in cursor:
+            collected += [msg for msg in _visible(bucket['messages']) if _in_window(msg, after, before)]
+            if len(collected) >= limit:
+                break
+        collected.sort(key=lambda msg: (msg['created_at'], msg['id']))
+        return collected[:limit]
+
+    bucket_query = {"chat_id": chat_id}
+    if before:
+        bucket_query["start"] = {"$lte": before[0]}
+    collected = []
+    cursor = db.message_buckets.find(
+        bucket_query,
+        {"_id": 0, "messages": 1}
+    ).sort("start", -1).batch_size(max(2, limit // BUCKET_MAX_MESSAGES + 1))
+    async for bucket in cursor:
+        collected = [msg for msg in _visible(bucket['messages']) if _in_window(msg, None, before)] + collected
+        if len(collected) >= limit:
+            break
+    collected.sort(key=lambda msg: (msg['created_at'], msg['id']))
+    return collected[-limit:]
+
+async def resolve_cursor(db, chat_id: str, message_id=None, timestamp=None):
+    """Turn a client's last seen message id and/or timestamp into a cursor."""
+    if message_id:
+        message = await find_message(db, message_id)
+        if message and message['chat_id'] == chat_id:
+            created_at = message['created_at']
+            if isinstance(created_at, datetime):
+                created_at = created_at.isoformat()
+            return created_at, message['id']
+    if timestamp:
+        # Stored timestamps are UTC isoformat() strings; normalize so they compare as strings
+        # Messages at exactly this timestamp are included; clients dedupe by id
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.astimezone(timezone.utc).isoformat(), None
+    return None
+
+async def chats_with_blob(db, blob_id: str) -> list:
+    """Ids of the chats with a message carrying this blob."""
+    if not bucketed():
+        return await db.messages.distinct("chat_id", {"blob_id": blob_id})
+    return await db.message_buckets.distinct("chat_id", {"messages.blob_id": blob_id})
+
+async def find_message(db, message_id: str):
+    if not bucketed():
+        return await db.messages.find_one({"id": message_id}, {"_id": 0})
+
+    bucket = await db.message_buckets.find_one(
+        {"messages.id": message_id},
+        {"_id": 0, "messages": {"$elemMatch": {"id": message_id}}}
+    )
+    return bucket['messages'][0] if bucket else None
+
+async def mark_deleted(db, message_id: str):
+    if not bucketed():
+        await db.messages.update_one({"id": message_id}, {"$set": {"is_deleted": True}})
+        return
+    await db.message_buckets.update_one(
+        {"messages.id": message_id},
+        {"$set": {"messages.$.is_deleted": True}}
+    )
+
+async def mark_read(db, chat_id: str, reader_id: str):
+    """Mark every message in the chat not sent by `reader_id` as read."""
+    if not bucketed():
+        await db.messages.update_many(
+            {"chat_id": chat_id, "sender_id": {"$ne": reader_id}, "is_read": False},
+            {"$set": {"is_read": True}}
+        )
+        return
+    await db.message_buckets.update_many(
+        {"chat_id": chat_id, "messages": {"$elemMatch": {"sender_id": {"$ne": reader_id}, "is_read": False}}},
+        {"$set": {"messages.$[unread].is_read": True}},
+        array_filters=[{"unread.sender_id": {"$ne": reader_id}, "unread.is_read": False}]
+    )
+
+def _pack_buckets(chat_id: str, messages: list) -> list:
+    """Group time-ordered messages into new bucket documents."""
+    buckets = []
+    current = None
+    for message in messages:
+        hour = _hour_of(message['created_at'])
+        if current is None or current['hour'] != hour or current['count'] >= BUCKET_MAX_MESSAGES:
+            current = {
+                "id": str(uuid.uuid4()),
+                "chat_id": chat_id,
+                "hour": hour,
+                "start": message['created_at'],
+                "end": message['created_at'],
+                "count": 0,
+                "messages": [],
+            }
+            buckets.append(current)
+        current['messages'].append(message)
+        current['count'] += 1
+        current['end'] = message['created_at']
+    return buckets
+
+async def migrate_to_buckets(db, batch_size: int = 5000):
+    """Copy per-message documents into buckets, one chat at a time.
+
+    Progress is checkpointed per chat in db.message_migrations as the last
+    copied (created_at, id), so a re-run copies only messages newer than
+    that, including ones written between a migration and the switch to
+    buckets. Messages whose id is already in a bucket are skipped, which
+    makes a batch interrupted before its checkpoint safe to repeat. Source
+    documents are left in place.
+    """
+    migrated_chats = 0
+    for chat_id in await db.messages.distinct("chat_id"):
+        checkpoint = await db.message_migrations.find_one({"chat_id": chat_id}, {"_id": 0})
+        after = (checkpoint['created_at'], checkpoint['id']) if checkpoint else None
+        copied = 0
+        while True:
+            query = {"chat_id": chat_id}
+            conditions = _cursor_query(after)
+            if conditions:
+                query["$and"] = conditions
+            batch = await db.messages.find(query, {"_id": 0}).sort(
+                [("created_at", 1), ("id", 1)]
+            ).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            # Cursor values keep the stored type, so the next query compares like with like
+            after = (batch[-1]['created_at'], batch[-1]['id'])
+
+            present = set()
+            async for bucket in db.message_buckets.find(
+                {"messages.id": {"$in": [message['id'] for message in batch]}},
+                {"_id": 0, "messages.id": 1}
+            ):
+                present.update(message['id'] for message in bucket['messages'])
+            pending = [message for message in batch if message['id'] not in present]
+            for message in pending:
+                if isinstance(message.get('created_at'), datetime):
+                    message['created_at'] = message['created_at'].isoformat()
+            if pending:
+                await db.message_buckets.insert_many(_pack_buckets(chat_id, pending))
+                copied += len(pending)
+
+            await db.message_migrations.update_one(
+                {"chat_id": chat_id},
+                {"$set": {"created_at": after[0], "id": after[1]}},
+                upsert=True
+            )
+        if copied:
+            migrated_chats += 1
+    return migrated_chats
+
+async def iter_messages(db, batch_size: int = 1000):
+    """Yield every stored message, whichever layout is active."""
+    if not bucketed():
+        async for message in db.messages.find({}, {"_id": 0}).batch_size(batch_size):
+            yield message
+        return
+    async for bucket in db.message_buckets.find({}, {"_id": 0, "messages": 1}).batch_size(max(1, batch_size // BUCKET_MAX_MESSAGES)):
+        for message in bucket['messages']:
+            yield message
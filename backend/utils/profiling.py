@@ -0,0 +1,228 @@
+import contextvars
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from jose import JWTError, jwt
+from pymongo import monitoring
+from utils.auth import SECRET_KEY, ALGORITHM
+
+# Fraction of /api requests profiled without being asked; admins can always ask with the header
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", "50"))
+PROFILE_INTERVAL_SECONDS = float(os.environ.get("PROFILE_INTERVAL_SECONDS", "0.005"))
+PROFILE_HEADER = b"x-profile"
+
+# Most recent profiles, oldest dropped first
+_profiles = deque(maxlen=PROFILE_BUFFER_SIZE)
+# The profile of the request being handled, if any; copied into Motor's worker threads
+_current = contextvars.ContextVar("current_profile", default=None)
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.id = str(uuid.uuid4())
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.duration = None
+        self.status = None
+        # Each sample is a stack of (function, file, line), outermost first
+        self.samples = []
+        # (kind, name, start offset, end offset) in seconds
+        self.spans = []
+        self._open_commands = {}
+
+    def offset(self) -> float:
+        return time.perf_counter() - self.start
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "samples": len(self.samples),
+            "calls": len(self.spans),
+        }
+
+class _Sampler(threading.Thread):
+    """Records the event loop thread's Python stack every PROFILE_INTERVAL_SECONDS.
+
+    Other requests running on the loop at the same time show up in the
+    samples too; profile under light traffic for a clean picture.
+    """
+    def __init__(self, profile: RequestProfile, thread_id: int):
+        super().__init__(daemon=True)
+        self.profile = profile
+        self.thread_id = thread_id
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(PROFILE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.profile.samples.append(stack)
+
+class MongoCallListener(monitoring.CommandListener):
+    """Adds a span per Mongo command to the current request's profile.
+
+    Register with pymongo.monitoring.register() before any client is created.
+    """
+    def started(self, event):
+        profile = _current.get()
+        if profile is not None:
+            collection = event.command.get(event.command_name)
+            name = f"{event.command_name} {collection}" if isinstance(collection, str) else event.command_name
+            profile._open_commands[event.request_id] = (name, profile.offset())
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        profile = _current.get()
+        if profile is not None:
+            opened = profile._open_commands.pop(event.request_id, None)
+            if opened:
+                profile.spans.append(("mongo", opened[0], opened[1], profile.offset()))
+
+@contextmanager
+def profile_span(kind: str, name: str):
+    """Time a block, e.g. an AI call, into the current request's profile."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = profile.offset()
+    try:
+        yield
+    finally:
+        profile.spans.append((kind, name, start, profile.offset()))
+
+def _requested_by_admin(scope) -> bool:
+    headers = dict(scope.get("headers", []))
+    if PROFILE_HEADER not in headers:
+        return False
+    authorization = headers.get(b"authorization", b"")
+    if not authorization.lower().startswith(b"bearer "):
+        return False
+    try:
+        payload = jwt.decode(authorization[7:].decode(), SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("role") == "admin"
+
+class ProfilingMiddleware:
+    """Profiles /api requests that carry X-Profile from an admin, or a sampled fraction."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/") or scope["path"].startswith("/api/profiles"):
+            await self.app(scope, receive, send)
+            return
+        if not _requested_by_admin(scope) and not (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _current.set(profile)
+        sampler = _Sampler(profile, threading.get_ident())
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stopped.set()
+            profile.duration = profile.offset()
+            _current.reset(token)
+            _profiles.append(profile)
+
+def list_profiles() -> list:
+    return [profile.summary() for profile in reversed(_profiles)]
+
+def get_profile(profile_id: str):
+    return next((profile for profile in _profiles if profile.id == profile_id), None)
+
+def _lanes(spans):
+    """Split spans into lanes of non-overlapping spans; concurrent calls land in separate lanes."""
+    lanes = []
+    for span in sorted(spans, key=lambda span: span[2]):
+        for lane in lanes:
+            if lane[-1][3] <= span[2]:
+                lane.append(span)
+                break
+        else:
+            lanes.append([span])
+    return lanes
+
+def to_speedscope(profile: RequestProfile) -> dict:
+    """The profile in speedscope's file format (https://www.speedscope.app)."""
+    frames = []
+    frame_index = {}
+
+    def frame_for(key, **fields):
+        if key not in frame_index:
+            frame_index[key] = len(frames)
+            frames.append(fields)
+        return frame_index[key]
+
+    end = (profile.duration or profile.offset()) * 1000
+    cpu_samples = [
+        [frame_for(frame, name=frame[0], file=frame[1], line=frame[2]) for frame in stack]
+        for stack in profile.samples
+    ]
+    profiles = [{
+        "type": "sampled",
+        "name": f"CPU {profile.method} {profile.path}",
+        "unit": "milliseconds",
+        "startValue": 0,
+        "endValue": end,
+        "samples": cpu_samples,
+        "weights": [PROFILE_INTERVAL_SECONDS * 1000] * len(cpu_samples),
+    }]
+    for number, lane in enumerate(_lanes(profile.spans), start=1):
+        events = []
+        for kind, name, start, finish in lane:
+            frame = frame_for((kind, name), name=f"{kind}: {name}")
+            events.append({"type": "O", "frame": frame, "at": start * 1000})
+            events.append({"type": "C", "frame": frame, "at": finish * 1000})
+        profiles.append({
+            "type": "evented",
+            "name": f"Awaited calls {number}",
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": end,
+            "events": events,
+        })
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"{profile.method} {profile.path} {profile.started_at.isoformat()}",
+        "exporter": "request profiler",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
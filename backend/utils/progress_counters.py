@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from utils.response_cache import bump
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = int(os.environ.get("PROGRESS_RECONCILE_INTERVAL_SECONDS", "600"))
+RECONCILE_CHUNK_SIZE = int(os.environ.get("PROGRESS_RECONCILE_CHUNK_SIZE", "500"))
+# How many applied op ids each progress document remembers for idempotency
+APPLIED_OPS_WINDOW = 200
+# Applied outbox entries are kept this long for auditing, then expire
+OUTBOX_RETENTION_SECONDS = 7 * 24 * 3600
+
+# student_id -> (completed, total, expected completed, expected total) seen on the previous pass
+_drift = {}
+
+async def ensure_indexes(db):
+    await db.progress_outbox.create_index("id", unique=True)
+    await db.progress_outbox.create_index([("applied", 1), ("created_at", 1)])
+    await db.progress_outbox.create_index("student_id")
+    await db.progress_outbox.create_index("applied_at", expireAfterSeconds=OUTBOX_RETENTION_SECONDS)
+    await db.progress.create_index("student_id")
+
+async def record_counter_changes(db, changes, op_key=None):
+    """Record counter deltas in the outbox and apply them.
+
+    `changes` is a list of (student_id, field, delta) tuples. When `op_key` is
+    given, entries get deterministic ids so that retrying the same logical
+    operation never records it twice.
+    """
+    entries = []
+    for student_id, field, delta in changes:
+        if not delta:
+            continue
+        op_id = f"{op_key}:{student_id}:{field}" if op_key else str(uuid.uuid4())
+        entries.append({
+            "id": op_id,
+            "student_id": student_id,
+            "field": field,
+            "delta": delta,
+            "applied": False,
+            "created_at": datetime.now(timezone.utc),
+        })
+    if not entries:
+        return
+
+    await db.progress_outbox.bulk_write(
+        [UpdateOne({"id": entry["id"]}, {"$setOnInsert": entry}, upsert=True) for entry in entries],
+        ordered=False
+    )
+    # Entries touch independent counters, so they are applied concurrently
+    await asyncio.gather(*(_apply_or_defer(db, entry) for entry in entries))
+
+async def _apply_or_defer(db, entry):
+    try:
+        await apply_outbox_entry(db, entry)
+    except Exception:
+        # Left pending; the drainer will retry it
+        logger.exception(f"Failed to apply progress outbox entry {entry['id']}")
+
+async def apply_outbox_entry(db, entry):
+    # The applied_ops guard makes this a no-op if the entry was already applied
+    await db.progress.update_one(
+        {"student_id": entry["student_id"], "applied_ops": {"$ne": entry["id"]}},
+        {
+            "$inc": {entry["field"]: entry["delta"]},
+            "$push": {"applied_ops": {"$each": [entry["id"]], "$slice": -APPLIED_OPS_WINDOW}},
+        }
+    )
+    bump("progress")
+    await db.progress_outbox.update_one(
+        {"id": entry["id"]},
+        {"$set": {"applied": True, "applied_at": datetime.now(timezone.utc)}}
+    )
+
+async def drain_outbox(db, limit=1000):
+    pending = await db.progress_outbox.find(
+        {"applied": False},
+        {"_id": 0}
+    ).sort("created_at", 1).to_list(limit)
+
+    applied = 0
+    for entry in pending:
+        try:
+            await apply_outbox_entry(db, entry)
+            applied += 1
+        except Exception:
+            logger.exception(f"Failed to apply progress outbox entry {entry['id']}")
+    return applied
+
+async def _count_completed(db, student_ids):
+    # Distinct (student, task) pairs, so duplicate submissions count once
+    pairs = await db.submissions.aggregate([
+        {"$match": {"student_id": {"$in": student_ids}}},
+        {"$group": {"_id": {"student_id": "$student_id", "task_id": "$task_id"}}},
+    ]).to_list(None)
+
+    task_ids = list({pair["_id"]["task_id"] for pair in pairs})
+    existing_tasks = set(await db.tasks.distinct("id", {"id": {"$in": task_ids}})) if task_ids else set()
+
+    completed = {}
+    for pair in pairs:
+        if pair["_id"]["task_id"] in existing_tasks:
+            student_id = pair["_id"]["student_id"]
+            completed[student_id] = completed.get(student_id, 0) + 1
+    return completed
+
+async def _count_assigned(db, student_ids):
+    rows = await db.tasks.aggregate([
+        {"$match": {"assigned_to": {"$in": student_ids}}},
+        {"$project": {"_id": 0, "assigned_to": 1}},
+        {"$unwind": "$assigned_to"},
+        {"$match": {"assigned_to": {"$in": student_ids}}},
+        {"$group": {"_id": "$assigned_to", "count": {"$sum": 1}}},
+    ]).to_list(None)
+    counts = {row["_id"]: row["count"] for row in rows}
+
+    # Tasks reached through groups, counted once per student
+    groups_of = {}
+    async for membership in db.group_members.find({"student_id": {"$in": student_ids}}, {"_id": 0}):
+        groups_of.setdefault(membership["student_id"], set()).add(membership["group_id"])
+    if not groups_of:
+        return counts
+
+    all_groups = list(set().union(*groups_of.values()))
+    tasks = db.tasks.find({"assigned_groups": {"$in": all_groups}}, {"_id": 0, "assigned_to": 1, "assigned_groups": 1})
+    async for task in tasks:
+        direct = set(task.get("assigned_to", []))
+        task_groups = set(task["assigned_groups"])
+        for student_id, groups in groups_of.items():
+            if student_id not in direct and groups & task_groups:
+                counts[student_id] = counts.get(student_id, 0) + 1
+    return counts
+
+async def reconcile_chunk(db, progress_docs, read_at):
+    """Correct drifted counters of `progress_docs`, which were read at `read_at`.
+
+    A write counted below may have its outbox entry recorded only afterwards,
+    so students with entries pending or recorded since `read_at` are skipped,
+    and drift is only corrected once the same figures are seen on two
+    consecutive passes.
+    """
+    global _drift
+    student_ids = [doc["student_id"] for doc in progress_docs]
+
+    completed = await _count_completed(db, student_ids)
+    assigned = await _count_assigned(db, student_ids)
+
+    # Checked after counting, so entries recorded while the counts were read are seen
+    busy = set(await db.progress_outbox.distinct(
+        "student_id",
+        {"student_id": {"$in": student_ids}, "$or": [{"applied": False}, {"created_at": {"$gte": read_at}}]}
+    ))
+
+    operations = []
+    for doc in progress_docs:
+        student_id = doc["student_id"]
+        seen = _drift.pop(student_id, None)
+        if student_id in busy:
+            continue
+        expected_completed = completed.get(student_id, 0)
+        expected_total = assigned.get(student_id, 0)
+        if doc.get("completed_tasks") == expected_completed and doc.get("total_tasks") == expected_total:
+            continue
+        drift = (doc.get("completed_tasks"), doc.get("total_tasks"), expected_completed, expected_total)
+        if seen != drift:
+            _drift[student_id] = drift
+            continue
+
+        logger.warning(
+            f"Progress drift for {student_id}: completed {doc.get('completed_tasks')} -> {expected_completed}, "
+            f"total {doc.get('total_tasks')} -> {expected_total}"
+        )
+        # Only overwrite if the counters are still what we read, so a
+        # concurrent increment is never clobbered
+        operations.append(UpdateOne(
+            {
+                "student_id": student_id,
+                "completed_tasks": doc.get("completed_tasks"),
+                "total_tasks": doc.get("total_tasks"),
+            },
+            {"$set": {"completed_tasks": expected_completed, "total_tasks": expected_total}}
+        ))
+
+    if not operations:
+        return 0
+    result = await db.progress.bulk_write(operations, ordered=False)
+    bump("progress")
+    return result.modified_count
+
+async def reconcile_progress(db, chunk_size=RECONCILE_CHUNK_SIZE):
+    """Recompute progress counters chunk by chunk and correct any drift."""
+    await drain_outbox(db)
+
+    corrected = 0
+    scanned = 0
+    last_student_id = None
+    while True:
+        query = {"student_id": {"$gt": last_student_id}} if last_student_id else {}
+        read_at = datetime.now(timezone.utc)
+        chunk = await db.progress.find(
+            query,
+            {"_id": 0, "student_id": 1, "completed_tasks": 1, "total_tasks": 1}
+        ).sort("student_id", 1).to_list(chunk_size)
+        if not chunk:
+            break
+
+        corrected += await reconcile_chunk(db, chunk, read_at)
+        scanned += len(chunk)
+        last_student_id = chunk[-1]["student_id"]
+        # Yield between chunks so request handlers are not starved
+        await asyncio.sleep(0)
+
+    return {"scanned": scanned, "corrected": corrected}
+
+async def run_progress_reconciler(db, interval=RECONCILE_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stats = await reconcile_progress(db)
+            if stats["corrected"]:
+                logger.info(f"Progress reconciliation corrected {stats['corrected']} of {stats['scanned']} students")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Progress reconciliation failed")
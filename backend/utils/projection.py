@@ -0,0 +1,46 @@
+from fastapi import HTTPException
+from typing import Optional
+
+# Fields each role may request, per resource
+FIELD_WHITELISTS = {
+    "tasks": {
+        "admin": {"id", "title", "description", "difficulty", "submission_type", "deadline", "created_by", "assigned_to", "assigned_groups", "created_at", "stats"},
+        # Students never see who else a task is assigned to
+        "student": {"id", "title", "description", "difficulty", "submission_type", "deadline", "created_by", "created_at"},
+    },
+    "submissions": {
+        "admin": {"id", "task_id", "student_id", "content", "submission_type", "blob_id", "status", "feedback", "ai_feedback", "submitted_at", "is_late", "likes"},
+        "student": {"id", "task_id", "student_id", "content", "submission_type", "blob_id", "status", "feedback", "ai_feedback", "submitted_at", "is_late", "likes"},
+    },
+}
+
+# Default for list views: everything the tables render, without large payloads
+SUMMARY_FIELDS = {
+    # stats is admin-only, so the role whitelist drops it for students
+    "tasks": {"id", "title", "description", "difficulty", "submission_type", "deadline", "created_by", "created_at", "stats"},
+    "submissions": {"id", "task_id", "student_id", "submission_type", "blob_id", "status", "feedback", "submitted_at", "is_late", "likes"},
+}
+
+def resolve_fields(resource: str, role: str, fields: Optional[str]) -> set:
+    """Turn a `fields=` query value into the set of fields to return.
+
+    Accepts "summary" (the default), "full", or a comma-separated list of
+    field names. Fields outside the role's whitelist are rejected.
+    """
+    allowed = FIELD_WHITELISTS[resource].get(role, set())
+    if not fields or fields == "summary":
+        return SUMMARY_FIELDS[resource] & allowed
+    if fields == "full":
+        return set(allowed)
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    forbidden = requested - allowed
+    if forbidden:
+        raise HTTPException(status_code=400, detail=f"Unknown or forbidden fields: {', '.join(sorted(forbidden))}")
+    return requested | {"id"}
+
+def projection(fields: set) -> dict:
+    projected = {"_id": 0}
+    for field in fields:
+        projected[field] = 1
+    return projected
@@ -0,0 +1,57 @@
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+
+# Where heavy, staleness-tolerant reads (leaderboard, admin listings, dashboard) go
+ANALYTICS_READ_PREFERENCE = os.environ.get("ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+# MongoDB accepts -1 (no bound) or at least 90 seconds
+ANALYTICS_MAX_STALENESS_SECONDS = int(os.environ.get("ANALYTICS_MAX_STALENESS_SECONDS", "90"))
+MAX_TRACKED_USERS = 10000
+
+_MODES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def read_preference(mode: str, max_staleness: int = -1):
+    if mode == "primary":
+        return Primary()
+    if mode not in _MODES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    return _MODES[mode](max_staleness=max_staleness)
+
+# Named profiles routes pick from; anything not routed explicitly reads from the primary
+READ_PROFILES = {
+    "primary": read_preference("primary"),
+    "analytics": read_preference(ANALYTICS_READ_PREFERENCE, ANALYTICS_MAX_STALENESS_SECONDS),
+}
+
+def reads(db, profile: str):
+    """`db` with the profile's read preference. Writes through it still go to the primary."""
+    return db.with_options(read_preference=READ_PROFILES[profile])
+
+# user id -> (cluster_time, operation_time) after their latest write on this worker
+_last_writes = OrderedDict()
+
+@asynccontextmanager
+async def causal_session(db, user_id: str):
+    """Causally consistent session for one user's requests.
+
+    The session starts from the user's last write recorded on this worker,
+    so reads through it wait until a secondary has caught up with that
+    write. Writes made in it are recorded for the user's later reads.
+    """
+    async with await db.client.start_session(causal_consistency=True) as session:
+        seen = _last_writes.get(user_id)
+        if seen:
+            session.advance_cluster_time(seen[0])
+            session.advance_operation_time(seen[1])
+        yield session
+        if session.operation_time is not None and session.cluster_time is not None:
+            _last_writes[user_id] = (session.cluster_time, session.operation_time)
+            _last_writes.move_to_end(user_id)
+            while len(_last_writes) > MAX_TRACKED_USERS:
+                _last_writes.popitem(last=False)
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from utils.serialization import dump_json
+
+CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+# Upper bound on how long an entry is trusted, in case a write bypassed bump()
+CACHE_MAX_AGE_SECONDS = float(os.environ.get("RESPONSE_CACHE_MAX_AGE_SECONDS", "60"))
+
+# Per-resource version counters, bumped on every write to that resource
+_versions = {}
+# key -> (versions, stored_at, etag, body)
+_cache = OrderedDict()
+
+# Called with the bumped resources, e.g. to publish them to other workers
+_bump_listeners = []
+
+def bump(*resources):
+    bump_local(*resources)
+    for listener in _bump_listeners:
+        listener(resources)
+
+def bump_local(*resources):
+    """Bump without notifying listeners; used for invalidations received from elsewhere."""
+    for resource in resources:
+        _versions[resource] = _versions.get(resource, 0) + 1
+
+def add_bump_listener(listener):
+    _bump_listeners.append(listener)
+
+def versions_of(resources):
+    return tuple(_versions.get(resource, 0) for resource in resources)
+
+def invalidate(prefix=""):
+    for key in [key for key in _cache if key.startswith(prefix)]:
+        del _cache[key]
+
+def _etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _respond(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def conditional_response(request: Request, key: str, resources, build, max_age: float = CACHE_MAX_AGE_SECONDS) -> Response:
+    """Serve `build()` with an ETag, answering 304 when the client is current.
+
+    While none of `resources` has been written since the entry was cached,
+    the stored ETag and body are reused and `build` is not called at all.
+    The ETag is a hash of the body, so it stays valid across workers.
+    """
+    current = versions_of(resources)
+    entry = _cache.get(key)
+    if entry is not None:
+        versions, stored_at, etag, body = entry
+        if versions == current and time.monotonic() - stored_at < max_age:
+            _cache.move_to_end(key)
+            return _respond(request, etag, body)
+        del _cache[key]
+
+    data = await build()
+    body = dump_json(data)
+    etag = _etag_for(body)
+
+    # Only cache if nothing was written while we were building
+    if versions_of(resources) == current:
+        _cache[key] = (current, time.monotonic(), etag, body)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return _respond(request, etag, body)
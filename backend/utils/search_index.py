@@ -0,0 +1,244 @@
+import logging
+import re
+from datetime import datetime, timezone
+from pymongo import ReplaceOne
+from utils import message_store
+from utils.groups import group_principal, student_groups
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("message", "task", "submission")
+# Prefixes are indexed up to this length; longer query terms are checked after the fetch
+MAX_PREFIX = 12
+MIN_TOKEN = 2
+MAX_TERMS_PER_DOC = 400
+SNIPPET_LENGTH = 160
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text):
+    if not text:
+        return []
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) >= MIN_TOKEN]
+
+def _searchable(text):
+    # Blob references and inline media carry no words worth indexing
+    if not text or text.startswith("blob:") or text.startswith("data:"):
+        return ""
+    return text
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def build_entry(kind, doc_id, title, body, readers, admin_visible, created_at, extra=None):
+    """Index document for one searchable item.
+
+    `terms` holds every distinct word plus its prefixes, so a single
+    multikey index serves both exact and prefix lookups.
+    """
+    title = _searchable(title)
+    body = _searchable(body)
+    counts = {}
+    for token in tokenize(title) * 3 + tokenize(body):
+        counts[token] = counts.get(token, 0) + 1
+    words = sorted(counts, key=counts.get, reverse=True)[:MAX_TERMS_PER_DOC]
+
+    terms = set()
+    for word in words:
+        for length in range(MIN_TOKEN, min(len(word), MAX_PREFIX) + 1):
+            terms.add(word[:length])
+
+    entry = {
+        "id": f"{kind}:{doc_id}",
+        "kind": kind,
+        "doc_id": doc_id,
+        "title": title[:SNIPPET_LENGTH],
+        "snippet": body[:SNIPPET_LENGTH],
+        "terms": sorted(terms),
+        "tf": {word: counts[word] for word in words},
+        "readers": readers,
+        "admin_visible": admin_visible,
+        "created_at": _iso(created_at),
+        "indexed_at": datetime.now(timezone.utc),
+    }
+    if extra:
+        entry.update(extra)
+    return entry
+
+def task_entry(task):
+    return build_entry(
+        "task", task['id'], task.get('title', ""), task.get('description', ""),
+        readers=list(task.get('assigned_to', [])) + [group_principal(group_id) for group_id in task.get('assigned_groups', [])],
+        admin_visible=True,
+        created_at=task.get('created_at')
+    )
+
+def submission_entry(submission):
+    return build_entry(
+        "submission", submission['id'], "", submission.get('content', ""),
+        readers=[submission['student_id']],
+        admin_visible=True,
+        created_at=submission.get('submitted_at'),
+        extra={"task_id": submission.get('task_id')}
+    )
+
+def message_entry(message, session):
+    # Only the two participants may find a chat message
+    return build_entry(
+        "message", message['id'], "", message.get('content', ""),
+        readers=[session['admin_id'], session['student_id']],
+        admin_visible=False,
+        created_at=message.get('created_at'),
+        extra={"chat_id": message['chat_id']}
+    )
+
+async def ensure_indexes(db):
+    await db.search_index.create_index("id", unique=True)
+    await db.search_index.create_index([("terms", 1), ("created_at", -1)])
+    await db.search_index.create_index("readers")
+    await db.search_index.create_index([("kind", 1), ("indexed_at", 1)])
+
+async def index_entry(db, entry):
+    try:
+        await db.search_index.replace_one({"id": entry['id']}, entry, upsert=True)
+    except Exception:
+        # Search lagging behind is recoverable with a reindex; the write is not
+        logger.exception(f"Failed to index {entry['id']}")
+
+async def remove_entry(db, kind, doc_id):
+    try:
+        await db.search_index.delete_one({"id": f"{kind}:{doc_id}"})
+    except Exception:
+        logger.exception(f"Failed to remove {kind}:{doc_id} from the search index")
+
+async def index_task(db, task):
+    await index_entry(db, task_entry(task))
+
+async def index_submission(db, submission):
+    await index_entry(db, submission_entry(submission))
+
+async def index_message(db, message, session=None):
+    if session is None:
+        session = await db.chat_sessions.find_one({"id": message['chat_id']}, {"_id": 0})
+        if not session:
+            return
+    await index_entry(db, message_entry(message, session))
+
+ENTRY_FIELDS = ("id", "kind", "doc_id", "title", "snippet", "created_at", "task_id", "chat_id")
+
+def search_pipeline(match, words, limit):
+    """Score every entry matching `match` inside the database and return the best `limit`.
+
+    Each query word scores 2 * (1 + ln tf) for an exact word match, else
+    1 + ln of the largest tf among the words it prefixes. Entries where a
+    word matches nothing are dropped; that happens for words longer than
+    MAX_PREFIX, which pass the terms match on their first MAX_PREFIX letters.
+    """
+    def tf_where(cond):
+        return {"$max": {"$cond": [cond, "$tf.v", 0]}}
+
+    scores = []
+    group = {"_id": "$id", **{field: {"$first": f"${field}"} for field in ENTRY_FIELDS if field != "id"}}
+    for i, word in enumerate(words):
+        group[f"exact{i}"] = tf_where({"$eq": ["$tf.k", word]})
+        group[f"prefix{i}"] = tf_where({"$regexMatch": {"input": "$tf.k", "regex": f"^{re.escape(word)}"}})
+        scores.append({"$cond": [
+            {"$gt": [f"$exact{i}", 0]},
+            {"$multiply": [2, {"$add": [1, {"$ln": f"$exact{i}"}]}]},
+            {"$add": [1, {"$ln": {"$max": [f"$prefix{i}", 1]}}]},
+        ]})
+
+    return [
+        {"$match": match},
+        {"$project": {**{field: 1 for field in ENTRY_FIELDS}, "_id": 0, "tf": {"$objectToArray": "$tf"}}},
+        {"$unwind": "$tf"},
+        {"$match": {"$or": [{"tf.k": {"$regex": f"^{re.escape(word)}"}} for word in words]}},
+        {"$group": group},
+        {"$match": {f"prefix{i}": {"$gt": 0} for i in range(len(words))}},
+        {"$project": {
+            "_id": 0,
+            "id": "$_id",
+            **{field: 1 for field in ENTRY_FIELDS if field != "id"},
+            "score": {"$add": scores},
+        }},
+        {"$sort": {"score": -1, "created_at": -1}},
+        {"$limit": limit},
+    ]
+
+async def search(db, current_user, query, kinds=None, limit=20):
+    """Ranked search over the items `current_user` may read.
+
+    Every query word must match a word or word prefix of the item. All
+    matches are ranked in the database by term frequency, with exact word
+    matches weighted above prefix matches, and only the best `limit` are
+    returned.
+    """
+    words = list(dict.fromkeys(tokenize(query)))
+    if not words:
+        return []
+
+    match = {"terms": {"$all": [word[:MAX_PREFIX] for word in words]}}
+    if kinds:
+        match["kind"] = {"$in": list(kinds)}
+    if current_user["role"] == "admin":
+        match["$or"] = [{"admin_visible": True}, {"readers": current_user["sub"]}]
+    else:
+        groups = await student_groups(db, current_user["sub"])
+        match["readers"] = {"$in": [current_user["sub"]] + [group_principal(group_id) for group_id in groups]}
+
+    # A common word can match more entries than $group holds in memory
+    ranked = await db.search_index.aggregate(search_pipeline(match, words, limit), allowDiskUse=True).to_list(limit)
+    for entry in ranked:
+        entry['score'] = round(entry['score'], 3)
+        # $group fills fields only some kinds have with null
+        for field in ("task_id", "chat_id"):
+            if entry.get(field) is None:
+                entry.pop(field, None)
+    return ranked
+
+async def _flush(db, operations):
+    if operations:
+        await db.search_index.bulk_write(operations, ordered=False)
+    return len(operations)
+
+async def reindex(db, kinds=KINDS, batch_size=1000):
+    """Rebuild the index for `kinds` from the source collections."""
+    counts = {}
+    for kind in kinds:
+        started_at = datetime.now(timezone.utc)
+        indexed = 0
+        operations = []
+
+        if kind == "task":
+            source = db.tasks.find({}, {"_id": 0})
+            to_entry = task_entry
+        elif kind == "submission":
+            source = db.submissions.find({}, {"_id": 0})
+            to_entry = submission_entry
+        else:
+            sessions = {
+                session['id']: session
+                async for session in db.chat_sessions.find({}, {"_id": 0, "id": 1, "admin_id": 1, "student_id": 1})
+            }
+            source = message_store.iter_messages(db, batch_size)
+
+            def to_entry(message):
+                session = sessions.get(message['chat_id'])
+                if session is None or message.get('is_deleted'):
+                    return None
+                return message_entry(message, session)
+
+        async for doc in source:
+            entry = to_entry(doc)
+            if entry is None:
+                continue
+            operations.append(ReplaceOne({"id": entry['id']}, entry, upsert=True))
+            if len(operations) >= batch_size:
+                indexed += await _flush(db, operations)
+                operations = []
+        indexed += await _flush(db, operations)
+
+        # Anything not rewritten since the rebuild started has no source document left
+        await db.search_index.delete_many({"kind": kind, "indexed_at": {"$lt": started_at}})
+        counts[kind] = indexed
+    return counts
@@ -0,0 +1,44 @@
+import os
+from functools import lru_cache
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+# Set FAST_SERIALIZATION=0 to fall back to the plain FastAPI path
+FAST_SERIALIZATION = os.environ.get("FAST_SERIALIZATION", "1") == "1"
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core's Rust encoder.
+
+    Understands models, datetimes and plain dicts directly, so content does
+    not need to go through jsonable_encoder first.
+    """
+    def render(self, content) -> bytes:
+        return to_json(content)
+
+def dump_json(content) -> bytes:
+    if FAST_SERIALIZATION:
+        return to_json(content)
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+@lru_cache(maxsize=None)
+def list_adapter(model):
+    return TypeAdapter(List[model])
+
+def trusted_list(model, docs):
+    """Build models for a list of documents read back from our own database.
+
+    A cached TypeAdapter validates the whole list in one pydantic-core call,
+    which benchmarks faster than per-item model_construct on pydantic 2.
+    """
+    if FAST_SERIALIZATION:
+        return list_adapter(model).validate_python(docs)
+    return [model(**doc) for doc in docs]
+
+def fast_response(content):
+    """Return `content` without FastAPI re-validating it against response_model."""
+    if FAST_SERIALIZATION:
+        return FastJSONResponse(content=content)
+    return content
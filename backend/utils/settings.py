@@ -0,0 +1,29 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Read before any module-level os.environ lookups elsewhere in the backend
+load_dotenv(ROOT_DIR / '.env')
+
+class Settings:
+    """Process-wide configuration, read once from the environment and backend/.env.
+
+    Module-specific tuning knobs stay next to the code they tune; this holds
+    what is shared across modules.
+    """
+    def __init__(self, env):
+        self.mongo_url = env['MONGO_URL']
+        self.db_name = env['DB_NAME']
+        self.jwt_secret_key = env.get("JWT_SECRET_KEY", "your-secret-key-change-in-production")
+        self.cors_origins = env.get('CORS_ORIGINS', '*').split(',')
+        self.groq_api_key = env.get('GROQ_API_KEY')
+        # Seconds from process start until the app is ready to serve
+        self.startup_budget_seconds = float(env.get("STARTUP_BUDGET_SECONDS", "3"))
+        self.enforce_startup_budget = env.get("ENFORCE_STARTUP_BUDGET", "false").lower() == "true"
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings(os.environ)
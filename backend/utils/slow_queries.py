@@ -0,0 +1,226 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "100"))
+# docsExamined per returned document above which a plan is flagged
+EXAMINED_RATIO_THRESHOLD = float(os.environ.get("SLOW_QUERY_EXAMINED_RATIO", "100"))
+MAX_SHAPES = 500
+
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Parts of a command describing what it matches rather than the session or transport
+_SHAPE_KEYS = ("filter", "query", "pipeline", "sort", "updates", "deletes", "key", "projection")
+_NOT_EXPLAINED = {
+    "lsid", "txnNumber", "$clusterTime", "$db", "$readPreference", "signature",
+    "autocommit", "startTransaction", "readConcern", "writeConcern",
+}
+_ID_SEGMENT = re.compile(r"^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{24}|\d+)$", re.IGNORECASE)
+
+# Route of the request issuing the command; copied into Motor's worker threads
+_route = contextvars.ContextVar("slow_query_route", default=None)
+# (database, collection, command, shape) -> aggregated stats
+_shapes = {}
+_dropped = 0
+# Commands finish on Motor's worker threads
+_lock = threading.Lock()
+_loop = None
+_client = None
+
+def normalize_route(method: str, path: str) -> str:
+    return f"{method} " + "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+def query_shape(value):
+    """The query with every literal replaced by "?", keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Stage lists and $and/$or branches keep their structure; literal arrays collapse
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return "?"
+    return "?"
+
+def _command_shape(command_name: str, command) -> str:
+    shape = {key: query_shape(command[key]) for key in _SHAPE_KEYS if key in command}
+    if command_name in ("update", "delete"):
+        # One entry per statement; the match part is what matters for the plan
+        statements = command.get("updates" if command_name == "update" else "deletes") or []
+        shape = {"q": query_shape(statements[0].get("q", {})) if statements else {}}
+    return json.dumps(shape, sort_keys=True, default=str)
+
+def _plan_stages(node, stages):
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.add(node["stage"])
+        for item in node.values():
+            _plan_stages(item, stages)
+    elif isinstance(node, list):
+        for item in node:
+            _plan_stages(item, stages)
+    return stages
+
+def _execution_stats(node):
+    if isinstance(node, dict):
+        if isinstance(node.get("executionStats"), dict):
+            return node["executionStats"]
+        for item in node.values():
+            found = _execution_stats(item)
+            if found:
+                return found
+    elif isinstance(node, list):
+        for item in node:
+            found = _execution_stats(item)
+            if found:
+                return found
+    return None
+
+def summarize_explain(explain: dict) -> dict:
+    stages = _plan_stages(explain.get("queryPlanner", explain), set())
+    stats = _execution_stats(explain) or {}
+    examined = stats.get("totalDocsExamined", 0)
+    returned = stats.get("nReturned", 0)
+    ratio = examined / max(returned, 1)
+    flags = []
+    if "COLLSCAN" in stages:
+        flags.append("COLLSCAN")
+    if ratio > EXAMINED_RATIO_THRESHOLD:
+        flags.append("HIGH_EXAMINED_RATIO")
+    return {
+        "stages": sorted(stages),
+        "docs_examined": examined,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "returned": returned,
+        "examined_ratio": round(ratio, 2),
+        "execution_ms": stats.get("executionTimeMillis"),
+        "flags": flags,
+    }
+
+async def _capture_explain(key, database: str, command: dict):
+    entry = _shapes.get(key)
+    if entry is None:
+        return
+    try:
+        explain = await _client[database].command({"explain": command, "verbosity": "executionStats"})
+        entry["explain"] = summarize_explain(explain)
+    except Exception as error:
+        entry["explain"] = {"error": str(error)}
+
+def _record(database: str, command_name: str, command, duration_ms: float, route):
+    global _dropped
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        return
+    key = (database, collection, command_name, _command_shape(command_name, command))
+    entry = _shapes.get(key)
+    if entry is None:
+        if len(_shapes) >= MAX_SHAPES:
+            _dropped += 1
+            return
+        entry = _shapes[key] = {
+            "database": database,
+            "collection": collection,
+            "command": command_name,
+            "shape": json.loads(key[3]),
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "routes": {},
+            "explain": None,
+        }
+        if _client is not None and _loop is not None:
+            entry["explain"] = "pending"
+            explained = {name: value for name, value in command.items() if name not in _NOT_EXPLAINED}
+            # Explain takes a single write statement
+            for statements in ("updates", "deletes"):
+                if statements in explained:
+                    explained[statements] = explained[statements][:1]
+            asyncio.run_coroutine_threadsafe(_capture_explain(key, database, explained), _loop)
+    entry["count"] += 1
+    entry["total_ms"] += duration_ms
+    entry["max_ms"] = max(entry["max_ms"], duration_ms)
+    entry["last_seen"] = datetime.now(timezone.utc).isoformat()
+    route = route or "background"
+    entry["routes"][route] = entry["routes"].get(route, 0) + 1
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Records commands slower than SLOW_QUERY_THRESHOLD_MS by query shape.
+
+    Register with pymongo.monitoring.register() before any client is created.
+    """
+    def __init__(self):
+        # (connection, request id) -> (database, command name, command, route); explainable commands only
+        self.pending = {}
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            self.pending[(event.connection_id, event.request_id)] = (event.database_name, event.command_name, event.command, _route.get())
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        if started and event.duration_micros / 1000 >= SLOW_QUERY_THRESHOLD_MS:
+            database, command_name, command, route = started
+            try:
+                with _lock:
+                    _record(database, command_name, command, event.duration_micros / 1000, route)
+            except Exception:
+                logger.exception("Failed to record slow query")
+
+class RouteTagMiddleware:
+    """Tags Mongo commands issued while handling a request with its route."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _route.set(normalize_route(scope["method"], scope["path"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _route.reset(token)
+
+def start_slow_query_log(client):
+    """Enable explain capture; must be called from the running event loop."""
+    global _loop, _client
+    _loop = asyncio.get_running_loop()
+    _client = client
+
+def slow_query_report() -> dict:
+    shapes = []
+    with _lock:
+        entries = [{**entry, "routes": dict(entry["routes"])} for entry in _shapes.values()]
+    for entry in entries:
+        shapes.append({
+            **entry,
+            "total_ms": round(entry["total_ms"], 3),
+            "max_ms": round(entry["max_ms"], 3),
+            "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+        })
+    shapes.sort(key=lambda entry: entry["total_ms"], reverse=True)
+    return {
+        "threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "shapes": shapes,
+        "flagged": sum(1 for entry in shapes if isinstance(entry["explain"], dict) and entry["explain"].get("flags")),
+        "dropped_shapes": _dropped,
+    }
+
+def reset_slow_query_log():
+    global _dropped
+    with _lock:
+        _shapes.clear()
+        _dropped = 0
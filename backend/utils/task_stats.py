@@ -0,0 +1,90 @@
+from pymongo import UpdateOne
+
+# Review states counted per task; other status values are only counted as submitted
+STATUS_FIELDS = ("pending", "approved", "rejected")
+
+# stats.assigned counts direct assignees only, so membership changes never
+# rewrite tasks. Readers add the member_count of each assigned group (see
+# add_group_members and the admin dashboard pipeline); a student
+# reached through more than one route is then counted once per route.
+def initial_stats(assigned_to) -> dict:
+    return {
+        "assigned": len(set(assigned_to or [])),
+        "submitted": 0,
+        "late": 0,
+        "pending": 0,
+        "approved": 0,
+        "rejected": 0,
+    }
+
+async def add_group_members(db, tasks: list):
+    """Add the member_count of each task's assigned groups to its stats.assigned, in place.
+
+    Tasks need `stats` and `assigned_groups`; those without stats are left as they are.
+    """
+    group_ids = {group_id for task in tasks if 'stats' in task for group_id in task.get('assigned_groups') or []}
+    if not group_ids:
+        return
+    member_counts = {
+        group['id']: group.get('member_count', 0)
+        async for group in db.groups.find({"id": {"$in": list(group_ids)}}, {"_id": 0, "id": 1, "member_count": 1})
+    }
+    for task in tasks:
+        if 'stats' in task:
+            task['stats']['assigned'] = task['stats'].get('assigned', 0) + sum(
+                member_counts.get(group_id, 0) for group_id in task.get('assigned_groups') or []
+            )
+
+def submission_delta(submission: dict, sign: int) -> dict:
+    """$inc document adding (sign=1) or removing (sign=-1) a submission from its task's stats."""
+    delta = {"stats.submitted": sign}
+    if submission.get('is_late'):
+        delta["stats.late"] = sign
+    if submission.get('status', 'pending') in STATUS_FIELDS:
+        delta[f"stats.{submission.get('status', 'pending')}"] = sign
+    return delta
+
+def status_delta(previous: str, current: str) -> dict:
+    delta = {}
+    if previous == current:
+        return delta
+    if previous in STATUS_FIELDS:
+        delta[f"stats.{previous}"] = -1
+    if current in STATUS_FIELDS:
+        delta[f"stats.{current}"] = 1
+    return delta
+
+async def apply_delta(db, task_id: str, delta: dict):
+    if delta:
+        await db.tasks.update_one({"id": task_id}, {"$inc": delta})
+
+async def rebuild_task_stats(db, batch_size: int = 500):
+    """Recompute every task's stats from the submissions collection and its direct assignees."""
+    counted = {}
+    rows = db.submissions.aggregate([
+        {"$group": {
+            "_id": "$task_id",
+            "submitted": {"$sum": 1},
+            "late": {"$sum": {"$cond": [{"$eq": ["$is_late", True]}, 1, 0]}},
+            **{status: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}} for status in STATUS_FIELDS},
+        }},
+    ])
+    async for row in rows:
+        counted[row["_id"]] = row
+
+    rebuilt = 0
+    operations = []
+    async for task in db.tasks.find({}, {"_id": 0, "id": 1, "assigned_to": 1}):
+        stats = initial_stats(task.get('assigned_to'))
+        row = counted.get(task['id'], {})
+        for field in ("submitted", "late") + STATUS_FIELDS:
+            stats[field] = row.get(field, 0)
+        operations.append(UpdateOne({"id": task['id']}, {"$set": {"stats": stats}}))
+        if len(operations) >= batch_size:
+            await db.tasks.bulk_write(operations, ordered=False)
+            rebuilt += len(operations)
+            operations = []
+    if operations:
+        await db.tasks.bulk_write(operations, ordered=False)
+        rebuilt += len(operations)
+    return rebuilt
@@ -4,10 +4,11 @@ import { useAuth } from '../context/AuthContext';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
-import { LayoutDashboard, Users, ListTodo, CheckSquare, MessageSquare, TrendingUp, Megaphone, LogOut, Menu, X } from 'lucide-react';
+import { LayoutDashboard, Users, UsersRound, ListTodo, CheckSquare, MessageSquare, TrendingUp, Megaphone, LogOut, Menu, X } from 'lucide-react';
 import * as api from '../utils/api';
 import { toast } from 'sonner';
 import { StudentsPage } from './admin/StudentsPage';
+import { GroupsPage } from './admin/GroupsPage';
 import { TasksPage } from './admin/TasksPage';
 import { SubmissionsPage } from './admin/SubmissionsPage';
 import { LeaderboardPage } from './admin/LeaderboardPage';
@@ -18,6 +19,7 @@ export const AdminDashboard = () => {
   const { user, logout } = useAuth();
   const navigate = useNavigate();
   const [stats, setStats] = useState({ students: 0, tasks: 0, submissions: 0 });
+  const [summary, setSummary] = useState(null);
   const [isMobileMenuOpen, setIsMobileMenuOpen] = useState(false);
 
   useEffect(() => {
@@ -26,16 +28,14 @@ export const AdminDashboard = () => {
 
   const loadStats = async () => {
     try {
-      const [studentsRes, tasksRes, submissionsRes] = await Promise.all([
-        api.getStudents(),
-        api.getTasks(),
-        api.getSubmissions()
-      ]);
+      const response = await api.getAdminDashboard();
+      const data = response.data;
       setStats({
-        students: studentsRes.data.length,
-        tasks: tasksRes.data.length,
-        submissions: submissionsRes.data.filter(s => s.status === 'pending').length
+        students: data.totals.students,
+        tasks: data.totals.tasks,
+        submissions: data.pending_review
       });
+      setSummary(data);
     } catch (error) {
       console.error('Failed to load stats:', error);
     }
@@ -108,6 +108,7 @@ export const AdminDashboard = () => {
         <div className="p-4 space-y-2">
           <NavItem to="/admin" icon={LayoutDashboard} label="Overview" />
           <NavItem to="/admin/students" icon={Users} label="Students" />
+          <NavItem to="/admin/groups" icon={UsersRound} label="Groups" />
           <NavItem to="/admin/tasks" icon={ListTodo} label="Tasks" />
           <NavItem to="/admin/submissions" icon={CheckSquare} label="Submissions" />
           <NavItem to="/admin/chats" icon={MessageSquare} label="Student Chats" />
@@ -123,6 +124,7 @@ export const AdminDashboard = () => {
           <aside className="hidden lg:block lg:col-span-1 space-y-2">
             <NavItem to="/admin" icon={LayoutDashboard} label="Overview" />
             <NavItem to="/admin/students" icon={Users} label="Students" />
+            <NavItem to="/admin/groups" icon={UsersRound} label="Groups" />
             <NavItem to="/admin/tasks" icon={ListTodo} label="Tasks" />
             <NavItem to="/admin/submissions" icon={CheckSquare} label="Submissions" />
             <NavItem to="/admin/chats" icon={MessageSquare} label="Student Chats" />
@@ -161,6 +163,50 @@ export const AdminDashboard = () => {
                       </CardContent>
                     </Card>
                   </div>
+                  {summary && (
+                    <div className="grid grid-cols-1 lg:grid-cols-2 gap-4">
+                      <Card data-testid="difficulty-completion-card">
+                        <CardHeader>
+                          <CardTitle className="text-lg sm:text-xl">Completion by Difficulty</CardTitle>
+                          <CardDescription>
+                            {summary.late_submissions} of {summary.totals.submissions} submissions late ({(summary.late_ratio * 100).toFixed(0)}%)
+                          </CardDescription>
+                        </CardHeader>
+                        <CardContent className="space-y-2">
+                          {summary.by_difficulty.length === 0 && (
+                            <p className="text-sm text-muted-foreground">No tasks yet</p>
+                          )}
+                          {summary.by_difficulty.map((row) => (
+                            <div key={row.difficulty} className="flex justify-between items-center text-sm">
+                              <span>{row.difficulty} <span className="text-muted-foreground">({row.tasks} tasks)</span></span>
+                              <span className="font-semibold">{row.completion_rate.toFixed(0)}%</span>
+                            </div>
+                          ))}
+                        </CardContent>
+                      </Card>
+                      <Card data-testid="recent-activity-card">
+                        <CardHeader>
+                          <CardTitle className="text-lg sm:text-xl">Recent Activity</CardTitle>
+                        </CardHeader>
+                        <CardContent className="space-y-2">
+                          {summary.recent_activity.length === 0 && (
+                            <p className="text-sm text-muted-foreground">No submissions yet</p>
+                          )}
+                          {summary.recent_activity.map((item) => (
+                            <div key={item.submission_id} className="flex justify-between items-center gap-2 text-sm">
+                              <span className="truncate">
+                                <span className="font-medium">{item.student_name || 'Unknown'}</span> submitted {item.task_title || 'a deleted task'}
+                              </span>
+                              <div className="flex gap-1 shrink-0">
+                                {item.is_late && <Badge variant="destructive">Late</Badge>}
+                                <Badge variant="outline">{item.status}</Badge>
+                              </div>
+                            </div>
+                          ))}
+                        </CardContent>
+                      </Card>
+                    </div>
+                  )}
                   <Card>
                     <CardHeader>
                       <CardTitle className="text-lg sm:text-xl">Quick Actions</CardTitle>
@@ -174,6 +220,7 @@ export const AdminDashboard = () => {
                 </div>
               } />
               <Route path="/students" element={<StudentsPage />} />
+              <Route path="/groups" element={<GroupsPage />} />
               <Route path="/tasks" element={<TasksPage />} />
               <Route path="/submissions" element={<SubmissionsPage />} />
               <Route path="/chats" element={<AdminChatsPage />} />
@@ -17,7 +17,6 @@ export const StudentDashboard = () => {
   const { user, logout } = useAuth();
   const navigate = useNavigate();
   const [progress, setProgress] = useState(null);
-  const [tasks, setTasks] = useState([]);
   const [todayTasks, setTodayTasks] = useState([]);
   const [unreadMessages, setUnreadMessages] = useState(0);
   const [isMobileMenuOpen, setIsMobileMenuOpen] = useState(false);
@@ -28,14 +27,11 @@ export const StudentDashboard = () => {
 
   const loadData = async () => {
     try {
-      const [progressRes, tasksRes, todayRes] = await Promise.all([
-        api.getMyProgress(),
-        api.getTasks(),
-        api.getTodayTasks()
-      ]);
-      setProgress(progressRes.data);
-      setTasks(tasksRes.data);
-      setTodayTasks(todayRes.data);
+      const { data } = await api.getStudentFeed();
+      // Sections the server could not load in time are fetched on their own
+      const partial = new Set(data.partial);
+      setProgress(partial.has('progress') ? (await api.getMyProgress()).data : data.progress);
+      setTodayTasks(partial.has('today_tasks') ? (await api.getTodayTasks()).data : data.today_tasks);
     } catch (error) {
       console.error('Failed to load data:', error);
       toast.error('Failed to load data');
@@ -6,7 +6,7 @@ import { Badge } from '../../components/ui/badge';
 import { Send, Sparkles, User, Shield, MessageCircle, Search } from 'lucide-react';
 import { useAuth } from '../../context/AuthContext';
 import * as api from '../../utils/api';
-import { getSocket } from '../../utils/socket';
+import { getSocket, resumeChat, mergeMessages } from '../../utils/socket';
 import { toast } from 'sonner';
 import axios from 'axios';
 
@@ -21,6 +21,7 @@ export const AdminChatsPage = () => {
   const [searchQuery, setSearchQuery] = useState('');
   const [unreadCounts, setUnreadCounts] = useState({});
   const messagesEndRef = useRef(null);
+  const messagesRef = useRef([]);
   const socket = getSocket();
   const typingTimeoutRef = useRef(null);
 
@@ -39,9 +40,23 @@ export const AdminChatsPage = () => {
   }, []);
 
   useEffect(() => {
+    messagesRef.current = messages;
     scrollToBottom();
   }, [messages]);
 
+  // After a reconnect, fetch only what was missed instead of the full history
+  useEffect(() => {
+    if (!chatSession) return;
+    const handleReconnect = async () => {
+      const current = messagesRef.current;
+      const lastId = current.length ? current[current.length - 1].id : undefined;
+      const missed = await resumeChat(chatSession.id, lastId);
+      setMessages((prev) => mergeMessages(prev, missed));
+    };
+    socket.on('connect', handleReconnect);
+    return () => socket.off('connect', handleReconnect);
+  }, [chatSession]);
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
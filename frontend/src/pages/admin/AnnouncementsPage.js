@@ -8,6 +8,7 @@ import { Textarea } from '../../components/ui/textarea';
 import { AlertDialog, AlertDialogAction, AlertDialogCancel, AlertDialogContent, AlertDialogDescription, AlertDialogFooter, AlertDialogHeader, AlertDialogTitle, AlertDialogTrigger } from '../../components/ui/alert-dialog';
 import { Megaphone, Trash2, Calendar } from 'lucide-react';
 import * as api from '../../utils/api';
+import { getSocket } from '../../utils/socket';
 import { toast } from 'sonner';
 import axios from 'axios';
 
@@ -22,6 +23,23 @@ export const AnnouncementsPage = () => {
 
   useEffect(() => {
     loadAnnouncements();
+
+    const socket = getSocket();
+    const handleCreated = (announcement) => {
+      setAnnouncements((prev) =>
+        prev.some((a) => a.id === announcement.id) ? prev : [announcement, ...prev]
+      );
+    };
+    const handleDeleted = ({ id }) => {
+      setAnnouncements((prev) => prev.filter((a) => a.id !== id));
+    };
+    socket.on('announcement_created', handleCreated);
+    socket.on('announcement_deleted', handleDeleted);
+
+    return () => {
+      socket.off('announcement_created', handleCreated);
+      socket.off('announcement_deleted', handleDeleted);
+    };
   }, []);
 
   const loadAnnouncements = async () => {
@@ -44,11 +62,13 @@ export const AnnouncementsPage = () => {
     try {
       const token = localStorage.getItem('token');
       axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
-      await api.createAnnouncement(formData);
+      const response = await api.createAnnouncement(formData);
       toast.success('Announcement created successfully');
       setIsDialogOpen(false);
       setFormData({ title: '', content: '' });
-      loadAnnouncements();
+      setAnnouncements((prev) =>
+        prev.some((a) => a.id === response.data.id) ? prev : [response.data, ...prev]
+      );
     } catch (error) {
       console.error('Failed to create announcement:', error);
       toast.error(error.response?.data?.detail || 'Failed to create announcement');
@@ -61,7 +81,7 @@ export const AnnouncementsPage = () => {
       axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
       await api.deleteAnnouncement(announcementId);
       toast.success('Announcement deleted successfully');
-      loadAnnouncements();
+      setAnnouncements((prev) => prev.filter((a) => a.id !== announcementId));
     } catch (error) {
       console.error('Failed to delete announcement:', error);
       toast.error('Failed to delete announcement');
@@ -0,0 +1,258 @@
+import React, { useState, useEffect } from 'react';
+import { Button } from '../../components/ui/button';
+import { Card, CardContent, CardHeader, CardTitle, CardDescription } from '../../components/ui/card';
+import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger, DialogFooter } from '../../components/ui/dialog';
+import { Input } from '../../components/ui/input';
+import { Label } from '../../components/ui/label';
+import { Badge } from '../../components/ui/badge';
+import { PlusCircle, Trash2, UserPlus, X } from 'lucide-react';
+import * as api from '../../utils/api';
+import { toast } from 'sonner';
+import axios from 'axios';
+
+export const GroupsPage = () => {
+  const [groups, setGroups] = useState([]);
+  const [students, setStudents] = useState([]);
+  const [members, setMembers] = useState({});
+  const [loading, setLoading] = useState(true);
+  const [isDialogOpen, setIsDialogOpen] = useState(false);
+  const [formData, setFormData] = useState({ name: '', description: '', member_ids: [] });
+  const [selectedGroup, setSelectedGroup] = useState(null);
+  const [studentToAdd, setStudentToAdd] = useState('');
+
+  useEffect(() => {
+    loadData();
+  }, []);
+
+  const loadData = async () => {
+    try {
+      setLoading(true);
+      const token = localStorage.getItem('token');
+      axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
+      const [groupsRes, studentsRes] = await Promise.all([
+        api.getGroups(),
+        api.getStudents()
+      ]);
+      setGroups(groupsRes.data);
+      setStudents(studentsRes.data);
+    } catch (error) {
+      console.error('Failed to load groups:', error);
+      toast.error('Failed to load groups');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadMembers = async (groupId) => {
+    try {
+      const response = await api.getGroupMembers(groupId);
+      setMembers({ ...members, [groupId]: response.data });
+    } catch (error) {
+      console.error('Failed to load members:', error);
+      toast.error('Failed to load members');
+    }
+  };
+
+  const toggleGroup = (groupId) => {
+    if (selectedGroup === groupId) {
+      setSelectedGroup(null);
+      return;
+    }
+    setSelectedGroup(groupId);
+    setStudentToAdd('');
+    loadMembers(groupId);
+  };
+
+  const handleSubmit = async (e) => {
+    e.preventDefault();
+    try {
+      await api.createGroup(formData);
+      toast.success('Group created successfully');
+      setIsDialogOpen(false);
+      setFormData({ name: '', description: '', member_ids: [] });
+      loadData();
+    } catch (error) {
+      console.error('Failed to create group:', error);
+      toast.error(error.response?.data?.detail || 'Failed to create group');
+    }
+  };
+
+  const handleDelete = async (groupId) => {
+    try {
+      await api.deleteGroup(groupId);
+      toast.success('Group deleted successfully');
+      if (selectedGroup === groupId) {
+        setSelectedGroup(null);
+      }
+      loadData();
+    } catch (error) {
+      console.error('Failed to delete group:', error);
+      toast.error('Failed to delete group');
+    }
+  };
+
+  const handleAddMember = async (groupId) => {
+    if (!studentToAdd) return;
+    try {
+      await api.addGroupMembers(groupId, [studentToAdd]);
+      setStudentToAdd('');
+      loadMembers(groupId);
+      loadData();
+    } catch (error) {
+      console.error('Failed to add member:', error);
+      toast.error(error.response?.data?.detail || 'Failed to add member');
+    }
+  };
+
+  const handleRemoveMember = async (groupId, studentId) => {
+    try {
+      await api.removeGroupMember(groupId, studentId);
+      loadMembers(groupId);
+      loadData();
+    } catch (error) {
+      console.error('Failed to remove member:', error);
+      toast.error('Failed to remove member');
+    }
+  };
+
+  if (loading) {
+    return <div className="flex justify-center items-center h-64">Loading...</div>;
+  }
+
+  return (
+    <div className="space-y-6">
+      <div className="flex flex-col sm:flex-row sm:justify-between sm:items-center gap-4">
+        <h2 className="text-2xl sm:text-3xl font-bold" data-testid="groups-page-title">Groups</h2>
+        <Dialog open={isDialogOpen} onOpenChange={setIsDialogOpen}>
+          <DialogTrigger asChild>
+            <Button data-testid="create-group-dialog-trigger" className="w-full sm:w-auto">
+              <PlusCircle className="w-4 h-4 mr-2" />
+              Create Group
+            </Button>
+          </DialogTrigger>
+          <DialogContent className="max-w-md mx-4 sm:mx-auto" data-testid="create-group-dialog">
+            <DialogHeader>
+              <DialogTitle>Create New Group</DialogTitle>
+            </DialogHeader>
+            <form onSubmit={handleSubmit} className="space-y-4">
+              <div>
+                <Label htmlFor="name">Name</Label>
+                <Input
+                  id="name"
+                  placeholder="Class 10-A"
+                  value={formData.name}
+                  onChange={(e) => setFormData({ ...formData, name: e.target.value })}
+                  required
+                  data-testid="group-name-input"
+                />
+              </div>
+              <div>
+                <Label htmlFor="description">Description</Label>
+                <Input
+                  id="description"
+                  value={formData.description}
+                  onChange={(e) => setFormData({ ...formData, description: e.target.value })}
+                  data-testid="group-description-input"
+                />
+              </div>
+              <div>
+                <Label>Members</Label>
+                <div className="border rounded-md p-3 max-h-40 overflow-y-auto space-y-2">
+                  {students.map((student) => (
+                    <div key={student.id} className="flex items-center space-x-2">
+                      <input
+                        type="checkbox"
+                        id={`member-${student.id}`}
+                        checked={formData.member_ids.includes(student.id)}
+                        onChange={(e) => {
+                          setFormData({
+                            ...formData,
+                            member_ids: e.target.checked
+                              ? [...formData.member_ids, student.id]
+                              : formData.member_ids.filter(id => id !== student.id)
+                          });
+                        }}
+                        className="w-4 h-4"
+                      />
+                      <label htmlFor={`member-${student.id}`} className="text-sm cursor-pointer">
+                        {student.name} ({student.email})
+                      </label>
+                    </div>
+                  ))}
+                </div>
+              </div>
+              <DialogFooter className="flex-col sm:flex-row gap-2">
+                <Button type="button" variant="outline" onClick={() => setIsDialogOpen(false)} className="w-full sm:w-auto">Cancel</Button>
+                <Button type="submit" data-testid="submit-create-group-button" className="w-full sm:w-auto">Create Group</Button>
+              </DialogFooter>
+            </form>
+          </DialogContent>
+        </Dialog>
+      </div>
+
+      {groups.length === 0 ? (
+        <Card>
+          <CardContent>
+            <p className="text-center text-muted-foreground py-8 text-sm sm:text-base">No groups yet. Create one to assign tasks to a whole class.</p>
+          </CardContent>
+        </Card>
+      ) : (
+        groups.map((group) => (
+          <Card key={group.id} data-testid={`group-card-${group.id}`}>
+            <CardHeader className="cursor-pointer" onClick={() => toggleGroup(group.id)}>
+              <div className="flex justify-between items-start gap-2">
+                <div>
+                  <CardTitle className="text-lg">{group.name}</CardTitle>
+                  {group.description && <CardDescription>{group.description}</CardDescription>}
+                </div>
+                <div className="flex items-center gap-2">
+                  <Badge variant="outline">{group.member_count} students</Badge>
+                  <Button
+                    variant="ghost"
+                    size="sm"
+                    onClick={(e) => { e.stopPropagation(); handleDelete(group.id); }}
+                    data-testid={`delete-group-${group.id}`}
+                  >
+                    <Trash2 className="w-4 h-4 text-destructive" />
+                  </Button>
+                </div>
+              </div>
+            </CardHeader>
+            {selectedGroup === group.id && (
+              <CardContent className="space-y-3">
+                <div className="flex gap-2">
+                  <select
+                    value={studentToAdd}
+                    onChange={(e) => setStudentToAdd(e.target.value)}
+                    className="flex-1 border rounded-md px-3 py-2 text-sm"
+                    data-testid={`add-member-select-${group.id}`}
+                  >
+                    <option value="">Add a student...</option>
+                    {students
+                      .filter(student => !(members[group.id] || []).some(member => member.id === student.id))
+                      .map(student => (
+                        <option key={student.id} value={student.id}>{student.name}</option>
+                      ))}
+                  </select>
+                  <Button size="sm" onClick={() => handleAddMember(group.id)} disabled={!studentToAdd}>
+                    <UserPlus className="w-4 h-4" />
+                  </Button>
+                </div>
+                <div className="flex flex-wrap gap-2">
+                  {(members[group.id] || []).map((member) => (
+                    <Badge key={member.id} variant="secondary" className="flex items-center gap-1">
+                      {member.name}
+                      <button onClick={() => handleRemoveMember(group.id, member.id)} aria-label={`Remove ${member.name}`}>
+                        <X className="w-3 h-3" />
+                      </button>
+                    </Badge>
+                  ))}
+                </div>
+              </CardContent>
+            )}
+          </Card>
+        ))
+      )}
+    </div>
+  );
+};
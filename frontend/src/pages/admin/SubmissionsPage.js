@@ -10,6 +10,8 @@ import * as api from '../../utils/api';
 import { toast } from 'sonner';
 import axios from 'axios';
 
+const BACKEND_URL = (process.env.REACT_APP_BACKEND_URL || '').replace(/\/$/, '');
+
 export const SubmissionsPage = () => {
   const [submissions, setSubmissions] = useState([]);
   const [selectedSubmission, setSelectedSubmission] = useState(null);
@@ -36,10 +38,18 @@ export const SubmissionsPage = () => {
     }
   };
 
-  const handleReview = (submission) => {
+  const handleReview = async (submission) => {
     setSelectedSubmission(submission);
     setFeedback(submission.feedback || '');
     setIsDialogOpen(true);
+    // The list only carries summaries; load the content for review
+    try {
+      const response = await api.getSubmission(submission.id);
+      setSelectedSubmission(response.data);
+    } catch (error) {
+      console.error('Failed to load submission:', error);
+      toast.error('Failed to load submission');
+    }
   };
 
   const handleApprove = async () => {
@@ -202,8 +212,11 @@ export const SubmissionsPage = () => {
               <div>
                 <h3 className="font-semibold mb-2 text-sm sm:text-base">Submission Content:</h3>
                 {selectedSubmission.file_url ? (
-                  <div className="border rounded p-4">
-                    <a href={selectedSubmission.file_url} target="_blank" rel="noopener noreferrer" className="text-primary hover:underline text-sm sm:text-base">
+                  <div className="border rounded p-4 space-y-3">
+                    {selectedSubmission.submission_type === 'image' && (
+                      <img src={`${BACKEND_URL}${selectedSubmission.file_url}`} alt="Submitted work" className="max-h-96 rounded" />
+                    )}
+                    <a href={`${BACKEND_URL}${selectedSubmission.file_url}`} target="_blank" rel="noopener noreferrer" className="text-primary hover:underline text-sm sm:text-base">
                       View Submitted File
                     </a>
                   </div>
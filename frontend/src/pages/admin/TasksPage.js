@@ -18,6 +18,7 @@ import axios from 'axios';
 export const TasksPage = () => {
   const [tasks, setTasks] = useState([]);
   const [students, setStudents] = useState([]);
+  const [groups, setGroups] = useState([]);
   const [loading, setLoading] = useState(true);
   const [isDialogOpen, setIsDialogOpen] = useState(false);
   const [formData, setFormData] = useState({
@@ -26,7 +27,8 @@ export const TasksPage = () => {
     difficulty: 'Medium',
     submission_type: 'text',
     deadline: '',
-    assigned_to: []
+    assigned_to: [],
+    assigned_groups: []
   });
 
   useEffect(() => {
@@ -38,12 +40,14 @@ export const TasksPage = () => {
       setLoading(true);
       const token = localStorage.getItem('token');
       axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
-      const [tasksRes, studentsRes] = await Promise.all([
-        api.getTasks(),
-        api.getStudents()
+      const [tasksRes, studentsRes, groupsRes] = await Promise.all([
+        api.getTasks('full'),
+        api.getStudents(),
+        api.getGroups()
       ]);
       setTasks(tasksRes.data);
       setStudents(studentsRes.data);
+      setGroups(groupsRes.data);
     } catch (error) {
       console.error('Failed to load data:', error);
       toast.error('Failed to load data');
@@ -66,7 +70,8 @@ export const TasksPage = () => {
         difficulty: 'Medium',
         submission_type: 'text',
         deadline: '',
-        assigned_to: []
+        assigned_to: [],
+        assigned_groups: []
       });
       loadData();
     } catch (error) {
@@ -193,6 +198,38 @@ export const TasksPage = () => {
                   data-testid="task-deadline-input"
                 />
               </div>
+              {groups.length > 0 && (
+                <div>
+                  <Label htmlFor="assigned_groups">Assign to Groups</Label>
+                  <div className="border rounded-md p-3 max-h-40 overflow-y-auto space-y-2">
+                    {groups.map((group) => (
+                      <div key={group.id} className="flex items-center space-x-2">
+                        <input
+                          type="checkbox"
+                          id={`group-${group.id}`}
+                          checked={formData.assigned_groups.includes(group.id)}
+                          onChange={(e) => {
+                            setFormData({
+                              ...formData,
+                              assigned_groups: e.target.checked
+                                ? [...formData.assigned_groups, group.id]
+                                : formData.assigned_groups.filter(id => id !== group.id)
+                            });
+                          }}
+                          className="w-4 h-4"
+                          data-testid={`assign-group-${group.id}`}
+                        />
+                        <label htmlFor={`group-${group.id}`} className="text-sm cursor-pointer">
+                          {group.name} ({group.member_count} students)
+                        </label>
+                      </div>
+                    ))}
+                  </div>
+                  <p className="text-xs text-muted-foreground mt-1">
+                    Students who join a group later also receive its tasks
+                  </p>
+                </div>
+              )}
               <div>
                 <Label htmlFor="assigned_to">Assign to Students</Label>
                 <div className="border rounded-md p-3 max-h-40 overflow-y-auto space-y-2">
@@ -259,6 +296,7 @@ export const TasksPage = () => {
                       <TableHead>Type</TableHead>
                       <TableHead>Difficulty</TableHead>
                       <TableHead>Deadline</TableHead>
+                      <TableHead>Submissions</TableHead>
                       <TableHead>Actions</TableHead>
                     </TableRow>
                   </TableHeader>
@@ -278,6 +316,18 @@ export const TasksPage = () => {
                             {new Date(task.deadline).toLocaleDateString()}
                           </div>
                         </TableCell>
+                        <TableCell data-testid={`task-stats-${task.id}`}>
+                          {task.stats ? (
+                            <div className="text-sm">
+                              <div>{task.stats.submitted}/{task.stats.assigned} submitted</div>
+                              <div className="text-xs text-muted-foreground">
+                                {task.stats.pending} pending · {task.stats.approved} approved · {task.stats.rejected} rejected · {task.stats.late} late
+                              </div>
+                            </div>
+                          ) : (
+                            <span className="text-sm text-muted-foreground">-</span>
+                          )}
+                        </TableCell>
                         <TableCell>
                           <AlertDialog>
                             <AlertDialogTrigger asChild>
@@ -340,6 +390,11 @@ export const TasksPage = () => {
                         <Calendar className="w-4 h-4" />
                         {new Date(task.deadline).toLocaleDateString()}
                       </div>
+                      {task.stats && (
+                        <div className="text-xs text-muted-foreground">
+                          {task.stats.submitted}/{task.stats.assigned} submitted · {task.stats.pending} pending · {task.stats.late} late
+                        </div>
+                      )}
                     </CardContent>
                   </Card>
                 ))}
@@ -10,6 +10,8 @@ import axios from 'axios';
 export const AIHelperPage = () => {
   const [question, setQuestion] = useState('');
   const [chatHistory, setChatHistory] = useState([]);
+  // The server keeps the transcript; only the conversation id is sent with each question
+  const [conversationId, setConversationId] = useState(null);
   const [loading, setLoading] = useState(false);
 
   const handleAskQuestion = async (e) => {
@@ -24,7 +26,8 @@ export const AIHelperPage = () => {
     try {
       const token = localStorage.getItem('token');
       axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
-      const response = await api.askDoubt(question, chatHistory);
+      const response = await api.askDoubt(question, conversationId);
+      setConversationId(response.data.conversation_id);
       
       const aiMessage = { role: 'assistant', content: response.data.answer };
       setChatHistory(prev => [...prev, aiMessage]);
@@ -41,6 +44,7 @@ export const AIHelperPage = () => {
 
   const handleClearChat = () => {
     setChatHistory([]);
+    setConversationId(null);
     setQuestion('');
   };
 
@@ -6,10 +6,12 @@ import { Badge } from '../../components/ui/badge';
 import { Send, Sparkles, User, Shield } from 'lucide-react';
 import { useAuth } from '../../context/AuthContext';
 import * as api from '../../utils/api';
-import { getSocket } from '../../utils/socket';
+import { getSocket, resumeChat, mergeMessages } from '../../utils/socket';
 import { toast } from 'sonner';
 import axios from 'axios';
 
+const PAGE_SIZE = 50;
+
 export const ChatPage = () => {
   const { user } = useAuth();
   const [messages, setMessages] = useState([]);
@@ -17,7 +19,10 @@ export const ChatPage = () => {
   const [chatSession, setChatSession] = useState(null);
   const [isTyping, setIsTyping] = useState(false);
   const [loading, setLoading] = useState(true);
+  const [hasOlder, setHasOlder] = useState(false);
   const messagesEndRef = useRef(null);
+  const messagesRef = useRef([]);
+  const prependingRef = useRef(false);
   const socket = getSocket();
   const typingTimeoutRef = useRef(null);
 
@@ -31,9 +36,49 @@ export const ChatPage = () => {
   }, []);
 
   useEffect(() => {
+    messagesRef.current = messages;
+    // Loading older history must not jump to the bottom
+    if (prependingRef.current) {
+      prependingRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
+  // After a reconnect, fetch only what was missed instead of the full history
+  useEffect(() => {
+    if (!chatSession) return;
+    const handleReconnect = async () => {
+      const current = messagesRef.current;
+      const lastId = current.length ? current[current.length - 1].id : undefined;
+      const missed = await resumeChat(chatSession.id, lastId);
+      setMessages((prev) => mergeMessages(prev, missed));
+    };
+    socket.on('connect', handleReconnect);
+    return () => socket.off('connect', handleReconnect);
+  }, [chatSession]);
+
+  const loadOlderMessages = async () => {
+    if (!chatSession || !hasOlder || messagesRef.current.length === 0) return;
+    try {
+      const olderRes = await api.getMessages(chatSession.id, {
+        before_id: messagesRef.current[0].id,
+        limit: PAGE_SIZE
+      });
+      setHasOlder(olderRes.data.length === PAGE_SIZE);
+      prependingRef.current = true;
+      setMessages((prev) => mergeMessages(olderRes.data, prev));
+    } catch (error) {
+      console.error('Failed to load older messages:', error);
+    }
+  };
+
+  const handleScroll = (e) => {
+    if (e.currentTarget.scrollTop === 0) {
+      loadOlderMessages();
+    }
+  };
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
@@ -52,13 +97,14 @@ export const ChatPage = () => {
       }
 
       setChatSession(session);
-      const messagesRes = await api.getMessages(session.id);
+      const messagesRes = await api.getMessages(session.id, { limit: PAGE_SIZE });
       setMessages(messagesRes.data);
+      setHasOlder(messagesRes.data.length === PAGE_SIZE);
 
       socket.emit('join_chat', { chat_id: session.id, user_id: user.id });
 
       socket.on('new_message', (message) => {
-        setMessages((prev) => [...prev, message]);
+        setMessages((prev) => mergeMessages(prev, [message]));
       });
 
       socket.on('user_typing', (data) => {
@@ -175,7 +221,7 @@ export const ChatPage = () => {
         {/* Glass Effect Container */}
         <div className="relative h-full backdrop-blur-xl bg-white/40 dark:bg-gray-900/40 border border-white/20 flex flex-col">
           {/* Messages Area */}
-          <div className="flex-1 overflow-y-auto p-3 sm:p-6 space-y-3 sm:space-y-4" data-testid="messages-container">
+          <div className="flex-1 overflow-y-auto p-3 sm:p-6 space-y-3 sm:space-y-4" data-testid="messages-container" onScroll={handleScroll}>
             {messages.length === 0 ? (
               <div className="flex flex-col items-center justify-center h-full text-center px-4">
                 <div className="w-16 h-16 sm:w-20 sm:h-20 rounded-full bg-gradient-to-br from-purple-500 to-pink-500 flex items-center justify-center mb-4">
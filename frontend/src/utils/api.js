@@ -15,8 +15,17 @@ export const getMe = () => axios.get(`${API}/users/me`);
 export const getStudents = () => axios.get(`${API}/users/students`);
 export const createStudent = (data) => axios.post(`${API}/users/students`, data);
 
+// Groups
+export const getGroups = () => axios.get(`${API}/groups/`);
+export const createGroup = (data) => axios.post(`${API}/groups/`, data);
+export const deleteGroup = (id) => axios.delete(`${API}/groups/${id}`);
+export const getGroupMembers = (id) => axios.get(`${API}/groups/${id}/members`);
+export const addGroupMembers = (id, studentIds) => axios.post(`${API}/groups/${id}/members`, { student_ids: studentIds });
+export const removeGroupMember = (id, studentId) => axios.delete(`${API}/groups/${id}/members/${studentId}`);
+
 // Tasks
-export const getTasks = () => axios.get(`${API}/tasks/`);
+// fields: "summary" (default), "full" or a comma-separated field list
+export const getTasks = (fields) => axios.get(`${API}/tasks/`, { params: { fields } });
 export const getTodayTasks = () => axios.get(`${API}/tasks/today`);
 export const getTask = (id) => axios.get(`${API}/tasks/${id}`);
 export const createTask = (data) => axios.post(`${API}/tasks/`, data);
@@ -24,16 +33,21 @@ export const updateTask = (id, data) => axios.put(`${API}/tasks/${id}`, data);
 export const deleteTask = (id) => axios.delete(`${API}/tasks/${id}`);
 
 // Submissions
-export const getSubmissions = () => axios.get(`${API}/submissions/`);
+export const getSubmissions = (fields) => axios.get(`${API}/submissions/`, { params: { fields } });
+export const getSubmission = (id) => axios.get(`${API}/submissions/${id}`);
 export const getTaskSubmissions = (taskId) => axios.get(`${API}/submissions/task/${taskId}`);
 export const createSubmission = (data) => axios.post(`${API}/submissions/`, data);
 export const updateSubmission = (id, data) => axios.put(`${API}/submissions/${id}`, data);
 export const likeSubmission = (id) => axios.post(`${API}/submissions/${id}/like`);
+export const unlikeSubmission = (id) => axios.delete(`${API}/submissions/${id}/like`);
+// Like counts and liked_by_me for a page of submissions, keyed by submission id
+export const getSubmissionLikes = (ids) => axios.get(`${API}/submissions/likes`, { params: { ids: ids.join(',') } });
 
 // Chat
 export const getChatSessions = () => axios.get(`${API}/chat/sessions`);
 export const createChatSession = (studentId) => axios.post(`${API}/chat/sessions?student_id=${studentId}`);
-export const getMessages = (chatId) => axios.get(`${API}/chat/messages/${chatId}`);
+// params: { limit, after_id, after, before_id } for delta sync and backward paging
+export const getMessages = (chatId, params) => axios.get(`${API}/chat/messages/${chatId}`, { params });
 export const sendMessage = (data) => axios.post(`${API}/chat/messages`, data);
 export const deleteMessage = (id, forEveryone) => 
   axios.delete(`${API}/chat/messages/${id}?delete_for_everyone=${forEveryone}`);
@@ -43,6 +57,10 @@ export const getMyProgress = () => axios.get(`${API}/progress/me`);
 export const getLeaderboard = () => axios.get(`${API}/progress/leaderboard`);
 export const getStudentProgress = (studentId) => axios.get(`${API}/progress/student/${studentId}`);
 
+// Dashboard
+export const getAdminDashboard = () => axios.get(`${API}/dashboard/admin`);
+export const getStudentFeed = () => axios.get(`${API}/feed/student`);
+
 // Announcements
 export const getAnnouncements = () => axios.get(`${API}/announcements/`);
 export const createAnnouncement = (data) => axios.post(`${API}/announcements/`, data);
@@ -52,5 +70,8 @@ export const deleteAnnouncement = (id) => axios.delete(`${API}/announcements/${i
 export const analyzeImage = (imageBase64, prompt) => 
   axios.post(`${API}/ai/analyze-image`, { image_base64: imageBase64, prompt });
 
-export const askDoubt = (question, chatHistory = []) => 
-  axios.post(`${API}/ai/doubt-solver`, { question, chat_history: chatHistory });
\ No newline at end of file
+export const askDoubt = (question, conversationId = null) => 
+  axios.post(`${API}/ai/doubt-solver`, { question, conversation_id: conversationId });
+export const getDoubtConversations = () => axios.get(`${API}/ai/conversations`);
+export const getDoubtConversation = (id) => axios.get(`${API}/ai/conversations/${id}`);
+export const deleteDoubtConversation = (id) => axios.delete(`${API}/ai/conversations/${id}`);
\ No newline at end of file
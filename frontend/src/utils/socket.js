@@ -15,6 +15,12 @@ export const initializeSocket = () => {
 
     socket.on('connect', () => {
       console.log('Socket connected:', socket.id);
+      // Rejoined on every (re)connect so announcement pushes resume
+      socket.emit('join_announcements');
+      const token = localStorage.getItem('token');
+      if (token) {
+        socket.emit('join_user', { token });
+      }
     });
 
     socket.on('disconnect', () => {
@@ -35,6 +41,36 @@ export const getSocket = () => {
   return socket;
 };
 
+const emitResume = (chatId, lastMessageId) => {
+  const socket = getSocket();
+  const token = localStorage.getItem('token');
+  return new Promise((resolve) => {
+    socket.emit('resume', { chat_id: chatId, token, last_message_id: lastMessageId }, resolve);
+  });
+};
+
+// Rejoins a chat room and resolves with every message sent after lastMessageId;
+// each resume returns one page, so long gaps are fetched until has_more is false
+export const resumeChat = async (chatId, lastMessageId) => {
+  const missed = [];
+  let cursor = lastMessageId;
+  for (;;) {
+    const response = await emitResume(chatId, cursor);
+    const messages = response?.messages || [];
+    missed.push(...messages);
+    if (!response?.has_more || messages.length === 0) {
+      return missed;
+    }
+    cursor = messages[messages.length - 1].id;
+  }
+};
+
+// Appends messages not already present, keeping order
+export const mergeMessages = (existing, incoming) => {
+  const seen = new Set(existing.map((m) => m.id));
+  return [...existing, ...incoming.filter((m) => !seen.has(m.id))];
+};
+
 export const disconnectSocket = () => {
   if (socket) {
     socket.disconnect();